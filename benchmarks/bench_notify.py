@@ -0,0 +1,111 @@
+"""In-process benchmarks of the notify server's call_tool.
+
+Prints a JSON object of results to stdout, one entry per scenario and
+concurrency level. Usually run through run.py.
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+from harness import measure, use_server
+
+
+def scenarios() -> dict:
+    """Tool calls to measure, by name: (tool, argument builder)."""
+    return {
+        # Full path: queue, worker thread, backend, history and metrics listeners
+        "merge_wait": (
+            "notify_merge",
+            lambda i: {"source_branch": f"feature/{i}", "repo": "bench", "wait": True},
+        ),
+        # Acknowledgement only: enqueue and return
+        "merge_queued": (
+            "notify_merge",
+            lambda i: {"source_branch": f"feature/{i}", "repo": "bench"},
+        ),
+        # Loop protection checks on top of delivery
+        "ask_wait": (
+            "ask_user",
+            lambda i: {
+                "title": "Bench",
+                "question": f"Question {i}?",
+                "options": ["yes", "no"],
+                "agent": "bench",
+                "wait": True,
+            },
+        ),
+        # Held in the coalescing window
+        "commit_coalesced": (
+            "notify_commit",
+            lambda i: {"branch": "main", "message": f"commit {i}", "repo": "bench"},
+        ),
+        # Ten notifications in one dispatcher job
+        "batch10_wait": (
+            "notify_batch",
+            lambda i: {
+                "events": [
+                    {"type": "merge", "source_branch": f"b{i}-{n}"} for n in range(10)
+                ],
+                "wait": True,
+            },
+        ),
+        "list_notifications": ("list_notifications", lambda i: {"limit": 20}),
+    }
+
+
+async def run(calls: int, concurrency: list[int]) -> dict:
+    """Measure every scenario at every concurrency level."""
+    import server
+
+    server.dispatcher.start()
+    # Unique across scenarios and warmups, so no question is a duplicate
+    sequence = itertools.count()
+    results = {}
+    try:
+        for name, (tool, arguments) in scenarios().items():
+            for callers in concurrency:
+
+                async def call(index: int) -> None:
+                    await server.call_tool(tool, arguments(next(sequence)))
+
+                results[f"notify.{name}.c{callers}"] = await measure(
+                    call, calls, callers
+                )
+                # Do not let queued work leak into the next scenario
+                for coalescer in server.coalescers.values():
+                    await coalescer.flush()
+                await server.dispatcher.stop(drain=True)
+                server.dispatcher.start()
+    finally:
+        await server.dispatcher.stop(drain=True)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=500)
+    parser.add_argument("--concurrency", default="1,8")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="mcp-notify-bench-") as tmp:
+        # Real history database, no rate limiting of the generated questions
+        os.environ.setdefault("MCP_NOTIFY_HISTORY", str(Path(tmp) / "history.db"))
+        os.environ.setdefault("MCP_NOTIFY_ASK_RATE", "0")
+        use_server("notify")
+        from fakes import install_notify_fakes
+
+        install_notify_fakes()
+        concurrency = [int(n) for n in args.concurrency.split(",")]
+        results = asyncio.run(run(args.calls, concurrency))
+
+    json.dump(results, sys.stdout)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""In-process benchmarks of the screenshot server's call_tool.
+
+Capture is replaced by writing a generated PNG (see fakes.py), so the
+results cover the server's own work: cleanup, metadata and formatting.
+Prints a JSON object of results to stdout. Usually run through run.py.
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+from harness import measure, use_server
+
+
+def scenarios() -> dict:
+    """Tool calls to measure, by name: (tool, arguments)."""
+    return {
+        "screen": ("screenshot", {"mode": "screen"}),
+        "window": ("screenshot", {"mode": "window", "window_title": "Terminal"}),
+    }
+
+
+async def run(calls: int, concurrency: list[int]) -> dict:
+    """Measure every scenario at every concurrency level."""
+    import server
+
+    results = {}
+    for name, (tool, arguments) in scenarios().items():
+        for callers in concurrency:
+
+            async def call(index: int) -> None:
+                await server.call_tool(tool, dict(arguments))
+
+            results[f"screenshot.{name}.c{callers}"] = await measure(
+                call, calls, callers
+            )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=100)
+    parser.add_argument("--concurrency", default="1,8")
+    args = parser.parse_args()
+
+    use_server("screenshot")
+    import screenshotter
+    from fakes import install_screenshot_fakes
+
+    install_screenshot_fakes()
+    with tempfile.TemporaryDirectory(prefix="mcp-screenshot-bench-") as tmp:
+        screenshotter.SCREENSHOT_DIR = Path(tmp)
+        concurrency = [int(n) for n in args.concurrency.split(",")]
+        results = asyncio.run(run(args.calls, concurrency))
+
+    json.dump(results, sys.stdout)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""Cold start: time from spawning a server to its first list_tools response.
+
+Spawns the real servers (notify with the null backend) and speaks raw
+JSON-RPC over their stdio: initialize, initialized, tools/list. The notify
+shim is measured too, against a daemon it starts on the first run. Exits
+with status 1 when a median exceeds --budget-ms (default BUDGET_MS, 0
+disables the check). Prints a JSON object of results to stdout. Usually run
+through run.py.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from harness import SERVERS, summarize
+
+INITIALIZE = {
+    "jsonrpc": "2.0",
+    "id": 1,
+    "method": "initialize",
+    "params": {
+        "protocolVersion": "2025-06-18",
+        "capabilities": {},
+        "clientInfo": {"name": "bench-startup", "version": "1"},
+    },
+}
+INITIALIZED = {"jsonrpc": "2.0", "method": "notifications/initialized"}
+LIST_TOOLS = {"jsonrpc": "2.0", "id": 2, "method": "tools/list"}
+
+# Median time to first list_tools a server may take, in milliseconds
+BUDGET_MS = 1500.0
+
+# Commands to measure: name -> script
+TARGETS = {
+    "notify": SERVERS / "notify" / "server.py",
+    "notify_shim": SERVERS / "notify" / "shim.py",
+    "screenshot": SERVERS / "screenshot" / "server.py",
+}
+
+
+def first_list_tools(script: Path, env: dict) -> float:
+    """Seconds from spawn until the tools/list response is read."""
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, str(script)],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        env={**env, "PYTHONPATH": str(script.parent)},
+    )
+    try:
+
+        def send(message: dict) -> None:
+            process.stdin.write(json.dumps(message).encode() + b"\n")
+            process.stdin.flush()
+
+        def receive(request_id: int) -> dict:
+            while line := process.stdout.readline():
+                message = json.loads(line)
+                if message.get("id") == request_id:
+                    return message
+            raise RuntimeError(f"{script.name} exited before answering")
+
+        send(INITIALIZE)
+        receive(1)
+        send(INITIALIZED)
+        send(LIST_TOOLS)
+        if not receive(2).get("result", {}).get("tools"):
+            raise RuntimeError(f"{script.name} returned no tools")
+        return time.perf_counter() - start
+    finally:
+        process.stdin.close()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument(
+        "--budget-ms",
+        type=float,
+        default=BUDGET_MS,
+        help="Fail when a median startup exceeds this (0: no budget)",
+    )
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="mcp-startup-bench-") as tmp:
+        env = {
+            **os.environ,
+            "MCP_NOTIFY_BACKEND": "null",
+            "MCP_NOTIFY_HISTORY": str(Path(tmp) / "history.db"),
+            "MCP_NOTIFY_SOCKET": str(Path(tmp) / "notify.sock"),
+            # The daemon started by the first shim run exits soon after
+            "MCP_NOTIFY_DAEMON_IDLE": "5",
+        }
+        for name, script in TARGETS.items():
+            if name == "notify_shim":
+                first_list_tools(script, env)  # Start the daemon, not measured
+            latencies = [first_list_tools(script, env) for _ in range(args.runs)]
+            results[f"startup.{name}"] = summarize(latencies, sum(latencies))
+
+    json.dump(results, sys.stdout)
+
+    if args.budget_ms:
+        over = [
+            f"{name}: p50 {stats['p50_ms']:.0f} ms"
+            for name, stats in results.items()
+            if stats["p50_ms"] > args.budget_ms
+        ]
+        if over:
+            print(
+                f"Over the {args.budget_ms:.0f} ms startup budget: " + ", ".join(over),
+                file=sys.stderr,
+            )
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Benchmarks over real stdio MCP framing.
+
+Spawns each server as a subprocess (with fakes installed, see
+stdio_server.py) and measures startup until the initialize handshake
+completes, then tool call latency through a client session. Prints a JSON
+object of results to stdout. Usually run through run.py.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+
+from harness import measure, summarize
+
+HERE = Path(__file__).resolve().parent
+
+# Tool call measured per server: (tool, argument builder)
+CALLS = {
+    "notify": (
+        "notify_merge",
+        lambda i: {"source_branch": f"feature/{i}", "repo": "bench", "wait": True},
+    ),
+    "screenshot": ("screenshot", lambda i: {"mode": "screen"}),
+}
+
+
+def parameters(name: str, env: dict) -> StdioServerParameters:
+    """How to spawn a faked server."""
+    return StdioServerParameters(
+        command=sys.executable,
+        args=[str(HERE / "stdio_server.py"), name],
+        env={**os.environ, **env},
+    )
+
+
+async def startup(name: str, env: dict, runs: int) -> dict:
+    """Time from spawning the server to a completed initialize handshake."""
+    latencies = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        async with stdio_client(parameters(name, env)) as (read, write):
+            async with ClientSession(read, write) as session:
+                await session.initialize()
+                latencies.append(time.perf_counter() - start)
+    return summarize(latencies, sum(latencies))
+
+
+async def tool_calls(name: str, env: dict, calls: int, concurrency: list[int]) -> dict:
+    """Tool call latency through one client session."""
+    tool, arguments = CALLS[name]
+    results = {}
+    async with stdio_client(parameters(name, env)) as (read, write):
+        async with ClientSession(read, write) as session:
+            await session.initialize()
+
+            async def call(index: int) -> None:
+                result = await session.call_tool(tool, arguments(index))
+                if result.isError:
+                    raise RuntimeError(result.content[0].text)
+
+            for callers in concurrency:
+                results[f"stdio.{name}.{tool}.c{callers}"] = await measure(
+                    call, calls, callers
+                )
+    return results
+
+
+async def run(calls: int, concurrency: list[int], startup_runs: int) -> dict:
+    """Startup and call benchmarks for both servers."""
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="mcp-stdio-bench-") as tmp:
+        env = {
+            "MCP_NOTIFY_HISTORY": str(Path(tmp) / "history.db"),
+            "MCP_NOTIFY_ASK_RATE": "0",
+        }
+        for name in CALLS:
+            results[f"stdio.{name}.startup"] = await startup(name, env, startup_runs)
+            results.update(await tool_calls(name, env, calls, concurrency))
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--concurrency", default="1,8")
+    parser.add_argument("--startup-runs", type=int, default=5)
+    args = parser.parse_args()
+
+    concurrency = [int(n) for n in args.concurrency.split(",")]
+    results = asyncio.run(run(args.calls, concurrency, args.startup_runs))
+    json.dump(results, sys.stdout)
+
+
+if __name__ == "__main__":
+    main()
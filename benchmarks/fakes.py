@@ -0,0 +1,137 @@
+"""Deterministic stand-ins for notification backends and screen capture.
+
+Both fakes sleep for MCP_BENCH_LATENCY_MS (default 0) per call, so the
+benchmarks measure the servers' own overhead plus a known, configurable
+backend cost. Install them before importing a server module.
+"""
+
+import itertools
+import os
+import struct
+import time
+import zlib
+from functools import cache
+
+
+def latency() -> float:
+    """Simulated backend latency, in seconds."""
+    try:
+        return max(0.0, float(os.environ.get("MCP_BENCH_LATENCY_MS", 0))) / 1000
+    except ValueError:
+        return 0.0
+
+
+def install_notify_fakes() -> None:
+    """Register the "fake" backend and select it (notify server path)."""
+    from notifier import Backend, Capabilities, NotificationConfig, register_backend
+
+    @register_backend
+    class FakeBackend(Backend):
+        """Accepts every notification after the simulated latency."""
+
+        name = "fake"
+        priority = 1000
+        auto = False
+        _ids = itertools.count(1)
+
+        @classmethod
+        def available(cls, capabilities: Capabilities) -> bool:
+            return True
+
+        def send(self, config: NotificationConfig) -> bool:
+            delay = latency()
+            if delay:
+                time.sleep(delay)
+            self.last_notification_id = next(self._ids)
+            return True
+
+    os.environ["MCP_NOTIFY_BACKEND"] = "fake"
+
+
+def image_size() -> tuple[int, int]:
+    """Fake screen size from MCP_BENCH_IMAGE_SIZE (default 1920x1080)."""
+    try:
+        width, height = os.environ.get("MCP_BENCH_IMAGE_SIZE", "1920x1080").split("x")
+        return int(width), int(height)
+    except ValueError:
+        return 1920, 1080
+
+
+@cache
+def fake_png(width: int, height: int) -> bytes:
+    """A deterministic RGB gradient PNG, standing in for a screen capture."""
+    row = bytearray(width * 3)
+    row[0::3] = bytes(x * 255 // max(1, width - 1) for x in range(width))
+    row[2::3] = b"\x80" * width
+    rows = bytearray()
+    for y in range(height):
+        row[1::3] = bytes((y * 255 // max(1, height - 1),)) * width
+        rows += b"\x00" + row  # Filter type: none
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        crc = zlib.crc32(kind + data) & 0xFFFFFFFF
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", crc)
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", header)
+        + chunk(b"IDAT", zlib.compress(bytes(rows), 6))
+        + chunk(b"IEND", b"")
+    )
+
+
+def install_screenshot_fakes() -> None:
+    """Replace macOS capture with writing a generated PNG (screenshot server)."""
+    import screenshotter
+
+    def capture(
+        prefix: str, delay: float, target: tuple, process, region, **extra
+    ) -> dict:
+        pause = latency() + max(0.0, delay)
+        if pause:
+            time.sleep(pause)
+        width, height = image_size()
+        if region is not None:
+            area = region.to_pixels(1.0).clip(width, height)
+            if area is None:
+                return {"error": "Region is outside the screen"}
+            width, height = area.width, area.height
+        filepath = screenshotter.generate_filename(prefix, "png")
+        # Several captures can share a timestamp: keep every file distinct
+        filepath = filepath.with_name(f"{filepath.stem}-{next(counter)}.png")
+        filepath.write_bytes(fake_png(width, height))
+        return screenshotter.finish_capture(
+            target, {"path": str(filepath), "format": "png", **extra}, process
+        )
+
+    counter = itertools.count()
+
+    def capture_screen(
+        screen_index: int = 0,
+        format: str = "png",
+        delay: float = 0,
+        process=None,
+        region=None,
+    ):
+        target = ("screen", screen_index, "png", region)
+        return capture("screen", delay, target, process, region)
+
+    def capture_window(
+        window_title: str,
+        format: str = "png",
+        delay: float = 0,
+        process=None,
+        region=None,
+    ):
+        return capture(
+            "window",
+            delay,
+            ("window", window_title, "png", region),
+            process,
+            region,
+            window_title=f"Fake: {window_title}",
+        )
+
+    screenshotter.capture_screen = capture_screen
+    screenshotter.capture_window = capture_window
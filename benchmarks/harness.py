@@ -0,0 +1,111 @@
+"""Timing helpers shared by the benchmarks."""
+
+import asyncio
+import json
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Awaitable, Callable
+
+ROOT = Path(__file__).resolve().parent.parent
+SERVERS = ROOT / "servers"
+HISTORY_PATH = Path(__file__).resolve().parent / "results" / "history.json"
+
+
+def use_server(name: str) -> Path:
+    """Make a server's flat modules importable, as configure.py does."""
+    path = SERVERS / name
+    sys.path.insert(0, str(path))
+    return path
+
+
+def percentile(ordered: list[float], q: float) -> float:
+    """Nearest-rank percentile (0-100) of sorted, non-empty samples."""
+    index = min(len(ordered) - 1, max(0, round(q / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(latencies: list[float], elapsed: float) -> dict:
+    """Throughput and latency percentiles (milliseconds) of one run."""
+    ordered = sorted(latencies)
+    return {
+        "calls": len(ordered),
+        "seconds": round(elapsed, 4),
+        "throughput": round(len(ordered) / elapsed, 1) if elapsed > 0 else None,
+        "p50_ms": round(percentile(ordered, 50) * 1000, 3),
+        "p95_ms": round(percentile(ordered, 95) * 1000, 3),
+        "p99_ms": round(percentile(ordered, 99) * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
+
+
+async def measure(
+    call: Callable[[int], Awaitable[object]],
+    calls: int,
+    concurrency: int = 1,
+    warmup: int = 5,
+) -> dict:
+    """
+    Run `call(index)` `calls` times from `concurrency` concurrent callers.
+
+    Args:
+        call: Coroutine function under test, given a unique call index
+        calls: Number of measured calls
+        concurrency: Number of callers running at once
+        warmup: Calls made first and left out of the results
+    """
+    for index in range(warmup):
+        await call(-1 - index)
+
+    latencies: list[float] = []
+    next_index = iter(range(calls))
+
+    async def caller() -> None:
+        for index in next_index:
+            start = time.perf_counter()
+            await call(index)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(caller() for _ in range(concurrency)))
+    return summarize(latencies, time.perf_counter() - start)
+
+
+def environment() -> dict:
+    """Commit, interpreter and platform the results were measured on."""
+
+    def git(*args: str) -> str:
+        try:
+            result = subprocess.run(
+                ["git", *args], cwd=ROOT, capture_output=True, text=True, timeout=10
+            )
+            return result.stdout.strip()
+        except (OSError, subprocess.TimeoutExpired):
+            return ""
+
+    return {
+        "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": git("rev-parse", "--short", "HEAD") or None,
+        "dirty": bool(git("status", "--porcelain", "--untracked-files=no")),
+        "python": platform.python_version(),
+        "platform": f"{platform.system()}-{platform.machine()}",
+    }
+
+
+def load_history(path: Path = HISTORY_PATH) -> dict:
+    """Saved results, in the maintenance/metrics history format."""
+    if not path.exists():
+        return {"history": [], "last_updated": None}
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def save_entry(entry: dict, path: Path = HISTORY_PATH) -> None:
+    """Append one run to the history file."""
+    data = load_history(path)
+    data["history"].append(entry)
+    data["last_updated"] = entry["date"]
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(data, indent=2) + "\n", encoding="utf-8")
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""Run the benchmark suite and compare with previous results.
+
+Each suite runs in its own interpreter (both servers have a top-level
+`server` module). Results are printed as a table, compared with the last
+saved run that used the same settings, and optionally appended to
+results/history.json.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from bench_startup import BUDGET_MS
+from harness import HISTORY_PATH, environment, load_history, save_entry
+
+HERE = Path(__file__).resolve().parent
+
+SUITES = {
+    "notify": "bench_notify.py",
+    "screenshot": "bench_screenshot.py",
+    "stdio": "bench_stdio.py",
+    "startup": "bench_startup.py",
+}
+
+
+def run_suite(name: str, args: argparse.Namespace) -> dict:
+    """Run one suite in a subprocess and return its results."""
+    command = [sys.executable, str(HERE / SUITES[name])]
+    if name == "startup":
+        command += ["--runs", str(args.startup_runs)]
+        command += ["--budget-ms", str(args.startup_budget_ms)]
+    else:
+        command += ["--calls", str(args.calls), "--concurrency", args.concurrency]
+    env = {
+        **os.environ,
+        "MCP_BENCH_LATENCY_MS": str(args.latency_ms),
+        "MCP_BENCH_IMAGE_SIZE": args.image_size,
+    }
+    result = subprocess.run(
+        command, cwd=HERE, env=env, capture_output=True, text=True, check=False
+    )
+    if result.returncode != 0:
+        raise SystemExit(f"{name} benchmark failed:\n{result.stderr}")
+    return json.loads(result.stdout)
+
+
+def previous_run(settings: dict) -> dict:
+    """Results of the last saved run with the same settings, if any."""
+    for entry in reversed(load_history()["history"]):
+        if entry.get("settings") == settings:
+            return entry
+    return {}
+
+
+def regressions(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """Benchmarks whose p50 latency grew by more than `threshold` percent."""
+    slower = []
+    for name, stats in results.items():
+        before = baseline.get(name)
+        # Sub-0.1 ms medians are dominated by noise
+        if not before or before["p50_ms"] < 0.1:
+            continue
+        change = (stats["p50_ms"] - before["p50_ms"]) / before["p50_ms"] * 100
+        if change > threshold:
+            slower.append(f"{name}: p50 {before['p50_ms']} -> {stats['p50_ms']} ms")
+    return slower
+
+
+def print_table(results: dict, baseline: dict) -> None:
+    """Results, with the p50 change against the baseline when known."""
+    width = max(len(name) for name in results)
+    print(
+        f"{'benchmark':<{width}} {'calls/s':>10} {'p50 ms':>9} {'p95 ms':>9} "
+        f"{'p99 ms':>9} {'vs last':>8}"
+    )
+    for name, stats in results.items():
+        before = baseline.get(name)
+        delta = ""
+        if before and before["p50_ms"]:
+            delta = f"{(stats['p50_ms'] / before['p50_ms'] - 1) * 100:+.0f}%"
+        print(
+            f"{name:<{width}} {stats['throughput'] or 0:>10.1f} "
+            f"{stats['p50_ms']:>9.3f} {stats['p95_ms']:>9.3f} "
+            f"{stats['p99_ms']:>9.3f} {delta:>8}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "suites", nargs="*", help=f"Suites to run: {', '.join(SUITES)} (default: all)"
+    )
+    parser.add_argument("--calls", type=int, default=300, help="Calls per benchmark")
+    parser.add_argument(
+        "--concurrency", default="1,8", help="Concurrent callers, comma-separated"
+    )
+    parser.add_argument(
+        "--latency-ms", type=float, default=1.0, help="Simulated backend latency"
+    )
+    parser.add_argument(
+        "--image-size", default="1920x1080", help="Fake capture size (WIDTHxHEIGHT)"
+    )
+    parser.add_argument(
+        "--startup-runs", type=int, default=10, help="Cold starts per server"
+    )
+    parser.add_argument(
+        "--startup-budget-ms",
+        type=float,
+        default=BUDGET_MS,
+        help="Fail when a median time to first list_tools exceeds this (0: off)",
+    )
+    parser.add_argument(
+        "--save", action="store_true", help=f"Append results to {HISTORY_PATH.name}"
+    )
+    parser.add_argument(
+        "--max-regression",
+        type=float,
+        help="Exit with status 1 if a p50 grew by more than this percentage",
+    )
+    args = parser.parse_args()
+
+    suites = args.suites or list(SUITES)
+    unknown = [name for name in suites if name not in SUITES]
+    if unknown:
+        parser.error(f"unknown suite: {', '.join(unknown)}")
+    settings = {
+        "suites": suites,
+        "calls": args.calls,
+        "concurrency": args.concurrency,
+        "latency_ms": args.latency_ms,
+        "image_size": args.image_size,
+        "startup_runs": args.startup_runs,
+    }
+
+    results = {}
+    for name in suites:
+        results.update(run_suite(name, args))
+
+    baseline = previous_run(settings).get("results", {})
+    print_table(results, baseline)
+
+    if args.save:
+        save_entry({**environment(), "settings": settings, "results": results})
+        print(f"\nSaved to {HISTORY_PATH}")
+
+    if args.max_regression is not None:
+        slower = regressions(results, baseline, args.max_regression)
+        if slower:
+            print("\nRegressions:\n  " + "\n  ".join(slower))
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,25 @@
+"""Run a server over stdio with the benchmark fakes installed.
+
+Usage: python stdio_server.py notify|screenshot
+"""
+
+import asyncio
+import sys
+
+from fakes import install_notify_fakes, install_screenshot_fakes
+from harness import use_server
+
+FAKES = {"notify": install_notify_fakes, "screenshot": install_screenshot_fakes}
+
+
+def main() -> None:
+    name = sys.argv[1]
+    use_server(name)
+    FAKES[name]()
+    import server
+
+    asyncio.run(server.main())
+
+
+if __name__ == "__main__":
+    main()
@@ -291,18 +291,25 @@ install_mcp() {
             log_success "Virtual environment created"
         fi
         
+        # Native notifications: PyObjC on macOS, jeepney (D-Bus) on Linux
+        local packages="mcp jeepney"
+        local modules="mcp jeepney"
+        if [ "$(uname)" = "Darwin" ]; then
+            packages="mcp pyobjc"
+            modules="mcp objc"
+        fi
+        
         # Install dependencies if not already installed
         local needs_install=false
-        if ! "$venv_dir/bin/python" -c "import mcp" 2>/dev/null; then
-            needs_install=true
-        fi
-        if ! "$venv_dir/bin/python" -c "import objc" 2>/dev/null; then
-            needs_install=true
-        fi
+        for module in $modules; do
+            if ! "$venv_dir/bin/python" -c "import $module" 2>/dev/null; then
+                needs_install=true
+            fi
+        done
         
         if [ "$needs_install" = true ]; then
-            log_info "Installing MCP dependencies (mcp, pyobjc)..."
-            "$venv_dir/bin/pip" install --quiet mcp pyobjc
+            log_info "Installing MCP dependencies (${packages// /, })..."
+            "$venv_dir/bin/pip" install --quiet $packages
             log_success "Dependencies installed"
         else
             log_info "Dependencies already installed"
@@ -330,18 +337,25 @@ install_mcp() {
             log_success "Virtual environment created"
         fi
         
+        # Pillow for processed copies, JPEG and unchanged detection; Quartz on macOS
+        local packages="mcp Pillow"
+        local modules="mcp PIL"
+        if [ "$(uname)" = "Darwin" ]; then
+            packages="mcp pyobjc-framework-Quartz Pillow"
+            modules="mcp Quartz PIL"
+        fi
+        
         # Install dependencies if not already installed
         local needs_install=false
-        if ! "$venv_dir/bin/python" -c "import mcp" 2>/dev/null; then
-            needs_install=true
-        fi
-        if ! "$venv_dir/bin/python" -c "import Quartz" 2>/dev/null; then
-            needs_install=true
-        fi
+        for module in $modules; do
+            if ! "$venv_dir/bin/python" -c "import $module" 2>/dev/null; then
+                needs_install=true
+            fi
+        done
         
         if [ "$needs_install" = true ]; then
-            log_info "Installing MCP dependencies (mcp, pyobjc-framework-Quartz)..."
-            "$venv_dir/bin/pip" install --quiet mcp pyobjc-framework-Quartz
+            log_info "Installing MCP dependencies (${packages// /, })..."
+            "$venv_dir/bin/pip" install --quiet $packages
             log_success "Dependencies installed"
         else
             log_info "Dependencies already installed"
@@ -0,0 +1 @@
+"""Shared helpers for the OpenFlow MCP servers."""
@@ -0,0 +1,270 @@
+"""Lightweight in-process metrics for the MCP servers.
+
+Counters and latency histograms keyed by name and labels, plus gauges
+sampled when read. Recording is a dict lookup, a bisect and an append under
+a lock, cheap enough for every tool call. Percentiles come from a bounded
+window of recent samples; cumulative buckets are kept for Prometheus.
+"""
+
+import bisect
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Iterator, Optional
+
+
+# Histogram bucket upper bounds, in seconds
+BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+)
+
+# Labels are stored as a sorted tuple of (name, value) pairs
+Labels = tuple[tuple[str, str], ...]
+
+
+def _labels(labels: dict[str, object]) -> Labels:
+    """Normalize label keyword arguments."""
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+class Histogram:
+    """Latency distribution: cumulative buckets plus a window of recent samples."""
+
+    def __init__(self, window: int = 2048):
+        self.bucket_counts = [0] * (len(BUCKETS) + 1)  # Last one is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.recent: deque[float] = deque(maxlen=window)
+
+    def observe(self, seconds: float) -> None:
+        """Record one sample."""
+        self.bucket_counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        self.recent.append(seconds)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Percentile (0-100) over the recent window, None without samples."""
+        if not self.recent:
+            return None
+        return _percentile(sorted(self.recent), q)
+
+
+class Metrics:
+    """Registry of counters, histograms and gauges for one server."""
+
+    def __init__(self, namespace: str):
+        """
+        Args:
+            namespace: Prefix for exported metric names (e.g. "mcp_notify")
+        """
+        self.namespace = namespace
+        self.started = time.time()
+        self._counters: dict[tuple[str, Labels], float] = {}
+        self._histograms: dict[tuple[str, Labels], Histogram] = {}
+        self._gauges: dict[str, Callable[[], float]] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, value: float = 1, **labels: object) -> None:
+        """Increment a counter."""
+        key = (name, _labels(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, seconds: float, **labels: object) -> None:
+        """Record a latency sample."""
+        key = (name, _labels(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(seconds)
+
+    def gauge(self, name: str, read: Callable[[], float]) -> None:
+        """Register a gauge, sampled each time metrics are read."""
+        self._gauges[name] = read
+
+    @contextmanager
+    def timer(self, name: str, **labels: object) -> Iterator[None]:
+        """
+        Time a block into histogram `name`.
+
+        Also counts `<name>_total` and, when the block raises,
+        `<name>_errors_total`.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            self.inc(f"{name}_errors_total", **labels)
+            raise
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+            self.inc(f"{name}_total", **labels)
+
+    def render_text(self) -> str:
+        """Human-readable summary for a stats tool."""
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(self._histograms.items())
+            # Copy what percentile() reads so sorting happens outside the lock
+            windows = [(key, list(h.recent), h.count) for key, h in histograms]
+
+        uptime = time.time() - self.started
+        lines = [f"Uptime: {uptime:.0f}s"]
+
+        if windows:
+            names = [_display(name, labels) for (name, labels), _, _ in windows]
+            width = max(len(name) for name in names)
+            lines.append(
+                f"\n{'Latency (ms)':<{width + 2}} {'count':>7} {'p50':>8} "
+                f"{'p95':>8} {'p99':>8} {'max':>8}"
+            )
+            for name, (_, recent, count) in zip(names, windows):
+                ordered = sorted(recent)
+                p50, p95, p99 = (_percentile(ordered, q) * 1000 for q in (50, 95, 99))
+                lines.append(
+                    f"  {name:<{width}} {count:>7} {p50:>8.1f} {p95:>8.1f} "
+                    f"{p99:>8.1f} {ordered[-1] * 1000:>8.1f}"
+                )
+
+        if counters:
+            lines.append("\nCounters")
+            for (name, labels), value in counters:
+                lines.append(f"  {_display(name, labels)}: {value:g}")
+
+        if self._gauges:
+            lines.append("\nGauges")
+            for name, read in sorted(self._gauges.items()):
+                lines.append(f"  {name}: {_read_gauge(read):g}")
+
+        return "\n".join(lines)
+
+    def render_prometheus(self) -> str:
+        """Prometheus text exposition format."""
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = [
+                (key, list(h.bucket_counts), h.count, h.sum)
+                for key, h in sorted(self._histograms.items())
+            ]
+
+        ns = self.namespace
+        lines = []
+        typed: set[str] = set()
+
+        for (name, labels), value in counters:
+            metric = f"{ns}_{name}"
+            if metric not in typed:
+                lines.append(f"# TYPE {metric} counter")
+                typed.add(metric)
+            lines.append(f"{metric}{_prom_labels(labels)} {value:g}")
+
+        for (name, labels), bucket_counts, count, total in histograms:
+            metric = f"{ns}_{name}_seconds"
+            if metric not in typed:
+                lines.append(f"# TYPE {metric} histogram")
+                typed.add(metric)
+            cumulative = 0
+            for bound, bucket_count in zip((*BUCKETS, "+Inf"), bucket_counts):
+                cumulative += bucket_count
+                le = bound if isinstance(bound, str) else f"{bound:g}"
+                lines.append(
+                    f"{metric}_bucket{_prom_labels(labels + (('le', le),))} {cumulative}"
+                )
+            lines.append(f"{metric}_sum{_prom_labels(labels)} {total:g}")
+            lines.append(f"{metric}_count{_prom_labels(labels)} {count}")
+
+        for name, read in sorted(self._gauges.items()):
+            metric = f"{ns}_{name}"
+            lines.append(f"# TYPE {metric} gauge")
+            lines.append(f"{metric} {_read_gauge(read):g}")
+
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: Path) -> None:
+        """Atomically write the Prometheus text file (node_exporter textfile)."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        tmp.write_text(self.render_prometheus(), encoding="utf-8")
+        os.replace(tmp, path)
+
+    def start_exporter(self, path: Path, interval: float) -> threading.Thread:
+        """Write the Prometheus file every `interval` seconds from a daemon thread."""
+
+        def run() -> None:
+            while True:
+                try:
+                    self.write_prometheus(path)
+                except OSError:
+                    pass
+                time.sleep(interval)
+
+        thread = threading.Thread(target=run, name="metrics-exporter", daemon=True)
+        thread.start()
+        return thread
+
+    def start_exporter_from_env(self) -> Optional[threading.Thread]:
+        """
+        Start the Prometheus exporter if MCP_METRICS_PROM_FILE is set.
+
+        The file name may contain {namespace} and {pid}; the interval comes
+        from MCP_METRICS_PROM_INTERVAL (seconds, default 15).
+        """
+        template = os.environ.get("MCP_METRICS_PROM_FILE")
+        if not template:
+            return None
+        try:
+            interval = max(1.0, float(os.environ.get("MCP_METRICS_PROM_INTERVAL", 15)))
+        except ValueError:
+            interval = 15.0
+        path = Path(template.format(namespace=self.namespace, pid=os.getpid()))
+        return self.start_exporter(path.expanduser(), interval)
+
+
+def _percentile(ordered: list[float], q: float) -> float:
+    """Nearest-rank percentile (0-100) of sorted, non-empty samples."""
+    index = min(len(ordered) - 1, max(0, round(q / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def _display(name: str, labels: Labels) -> str:
+    """name{key=value,...} for the text summary."""
+    if not labels:
+        return name
+    return f"{name}{{{','.join(f'{k}={v}' for k, v in labels)}}}"
+
+
+def _prom_labels(labels: Labels) -> str:
+    """Prometheus label set, with values escaped."""
+    if not labels:
+        return ""
+    escaped = (
+        (k, v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for k, v in labels
+    )
+    return "{" + ",".join(f'{k}="{v}"' for k, v in escaped) + "}"
+
+
+def _read_gauge(read: Callable[[], float]) -> float:
+    """Sample a gauge, NaN if it fails."""
+    try:
+        return float(read())
+    except Exception:
+        return float("nan")
@@ -0,0 +1,97 @@
+"""Startup profiling for the MCP servers (`server.py --profile-startup`).
+
+Imports the server in a fresh interpreter with `-X importtime`, calls its
+list_tools handler once, and reports where the time went: interpreter
+start, imports grouped by top-level package, and the slowest modules.
+"""
+
+import json
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+# Runs in the child interpreter, from the server directory
+PROBE = """
+import asyncio, json, time
+start = time.perf_counter()
+import server
+imported = time.perf_counter()
+tools = asyncio.run(server.list_tools())
+listed = time.perf_counter()
+print(json.dumps({
+    "imports": imported - start,
+    "list_tools": listed - imported,
+    "tools": len(tools),
+}))
+"""
+
+
+def parse_importtime(stderr: str) -> list[tuple[str, int, float, float]]:
+    """(module, depth, self seconds, cumulative seconds) from -X importtime."""
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        try:
+            head, cumulative_us, name = line.split("|")
+            self_time = int(head.split(":")[-1]) / 1e6
+            cumulative = int(cumulative_us) / 1e6
+        except ValueError:
+            continue  # Header line
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        modules.append((name.strip(), depth, self_time, cumulative))
+    return modules
+
+
+def profile_startup(server_dir: Path, top: int = 12) -> str:
+    """Profile a server's cold start and format the report."""
+    env = {**os.environ, "PYTHONPATH": str(server_dir)}
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE],
+        cwd=server_dir,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    wall = time.perf_counter() - start
+    if result.returncode != 0:
+        return f"Startup profile failed:\n{result.stderr[-2000:]}"
+
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    modules = parse_importtime(result.stderr)
+    local = {path.stem for path in server_dir.glob("*.py")}
+
+    by_package: dict[str, float] = defaultdict(float)
+    for name, _, self_time, _ in modules:
+        package = name.split(".")[0]
+        by_package[f"{package} (local)" if package in local else package] += self_time
+
+    def ms(seconds: float) -> str:
+        return f"{seconds * 1000:9.1f} ms"
+
+    other = wall - timings["imports"] - timings["list_tools"]
+    lines = [
+        f"Startup profile: {server_dir.name}",
+        f"  Interpreter and exit  {ms(other)}",
+        f"  Imports               {ms(timings['imports'])}",
+        f"  First list_tools      {ms(timings['list_tools'])} ({timings['tools']} tools)",
+        f"  Total                 {ms(wall)}",
+        "",
+        "Import time by top-level package (self time)",
+    ]
+    packages = sorted(by_package.items(), key=lambda item: -item[1])
+    for package, seconds in packages[:top]:
+        lines.append(f"  {package:<30}{ms(seconds)}")
+    own = sum(seconds for package, seconds in packages if package.endswith("(local)"))
+    lines.append(f"  {'all local modules':<30}{ms(own)}")
+
+    lines += ["", "Slowest imports (cumulative, including dependencies)"]
+    slowest = sorted(modules, key=lambda module: -module[3])[:top]
+    for name, _, _, cumulative in slowest:
+        lines.append(f"  {name:<50}{ms(cumulative)}")
+
+    return "\n".join(lines)
@@ -0,0 +1,695 @@
+"""Built-in notification backends.
+
+Each backend registers itself with the notifier registry. Platform
+capabilities (native frameworks, D-Bus service, helper binaries) are probed
+once by detect_capabilities() so the hot path never touches PATH or the bus
+just to pick a backend.
+"""
+
+import functools
+import importlib.util
+import json
+import os
+import platform
+import shutil
+import subprocess
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Iterator, Optional
+
+from notifier import (
+    EMOJIS,
+    MACOS_SOUNDS,
+    Backend,
+    Capabilities,
+    NotificationConfig,
+    NotificationType,
+    get_icon_path,
+    register_backend,
+)
+from sound import LINUX_SOUND_FILES, detect_sound_player, get_sound_player
+from webhook import get_sink, webhook_mode
+
+# Optional frameworks are imported on first use, not at server start: the
+# probe only checks that they are installed.
+
+
+def _installed(module: str) -> bool:
+    """Whether a module can be imported, without importing it."""
+    try:
+        return importlib.util.find_spec(module) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+@functools.cache
+def _pyobjc() -> Any:
+    """PyObjC notification classes (macOS), None if unavailable."""
+    try:
+        from Foundation import (  # type: ignore[import-not-found]
+            NSUserNotification,
+            NSUserNotificationCenter,
+        )
+    except ImportError:
+        return None
+    return SimpleNamespace(
+        NSUserNotification=NSUserNotification,
+        NSUserNotificationCenter=NSUserNotificationCenter,
+    )
+
+
+@functools.cache
+def _jeepney() -> Any:
+    """jeepney D-Bus API (pure-Python client, Linux), None if unavailable."""
+    try:
+        from jeepney import (  # type: ignore[import-not-found]
+            DBusAddress,
+            DBusErrorResponse,
+            new_method_call,
+        )
+        from jeepney.wrappers import unwrap_msg  # type: ignore[import-not-found]
+        from jeepney.io.blocking import (  # type: ignore[import-not-found]
+            open_dbus_connection,
+        )
+    except ImportError:
+        return None
+    return SimpleNamespace(
+        DBusAddress=DBusAddress,
+        DBusErrorResponse=DBusErrorResponse,
+        new_method_call=new_method_call,
+        unwrap_msg=unwrap_msg,
+        open_dbus_connection=open_dbus_connection,
+    )
+
+
+class DBusError(Exception):
+    """The notification server rejected a D-Bus call."""
+
+
+# Freedesktop urgency levels (0 = low, 1 = normal, 2 = critical)
+LINUX_URGENCIES = {
+    NotificationType.INFO: "normal",
+    NotificationType.SUCCESS: "normal",
+    NotificationType.WARNING: "normal",
+    NotificationType.ERROR: "critical",
+}
+
+
+def detect_capabilities() -> Capabilities:
+    """Probe the platform for notification and sound support (slow, run once)."""
+    system = platform.system()
+    return Capabilities(
+        system=system,
+        pyobjc=system == "Darwin" and _installed("Foundation"),
+        osascript=system == "Darwin" and shutil.which("osascript") is not None,
+        dbus=system == "Linux" and _dbus_service_reachable(),
+        notify_send=system == "Linux" and shutil.which("notify-send") is not None,
+        powershell=system == "Windows" and shutil.which("powershell") is not None,
+        sound_player=detect_sound_player() if system == "Linux" else None,
+    )
+
+
+def _context_message(config: NotificationConfig, with_repo: bool = True) -> str:
+    """Build the notification body prefixed with repo, agent and task."""
+    message_parts = []
+    if with_repo and config.display_repo:
+        message_parts.append(f"[{config.display_repo}]")
+    if config.agent:
+        message_parts.append(config.agent.capitalize())
+    if config.task:
+        message_parts.append(config.task)
+
+    if message_parts:
+        prefix = " | ".join(message_parts)
+        return f"{prefix} - {config.message}"
+    return config.message
+
+
+def _play_linux_sound(ntype: NotificationType, capabilities: Capabilities) -> None:
+    """Play a sound on Linux in the background (never blocks delivery)."""
+    player = get_sound_player(capabilities)
+    if player is not None:
+        player.play(ntype)
+
+
+# ---------------------------------------------------------------------------
+# macOS
+# ---------------------------------------------------------------------------
+
+
+@register_backend
+class MacOSPyObjCBackend(Backend):
+    """macOS notifications through NSUserNotificationCenter (native API)."""
+
+    name = "pyobjc"
+    priority = 10
+    updates_in_place = True
+
+    @classmethod
+    def available(cls, capabilities: Capabilities) -> bool:
+        return capabilities.system == "Darwin" and capabilities.pyobjc
+
+    def send(self, config: NotificationConfig) -> bool:
+        appkit = _pyobjc()
+        if appkit is None:
+            return False
+        try:
+            # Create notification
+            notification = appkit.NSUserNotification.alloc().init()
+
+            # Build title with emoji
+            emoji = EMOJIS.get(config.type, "")
+            title = f"{emoji} {config.title}"
+            notification.setTitle_(title)
+
+            # Set subtitle: repo name if provided
+            if config.display_repo:
+                notification.setSubtitle_(config.display_repo)
+
+            # Message with agent and task context (repo is the subtitle)
+            notification.setInformativeText_(_context_message(config, with_repo=False))
+
+            # Note: setContentImage_ displays a large image (not suitable)
+            # The app icon (Python) is shown automatically
+
+            # Play sound if requested
+            if config.sound:
+                sound_name = MACOS_SOUNDS.get(config.type, "default")
+                notification.setSoundName_(sound_name)
+
+            # Disable actions - notification does nothing when clicked
+            # By not setting any action buttons, the notification just dismisses on click
+            notification.setHasActionButton_(False)
+
+            # Delivering the same identifier again replaces the notification
+            if config.tag:
+                notification.setIdentifier_(config.tag)
+
+            # Deliver notification
+            center = appkit.NSUserNotificationCenter.defaultUserNotificationCenter()
+            center.deliverNotification_(notification)
+
+            return True
+        except Exception:
+            # The registry falls back to osascript
+            return False
+
+
+@register_backend
+class MacOSOsascriptBackend(Backend):
+    """macOS notifications through osascript (fallback)."""
+
+    name = "osascript"
+    priority = 20
+
+    @classmethod
+    def available(cls, capabilities: Capabilities) -> bool:
+        return capabilities.osascript
+
+    def send(self, config: NotificationConfig) -> bool:
+        emoji = EMOJIS.get(config.type, "")
+        title = f"{emoji} {config.title}"
+        sound_name = MACOS_SOUNDS.get(config.type, "default") if config.sound else ""
+        message = _context_message(config)
+
+        # Escape quotes for AppleScript
+        title_escaped = title.replace('"', '\\"')
+        message_escaped = message.replace('"', '\\"')
+
+        script = (
+            f'display notification "{message_escaped}" with title "{title_escaped}"'
+        )
+        if config.sound:
+            script += f' sound name "{sound_name}"'
+
+        try:
+            subprocess.run(
+                ["osascript", "-e", script],
+                check=True,
+                capture_output=True,
+                timeout=self.timeout,
+            )
+            return True
+        except (subprocess.SubprocessError, OSError):
+            return False
+
+
+# ---------------------------------------------------------------------------
+# Linux
+# ---------------------------------------------------------------------------
+
+
+class BusUnavailableError(Exception):
+    """Raised when the D-Bus session bus cannot be reached."""
+
+
+class DBusNotifications:
+    """
+    Client for org.freedesktop.Notifications over a persistent session bus.
+
+    The connection is opened on first use and reused for every notification,
+    so no process is spawned per event. Calls are serialized with a lock
+    because the dispatcher delivers from several threads. Each public method
+    finishes within its timeout (default reply_timeout), including the wait
+    for the lock and a reconnect after a dropped connection.
+    """
+
+    BUS_NAME = "org.freedesktop.Notifications"
+    OBJECT_PATH = "/org/freedesktop/Notifications"
+    APP_NAME = "OpenFlow"
+    URGENCY_LEVELS = {"low": 0, "normal": 1, "critical": 2}
+
+    def __init__(self, reply_timeout: float = 5.0):
+        self.reply_timeout = reply_timeout
+        self._conn: Any = None
+        self._capabilities: Optional[set[str]] = None
+        self._lock = threading.Lock()
+
+    def notify(
+        self,
+        title: str,
+        body: str,
+        urgency: str = "normal",
+        expire_ms: int = -1,
+        replaces_id: int = 0,
+        icon: str = "",
+        sound_file: Optional[str] = None,
+        timeout: Optional[float] = None,
+    ) -> int:
+        """
+        Show a notification.
+
+        Returns:
+            The server-assigned notification ID.
+
+        Raises:
+            BusUnavailableError: If the session bus cannot be reached.
+            DBusError: If the notification server rejects the call.
+        """
+        hints: dict[str, tuple[str, Any]] = {
+            "urgency": ("y", self.URGENCY_LEVELS.get(urgency, 1)),
+        }
+        deadline = self._deadline(timeout)
+        with self._locked(deadline):
+            if sound_file and "sound" in self._get_capabilities(deadline):
+                hints["sound-file"] = ("s", sound_file)
+            reply = self._call(
+                "Notify",
+                "susssasa{sv}i",
+                (self.APP_NAME, replaces_id, icon, title, body, [], hints, expire_ms),
+                deadline,
+            )
+        return int(reply[0])
+
+    def plays_sounds(self, timeout: Optional[float] = None) -> bool:
+        """Whether the notification server plays sound-file hints itself."""
+        deadline = self._deadline(timeout)
+        with self._locked(deadline):
+            return "sound" in self._get_capabilities(deadline)
+
+    def service_reachable(self, timeout: Optional[float] = None) -> bool:
+        """Whether the bus is up and a notification server owns the name."""
+        deadline = self._deadline(timeout)
+        try:
+            with self._locked(deadline):
+                reply = self._call(
+                    "NameHasOwner",
+                    "s",
+                    (self.BUS_NAME,),
+                    deadline,
+                    destination=(
+                        "/org/freedesktop/DBus",
+                        "org.freedesktop.DBus",
+                        "org.freedesktop.DBus",
+                    ),
+                )
+        except (BusUnavailableError, DBusError):
+            return False
+        return bool(reply[0])
+
+    def close(self) -> None:
+        """Close the bus connection."""
+        with self._lock:
+            self._reset()
+
+    def _deadline(self, timeout: Optional[float]) -> float:
+        """Monotonic time by which a call must finish."""
+        if timeout is None:
+            timeout = self.reply_timeout
+        return time.monotonic() + timeout
+
+    @staticmethod
+    def _remaining(deadline: float) -> float:
+        """Seconds left before `deadline`, raising once it has passed."""
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise BusUnavailableError("timed out")
+        return remaining
+
+    @contextmanager
+    def _locked(self, deadline: float) -> Iterator[None]:
+        """Hold the lock, waiting for it no later than `deadline`."""
+        if not self._lock.acquire(timeout=self._remaining(deadline)):
+            raise BusUnavailableError("timed out waiting for another call")
+        try:
+            yield
+        finally:
+            self._lock.release()
+
+    def _get_capabilities(self, deadline: float) -> set[str]:
+        """Query server capabilities once per connection (lock held)."""
+        if self._capabilities is None:
+            reply = self._call("GetCapabilities", "", (), deadline)
+            self._capabilities = set(reply[0])
+        return self._capabilities
+
+    def _call(
+        self,
+        method: str,
+        signature: str,
+        body: tuple,
+        deadline: float,
+        destination: Optional[tuple[str, str, str]] = None,
+    ) -> tuple:
+        """
+        Call a method, reconnecting once if the connection dropped (lock held).
+
+        The reconnect and retry only get the time left before `deadline`.
+        """
+        jeepney = _jeepney()
+        if jeepney is None:
+            raise BusUnavailableError("jeepney is not installed")
+        path, bus_name, interface = destination or (
+            self.OBJECT_PATH,
+            self.BUS_NAME,
+            self.BUS_NAME,
+        )
+        address = jeepney.DBusAddress(path, bus_name=bus_name, interface=interface)
+        message = jeepney.new_method_call(address, method, signature, body)
+        for attempt in range(2):
+            conn = self._connect()
+            try:
+                reply = conn.send_and_get_reply(
+                    message, timeout=self._remaining(deadline)
+                )
+                return jeepney.unwrap_msg(reply)
+            except jeepney.DBusErrorResponse as e:
+                raise DBusError(str(e)) from e
+            except (OSError, ConnectionError) as e:
+                # Stale connection (bus restarted): reconnect once
+                self._reset()
+                if attempt:
+                    raise BusUnavailableError(str(e)) from e
+        raise BusUnavailableError("unreachable")
+
+    def _connect(self) -> Any:
+        """Open the session bus connection if needed (lock held)."""
+        if self._conn is None:
+            try:
+                self._conn = _jeepney().open_dbus_connection(bus="SESSION")
+            except (OSError, KeyError, ValueError) as e:
+                # KeyError: DBUS_SESSION_BUS_ADDRESS not set
+                raise BusUnavailableError(str(e)) from e
+        return self._conn
+
+    def _reset(self) -> None:
+        """Drop the current connection (lock held)."""
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+        self._conn = None
+        self._capabilities = None
+
+
+# Shared by every backend instance so the bus connection persists
+_dbus_notifications = DBusNotifications()
+
+
+def _dbus_service_reachable() -> bool:
+    """Whether notifications can be sent over the session bus."""
+    return _installed("jeepney") and _dbus_notifications.service_reachable()
+
+
+@register_backend
+class DBusBackend(Backend):
+    """Linux notifications over the D-Bus session bus (native API)."""
+
+    name = "dbus"
+    priority = 10
+    updates_in_place = True
+
+    # Tags remembered for in-place updates (oldest forgotten first)
+    MAX_TAGS = 256
+
+    def __init__(self, capabilities: Capabilities):
+        super().__init__(capabilities)
+        # Tag -> ID of the last notification shown with it (replaces_id)
+        self._tag_ids: dict[str, int] = {}
+        self._tags_lock = threading.Lock()
+
+    @classmethod
+    def available(cls, capabilities: Capabilities) -> bool:
+        return capabilities.dbus
+
+    def send(self, config: NotificationConfig) -> bool:
+        emoji = EMOJIS.get(config.type, "")
+        title = f"{emoji} {config.title}"
+        sound_file = LINUX_SOUND_FILES.get(config.type) if config.sound else None
+        with self._tags_lock:
+            replaces_id = self._tag_ids.get(config.tag, 0) if config.tag else 0
+
+        deadline = time.monotonic() + self.timeout
+        try:
+            self.last_notification_id = _dbus_notifications.notify(
+                title,
+                _context_message(config),
+                urgency=LINUX_URGENCIES.get(config.type, "normal"),
+                expire_ms=config.timeout * 1000,
+                replaces_id=replaces_id,
+                icon=get_icon_path() or "",
+                sound_file=sound_file,
+                timeout=self.timeout,
+            )
+        except (BusUnavailableError, DBusError):
+            # The registry falls back to notify-send
+            return False
+        try:
+            # Cached by notify unless the connection dropped since
+            plays_sounds = _dbus_notifications.plays_sounds(
+                timeout=deadline - time.monotonic()
+            )
+        except (BusUnavailableError, DBusError):
+            # Shown already: play the sound here rather than not at all
+            plays_sounds = False
+
+        if config.tag:
+            with self._tags_lock:
+                self._tag_ids.pop(config.tag, None)
+                self._tag_ids[config.tag] = self.last_notification_id
+                if len(self._tag_ids) > self.MAX_TAGS:
+                    del self._tag_ids[next(iter(self._tag_ids))]
+
+        # Servers without the "sound" capability ignore the sound-file hint
+        if config.sound and not plays_sounds:
+            _play_linux_sound(config.type, self.capabilities)
+
+        return True
+
+
+@register_backend
+class NotifySendBackend(Backend):
+    """Linux notifications through notify-send (fallback)."""
+
+    name = "notify-send"
+    priority = 20
+
+    @classmethod
+    def available(cls, capabilities: Capabilities) -> bool:
+        return capabilities.notify_send
+
+    def send(self, config: NotificationConfig) -> bool:
+        emoji = EMOJIS.get(config.type, "")
+        title = f"{emoji} {config.title}"
+        urgency = LINUX_URGENCIES.get(config.type, "normal")
+
+        try:
+            cmd = [
+                "notify-send",
+                "--urgency",
+                urgency,
+                "--expire-time",
+                str(config.timeout * 1000),
+                title,
+                _context_message(config),
+            ]
+            subprocess.run(cmd, check=True, capture_output=True, timeout=self.timeout)
+
+            # Play sound if requested
+            if config.sound:
+                _play_linux_sound(config.type, self.capabilities)
+
+            return True
+        except (subprocess.SubprocessError, OSError):
+            return False
+
+
+# ---------------------------------------------------------------------------
+# Windows
+# ---------------------------------------------------------------------------
+
+
+@register_backend
+class PowerShellBackend(Backend):
+    """Windows toast notifications through PowerShell."""
+
+    name = "powershell"
+    priority = 10
+    # PowerShell itself takes seconds to start
+    timeout = 15.0
+
+    @classmethod
+    def available(cls, capabilities: Capabilities) -> bool:
+        return capabilities.powershell
+
+    def send(self, config: NotificationConfig) -> bool:
+        emoji = EMOJIS.get(config.type, "")
+        title = f"{emoji} {config.title}"
+        message = _context_message(config)
+
+        # PowerShell script for toast notification
+        ps_script = f'''
+        [Windows.UI.Notifications.ToastNotificationManager, Windows.UI.Notifications, ContentType = WindowsRuntime] | Out-Null
+        [Windows.Data.Xml.Dom.XmlDocument, Windows.Data.Xml.Dom.XmlDocument, ContentType = WindowsRuntime] | Out-Null
+
+        $template = @"
+        <toast duration="short">
+            <visual>
+                <binding template="ToastText02">
+                    <text id="1">{title}</text>
+                    <text id="2">{message}</text>
+                </binding>
+            </visual>
+            <audio silent="{str(not config.sound).lower()}"/>
+        </toast>
+"@
+
+        $xml = New-Object Windows.Data.Xml.Dom.XmlDocument
+        $xml.LoadXml($template)
+        $toast = [Windows.UI.Notifications.ToastNotification]::new($xml)
+        [Windows.UI.Notifications.ToastNotificationManager]::CreateToastNotifier("OpenFlow").Show($toast)
+        '''
+
+        try:
+            subprocess.run(
+                ["powershell", "-Command", ps_script],
+                check=True,
+                capture_output=True,
+                timeout=self.timeout,
+            )
+            return True
+        except (subprocess.SubprocessError, OSError):
+            return False
+
+
+# ---------------------------------------------------------------------------
+# Headless (after the desktop backends, when webhooks are configured)
+# ---------------------------------------------------------------------------
+
+
+@register_backend
+class WebhookBackend(Backend):
+    """Posts to the configured webhooks (see webhook.py).
+
+    Used after the desktop backends, so headless machines still notify
+    someone. In "always" mode the server copies every notification to the
+    webhooks instead, and this backend stays out of the chain.
+    """
+
+    name = "webhook"
+    priority = 90
+    # False only means no webhook matched: not an outage
+    breaker = False
+
+    @classmethod
+    def available(cls, capabilities: Capabilities) -> bool:
+        return get_sink() is not None and webhook_mode() == "fallback"
+
+    def send(self, config: NotificationConfig) -> bool:
+        # Only queues: the sink thread posts, retries and spools
+        sink = get_sink()
+        return sink is not None and sink.submit(config) > 0
+
+
+# ---------------------------------------------------------------------------
+# Test backends (only used when selected explicitly)
+# ---------------------------------------------------------------------------
+
+
+@register_backend
+class NullBackend(Backend):
+    """Accepts every notification and discards it."""
+
+    name = "null"
+    priority = 1000
+    auto = False
+
+    def __init__(self, capabilities: Capabilities):
+        super().__init__(capabilities)
+        self.sent = 0
+
+    @classmethod
+    def available(cls, capabilities: Capabilities) -> bool:
+        return True
+
+    def send(self, config: NotificationConfig) -> bool:
+        self.sent += 1
+        return True
+
+
+@register_backend
+class FileBackend(Backend):
+    """Appends every notification as a JSON line to a file.
+
+    The path comes from MCP_NOTIFY_FILE (default:
+    /tmp/mcp-notify/notifications.jsonl).
+    """
+
+    name = "file"
+    priority = 1000
+    auto = False
+
+    def __init__(self, capabilities: Capabilities):
+        super().__init__(capabilities)
+        self.path = Path(
+            os.environ.get("MCP_NOTIFY_FILE", "/tmp/mcp-notify/notifications.jsonl")
+        )
+        self._lock = threading.Lock()
+
+    @classmethod
+    def available(cls, capabilities: Capabilities) -> bool:
+        return True
+
+    def send(self, config: NotificationConfig) -> bool:
+        record = {
+            "time": time.time(),
+            "type": config.type.value,
+            "title": config.title,
+            "message": config.message,
+            "sound": config.sound,
+            "agent": config.agent,
+            "task": config.task,
+            "repo": config.repo,
+        }
+        try:
+            with self._lock:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            return True
+        except OSError:
+            return False
@@ -0,0 +1,128 @@
+"""Coalescing of notification bursts.
+
+Agents can commit or sync many times in a few seconds. Instead of raising
+one popup (and one sound) per event, events sharing a key (e.g. repo and
+branch) are held for a short window and delivered as a single summary
+notification. A lone event is delivered unchanged once its window closes.
+"""
+
+import asyncio
+import os
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Hashable, Optional
+
+from notifier import NotificationConfig
+
+
+# Builds the summary notification from the details of each coalesced event
+Summarizer = Callable[[list[dict[str, Any]]], NotificationConfig]
+# Delivers a notification, optionally waiting for the backend result
+Submitter = Callable[..., Awaitable[Optional[bool | str]]]
+
+
+def window_from_env(tool: str, default: float) -> float:
+    """Coalescing window for a tool from MCP_NOTIFY_COALESCE_<TOOL> (seconds)."""
+    name = f"MCP_NOTIFY_COALESCE_{tool.upper()}"
+    try:
+        return max(0.0, float(os.environ.get(name, default)))
+    except ValueError:
+        return default
+
+
+@dataclass
+class _Group:
+    """Events waiting for their coalescing window to close."""
+
+    future: asyncio.Future
+    configs: list[NotificationConfig] = field(default_factory=list)
+    details: list[dict[str, Any]] = field(default_factory=list)
+    handle: Optional[asyncio.TimerHandle] = None
+
+
+class Coalescer:
+    """Merges events sharing a key within a time window into one notification."""
+
+    def __init__(self, window: float, summarize: Summarizer, submit: Submitter):
+        """
+        Args:
+            window: Seconds to hold the first event of a burst (0 disables)
+            summarize: Builds the summary for two or more events
+            submit: Delivers a notification (e.g. Dispatcher.submit)
+        """
+        self.window = window
+        self._summarize = summarize
+        self._submit = submit
+        self._groups: dict[Hashable, _Group] = {}
+        self._tasks: set[asyncio.Task] = set()
+
+    @property
+    def pending(self) -> int:
+        """Number of events held in open windows."""
+        return sum(len(group.configs) for group in self._groups.values())
+
+    async def add(
+        self,
+        key: Hashable,
+        config: NotificationConfig,
+        details: dict[str, Any],
+        wait: bool = False,
+    ) -> Optional[bool | str]:
+        """
+        Add an event to the burst for `key`.
+
+        Args:
+            key: Events with equal keys are merged
+            config: Notification to send if the event ends up alone
+            details: Event fields used to build the summary
+            wait: Wait until the (possibly merged) notification is delivered
+
+        Returns:
+            Delivery result (True, False or SHED) when waiting, None otherwise.
+        """
+        if self.window <= 0:
+            return await self._submit(config, wait=wait)
+
+        group = self._groups.get(key)
+        if group is None:
+            loop = asyncio.get_running_loop()
+            group = _Group(future=loop.create_future())
+            group.handle = loop.call_later(self.window, self._close, key)
+            self._groups[key] = group
+
+        group.configs.append(config)
+        group.details.append(details)
+
+        if not wait:
+            return None
+        return await asyncio.shield(group.future)
+
+    async def flush(self) -> None:
+        """Close every open window now and wait for the deliveries."""
+        for key, group in list(self._groups.items()):
+            if group.handle is not None:
+                group.handle.cancel()
+            self._close(key)
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def _close(self, key: Hashable) -> None:
+        """Window elapsed: hand the group over for delivery."""
+        group = self._groups.pop(key, None)
+        if group is None:
+            return
+        task = asyncio.create_task(self._deliver(group))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _deliver(self, group: _Group) -> None:
+        """Send the lone event or the summary of the burst."""
+        if len(group.configs) == 1:
+            config = group.configs[0]
+        else:
+            config = self._summarize(group.details)
+        try:
+            success = await self._submit(config, wait=True)
+        except Exception:
+            success = False
+        if not group.future.done():
+            group.future.set_result(success)
@@ -33,10 +33,17 @@ def save_config(path: Path, config: dict) -> None:
         f.write("\n")
 
 
-def configure_mcp_notify(config: dict, mcp_path: Path) -> tuple[dict, bool]:
+def configure_mcp_notify(
+    config: dict, mcp_path: Path, daemon: bool = False
+) -> tuple[dict, bool]:
     """
     Add MCP notify configuration.
 
+    Args:
+        config: Existing opencode.json content
+        mcp_path: Directory of the notify server
+        daemon: Start sessions through shim.py, sharing one daemon process
+
     Returns:
         Tuple of (updated config, whether changes were made)
     """
@@ -45,7 +52,7 @@ def configure_mcp_notify(config: dict, mcp_path: Path) -> tuple[dict, bool]:
         config["mcp"] = {}
 
     venv_python = str(mcp_path / ".venv" / "bin" / "python")
-    server_script = str(mcp_path / "server.py")
+    server_script = str(mcp_path / ("shim.py" if daemon else "server.py"))
 
     # Check if notify already configured correctly
     if "notify" in config["mcp"]:
@@ -75,18 +82,20 @@ def main():
     """Main entry point."""
     config_path = get_opencode_config_path()
     mcp_path = get_mcp_notify_path()
+    daemon = "--daemon" in sys.argv[1:]
 
     print(f"MCP Notify Configuration")
     print(f"========================")
     print(f"Config file: {config_path}")
     print(f"MCP server:  {mcp_path}")
+    print(f"Mode:        {'shared daemon' if daemon else 'one process per session'}")
     print()
 
     # Load existing config
     config = load_config(config_path)
 
     # Add MCP notify
-    config, changed = configure_mcp_notify(config, mcp_path)
+    config, changed = configure_mcp_notify(config, mcp_path, daemon)
 
     if changed:
         save_config(config_path, config)
@@ -0,0 +1,148 @@
+"""Long-lived notify daemon serving MCP sessions over a Unix socket.
+
+Each connection (usually from shim.py) is one MCP session, framed exactly
+like stdio: one JSON-RPC message per line. All sessions share the
+process, so its dispatcher, coalescers, rate limits and history are
+global. The daemon exits after a period without connections.
+"""
+
+import asyncio
+import os
+import signal
+import sys
+import time
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import AsyncIterator, Awaitable, Callable
+
+import anyio
+import anyio.lowlevel
+import mcp.types as types
+from anyio.streams.memory import MemoryObjectReceiveStream, MemoryObjectSendStream
+from mcp.shared.message import SessionMessage
+
+from shim import connect
+
+# Largest accepted message line (notify_batch calls can be big)
+LINE_LIMIT = 16 * 1024 * 1024
+
+Session = Callable[[MemoryObjectReceiveStream, MemoryObjectSendStream], Awaitable[None]]
+
+
+def idle_timeout_from_env() -> float:
+    """Seconds without connections before exiting (MCP_NOTIFY_DAEMON_IDLE)."""
+    try:
+        return float(os.environ.get("MCP_NOTIFY_DAEMON_IDLE", 600))
+    except ValueError:
+        return 600.0
+
+
+@asynccontextmanager
+async def socket_transport(
+    reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+) -> AsyncIterator[tuple[MemoryObjectReceiveStream, MemoryObjectSendStream]]:
+    """MCP read and write streams over a socket, like mcp's stdio_server."""
+    read_stream_writer, read_stream = anyio.create_memory_object_stream(0)
+    write_stream, write_stream_reader = anyio.create_memory_object_stream(0)
+
+    async def socket_reader() -> None:
+        try:
+            async with read_stream_writer:
+                while line := await reader.readline():
+                    try:
+                        message = types.JSONRPCMessage.model_validate_json(line)
+                    except Exception as exc:
+                        await read_stream_writer.send(exc)
+                        continue
+                    await read_stream_writer.send(SessionMessage(message))
+        except (anyio.ClosedResourceError, ConnectionError):
+            await anyio.lowlevel.checkpoint()
+
+    async def socket_writer() -> None:
+        try:
+            async with write_stream_reader:
+                async for session_message in write_stream_reader:
+                    json = session_message.message.model_dump_json(
+                        by_alias=True, exclude_none=True
+                    )
+                    writer.write(json.encode() + b"\n")
+                    await writer.drain()
+        except (anyio.ClosedResourceError, ConnectionError):
+            await anyio.lowlevel.checkpoint()
+
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(socket_reader)
+        tg.start_soon(socket_writer)
+        yield read_stream, write_stream
+        # The session is over: stop copying even if the peer is still open
+        tg.cancel_scope.cancel()
+
+
+async def serve(path: Path, session: Session, idle_timeout: float) -> None:
+    """
+    Run `session` for every connection on the Unix socket at `path`.
+
+    Returns when idle for `idle_timeout` seconds (0 never), on SIGTERM or
+    SIGINT, or at once if another daemon already listens on `path`.
+    """
+    existing = connect(path)
+    if existing is not None:
+        existing.close()
+        print(f"Another notify daemon is listening on {path}", file=sys.stderr)
+        return
+
+    active = 0
+    last_active = time.monotonic()
+    stop = asyncio.Event()
+    sessions: dict[asyncio.Task, asyncio.StreamWriter] = {}
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        nonlocal active, last_active
+        active += 1
+        sessions[asyncio.current_task()] = writer
+        try:
+            async with socket_transport(reader, writer) as (read, write):
+                await session(read, write)
+        except Exception as e:
+            print(f"Session failed: {e!r}", file=sys.stderr)
+        finally:
+            active -= 1
+            last_active = time.monotonic()
+            sessions.pop(asyncio.current_task(), None)
+            writer.close()
+
+    # A socket left by a crashed daemon: nobody answers on it
+    path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+    path.unlink(missing_ok=True)
+    unix_server = await asyncio.start_unix_server(
+        handle, path=str(path), limit=LINE_LIMIT
+    )
+    os.chmod(path, 0o600)
+    inode = path.stat().st_ino
+
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(signum, stop.set)
+
+    try:
+        async with unix_server:
+            while not stop.is_set():
+                try:
+                    await asyncio.wait_for(stop.wait(), timeout=5)
+                except asyncio.TimeoutError:
+                    pass
+                idle = time.monotonic() - last_active
+                if idle_timeout > 0 and active == 0 and idle >= idle_timeout:
+                    break
+            # Shutting down: end the sessions still connected
+            for writer in sessions.values():
+                writer.close()
+            if sessions:
+                await asyncio.wait(list(sessions), timeout=5)
+    finally:
+        # Only remove the socket if a newer daemon has not replaced it
+        try:
+            if path.stat().st_ino == inode:
+                path.unlink()
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,351 @@
+"""Asynchronous dispatch queue for notifications.
+
+Backends are blocking (subprocesses, native APIs), so delivering a
+notification directly from an MCP tool handler stalls the event loop and
+every other tool call in the session. The dispatcher accepts notifications
+into a bounded queue and delivers them from a small pool of workers, each
+running the blocking send in a thread.
+
+Jobs are served by priority class (questions first, by urgency, then
+merges, commits and syncs), with aging so low classes are never starved:
+a job's rank is its enqueue time plus `aging` seconds per class, so a sync
+waits at most 5 * aging seconds longer than a fresh urgent question. With
+several workers, one is kept for questions so they never wait behind a
+slow burst. Past `shed_at` queued jobs, commit and sync notifications are
+shed (dropped, reported to listeners as undelivered and to callers as SHED)
+rather than queued.
+"""
+
+import asyncio
+import heapq
+import itertools
+import os
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from notifier import DeliveryResult, NotificationConfig, NotificationType, deliver
+
+# Called from a worker thread after each delivery attempt (from the event
+# loop for shed notifications)
+Listener = Callable[[NotificationConfig, DeliveryResult], None]
+
+
+# Acknowledgement modes
+ACK_QUEUED = "queued"  # Return as soon as the notification is enqueued
+ACK_DELIVERED = "delivered"  # Wait until the backend has delivered it
+
+
+# Priority classes, most urgent first
+PRIORITY_ASK_HIGH = 0
+PRIORITY_ASK_NORMAL = 1
+PRIORITY_ASK_LOW = 2
+PRIORITY_MERGE = 3
+PRIORITY_COMMIT = 4
+PRIORITY_SYNC = 5
+
+PRIORITY_NAMES = ["ask_high", "ask_normal", "ask_low", "merge", "commit", "sync"]
+
+# Classes shed first when the queue is long
+SHEDDABLE = PRIORITY_COMMIT
+
+# Backend name reported to listeners for shed notifications, and result of
+# a shed notification (next to True: delivered, False: failed)
+SHED = "shed"
+
+ASK_PRIORITIES = {
+    NotificationType.ERROR: PRIORITY_ASK_HIGH,
+    NotificationType.WARNING: PRIORITY_ASK_NORMAL,
+    NotificationType.INFO: PRIORITY_ASK_LOW,
+    NotificationType.SUCCESS: PRIORITY_ASK_LOW,
+}
+
+CATEGORY_PRIORITIES = {
+    "merge": PRIORITY_MERGE,
+    "commit": PRIORITY_COMMIT,
+    "sync": PRIORITY_SYNC,
+    # Superseded by the next update anyway (the final one is submitted with
+    # a higher priority, see ProgressTracker)
+    "progress": PRIORITY_SYNC,
+}
+
+
+def priority_of(config: NotificationConfig) -> int:
+    """Priority class of a notification (lower is more urgent)."""
+    if config.category == "ask":
+        return ASK_PRIORITIES[config.type]
+    if config.category in CATEGORY_PRIORITIES:
+        return CATEGORY_PRIORITIES[config.category]
+    # Uncategorized (send_notification): errors and warnings are worth a look
+    if config.type == NotificationType.ERROR:
+        return PRIORITY_ASK_NORMAL
+    if config.type == NotificationType.WARNING:
+        return PRIORITY_MERGE
+    return PRIORITY_COMMIT
+
+
+def priority_name(config: NotificationConfig) -> str:
+    """Name of a notification's priority class, for metrics."""
+    return PRIORITY_NAMES[priority_of(config)]
+
+
+@dataclass
+class _Job:
+    """Notifications delivered together by one worker."""
+
+    configs: list[NotificationConfig]
+    future: asyncio.Future
+    priority: int
+    # Monotonic time the job was queued
+    enqueued: float
+
+
+def _env_int(name: str, default: int) -> int:
+    """Read a positive integer from the environment."""
+    try:
+        value = int(os.environ.get(name, default))
+    except ValueError:
+        return default
+    return value if value > 0 else default
+
+
+def default_ack_mode() -> str:
+    """Acknowledgement mode from MCP_NOTIFY_ACK (queued or delivered)."""
+    mode = os.environ.get("MCP_NOTIFY_ACK", ACK_QUEUED).lower()
+    return mode if mode in (ACK_QUEUED, ACK_DELIVERED) else ACK_QUEUED
+
+
+class Dispatcher:
+    """Bounded priority queue of notifications served by a pool of workers."""
+
+    def __init__(
+        self,
+        send: Callable[[NotificationConfig], DeliveryResult] = deliver,
+        workers: int = 2,
+        max_pending: int = 256,
+        aging: float = 10.0,
+        shed_at: Optional[int] = None,
+    ):
+        """
+        Args:
+            send: Blocking delivery function
+            workers: Worker count; with more than one, the last serves questions only
+            max_pending: Queued jobs before callers wait
+            aging: Seconds of waiting worth one priority class
+            shed_at: Queued jobs from which commits and syncs are shed
+                (default: half of max_pending)
+        """
+        self._send = send
+        self._listeners: list[Listener] = []
+        self._workers_count = workers
+        self._max_pending = max_pending
+        self._aging = aging
+        self._shed_at = min(shed_at or max(1, max_pending // 2), max_pending)
+        # (rank, sequence, job): questions, everything else
+        self._questions: list[tuple[float, int, _Job]] = []
+        self._others: list[tuple[float, int, _Job]] = []
+        self._sequence = itertools.count()
+        self._changed: Optional[asyncio.Condition] = None
+        self._unfinished = 0
+        self._idle: Optional[asyncio.Event] = None
+        self._workers: list[asyncio.Task] = []
+        self.shed = 0
+
+    @property
+    def pending(self) -> int:
+        """Number of jobs waiting for a worker."""
+        return len(self._questions) + len(self._others)
+
+    def add_listener(self, listener: Listener) -> None:
+        """Observe every delivery (runs in the worker thread, must not raise)."""
+        self._listeners.append(listener)
+
+    def start(self) -> None:
+        """Start the worker pool on the running event loop."""
+        if self._workers:
+            return
+        self._changed = asyncio.Condition()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._workers = [
+            asyncio.create_task(
+                # Keep a worker for questions when there are several
+                self._worker(questions_only=i > 0 and i == self._workers_count - 1),
+                name=f"notify-worker-{i}",
+            )
+            for i in range(self._workers_count)
+        ]
+
+    async def stop(self, drain: bool = True) -> None:
+        """Stop the workers, optionally delivering what is still queued."""
+        if not self._workers:
+            return
+        if drain:
+            await self._idle.wait()
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        for _, _, job in self._questions + self._others:
+            self._resolve(job, [False] * len(job.configs))
+        self._questions, self._others = [], []
+        self._unfinished = 0
+
+    async def submit(
+        self,
+        config: NotificationConfig,
+        wait: bool = False,
+        priority: Optional[int] = None,
+    ) -> Optional[bool | str]:
+        """
+        Enqueue a notification.
+
+        Args:
+            config: Notification to deliver
+            wait: Wait for delivery instead of returning once enqueued
+            priority: Priority class instead of priority_of(config)
+
+        Returns:
+            Delivery result (True, False or SHED) when waiting, None when only
+            enqueued, SHED when shed on arrival.
+        """
+        results = await self.submit_batch([config], wait=wait, priority=priority)
+        return None if results is None else results[0]
+
+    async def submit_batch(
+        self,
+        configs: list[NotificationConfig],
+        wait: bool = False,
+        priority: Optional[int] = None,
+    ) -> Optional[list[bool | str]]:
+        """
+        Enqueue notifications delivered together by one worker, in order.
+
+        Returns:
+            Per-notification results (True, False or SHED) when waiting or
+            when the batch was shed on arrival, None when only enqueued.
+        """
+        if not configs:
+            return [] if wait else None
+        self.start()
+        if priority is None:
+            # A batch goes out together, as early as its most urgent event
+            priority = min(priority_of(config) for config in configs)
+        job = _Job(
+            configs=configs,
+            future=asyncio.get_running_loop().create_future(),
+            priority=priority,
+            enqueued=time.monotonic(),
+        )
+        async with self._changed:
+            if job.priority >= SHEDDABLE and self.pending >= self._shed_at:
+                self._shed(job)
+            else:
+                # Make room by shedding, else wait for a worker to take a job
+                while self.pending >= self._max_pending and not self._shed_queued():
+                    await self._changed.wait()
+                rank = job.enqueued + job.priority * self._aging
+                heap = (
+                    self._questions
+                    if job.priority <= PRIORITY_ASK_LOW
+                    else self._others
+                )
+                heapq.heappush(heap, (rank, next(self._sequence), job))
+                self._unfinished += 1
+                self._idle.clear()
+                self._changed.notify_all()
+        # Shed on arrival: tell the caller even when it does not wait
+        if wait or job.future.done():
+            return await job.future
+        return None
+
+    def _shed_queued(self) -> bool:
+        """Shed the least urgent queued commit or sync job, if any."""
+        candidates = [entry for entry in self._others if entry[2].priority >= SHEDDABLE]
+        if not candidates:
+            return False
+        victim = max(candidates)
+        self._others.remove(victim)
+        heapq.heapify(self._others)
+        self._finished()
+        self._shed(victim[2])
+        return True
+
+    def _shed(self, job: _Job) -> None:
+        """Drop a job, reporting its notifications as undelivered."""
+        self.shed += len(job.configs)
+        for config in job.configs:
+            self._notify(config, DeliveryResult(success=False, backend=SHED))
+        self._resolve(job, [SHED] * len(job.configs))
+
+    def _pop(self, questions_only: bool) -> Optional[_Job]:
+        """Most urgent job after aging, None if there is nothing to take."""
+        heaps = [self._questions] if questions_only else [self._questions, self._others]
+        heaps = [heap for heap in heaps if heap]
+        if not heaps:
+            return None
+        return heapq.heappop(min(heaps, key=lambda heap: heap[0]))[2]
+
+    async def _worker(self, questions_only: bool = False) -> None:
+        """Deliver queued jobs one at a time."""
+        while True:
+            async with self._changed:
+                while (job := self._pop(questions_only)) is None:
+                    await self._changed.wait()
+                # Room for callers waiting on a full queue
+                self._changed.notify_all()
+            queued = time.monotonic() - job.enqueued
+            try:
+                # One thread hop for the whole job
+                results = await asyncio.to_thread(
+                    self._deliver_all, job.configs, queued
+                )
+            finally:
+                self._finished()
+            self._resolve(job, [result.success for result in results])
+
+    def _finished(self) -> None:
+        """Account for a job leaving the queue for good."""
+        self._unfinished -= 1
+        if self._unfinished == 0:
+            self._idle.set()
+
+    @staticmethod
+    def _resolve(job: _Job, results: list[bool | str]) -> None:
+        """Complete a job's future unless it already is."""
+        if not job.future.done():
+            job.future.set_result(results)
+
+    def _deliver_all(
+        self, configs: list[NotificationConfig], queued: float = 0.0
+    ) -> list[DeliveryResult]:
+        """Deliver a job's notifications in order (worker thread)."""
+        return [self._deliver(config, queued) for config in configs]
+
+    def _deliver(
+        self, config: NotificationConfig, queued: float = 0.0
+    ) -> DeliveryResult:
+        """Send one notification and notify listeners (worker thread)."""
+        try:
+            result = self._send(config)
+        except Exception:
+            result = DeliveryResult(success=False)
+        result.queued = queued
+        self._notify(config, result)
+        return result
+
+    def _notify(self, config: NotificationConfig, result: DeliveryResult) -> None:
+        """Call every listener, ignoring their errors."""
+        for listener in self._listeners:
+            try:
+                listener(config, result)
+            except Exception:
+                pass
+
+
+dispatcher = Dispatcher(
+    workers=_env_int("MCP_NOTIFY_WORKERS", 2),
+    max_pending=_env_int("MCP_NOTIFY_QUEUE_SIZE", 256),
+    aging=_env_int("MCP_NOTIFY_AGING", 10),
+    shed_at=_env_int("MCP_NOTIFY_SHED_AT", _env_int("MCP_NOTIFY_QUEUE_SIZE", 256) // 2),
+)
@@ -0,0 +1,375 @@
+"""Structured JSONL event log of notification activity, with rotation.
+
+Every tool call and delivery result is one JSON line (`ts` is Unix time),
+the raw input for usage analytics. Events are buffered in memory and
+written by a background thread every `flush_interval` seconds, without
+fsync. The active segment `events.jsonl` rotates by size; rotated
+segments are gzip-compressed and the oldest are deleted.
+
+Each segment has a sidecar index (`<segment>.idx`, one JSON line per
+written block: first and last event time, byte offset, event count). Compressed
+segments store each block as its own gzip member, so the index offsets
+stay valid: readers seek straight to the first block at or before a
+given time instead of scanning whole files. Several processes may share
+the directory; writes and rotation are serialized by a lock file.
+
+Usage: python eventlog.py [--since 2025-01-31T12:00] [-n 20] [--dir DIR]
+"""
+
+import argparse
+import gzip
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator, Optional
+
+from notifier import DeliveryResult, NotificationConfig
+
+ACTIVE = "events.jsonl"
+
+# Write early when this much is buffered, without waiting for the interval
+BUFFER_LIMIT = 256 * 1024
+
+
+class EventLog:
+    """Buffered writer of the rotating event log (thread-safe)."""
+
+    def __init__(
+        self,
+        directory: Path,
+        max_bytes: int = 8 * 1024 * 1024,
+        keep: int = 20,
+        flush_interval: float = 1.0,
+    ):
+        """
+        Args:
+            directory: Where segments and their indexes are written
+            max_bytes: Size at which the active segment is rotated
+            keep: Compressed segments kept, oldest deleted first
+            flush_interval: Seconds between writes of buffered events
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.keep = keep
+        self.flush_interval = flush_interval
+        self._buffer: list[str] = []
+        self._buffered = 0
+        self._first_ts: Optional[float] = None
+        self._last_ts = 0.0
+        self._lock = threading.Lock()
+        # Serializes flushes within the process (the lock file across them)
+        self._write_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+        directory.mkdir(parents=True, exist_ok=True)
+
+    def log(self, event: str, **fields: object) -> None:
+        """Buffer one event; returns immediately."""
+        ts = time.time()
+        line = json.dumps(
+            {"ts": round(ts, 3), "event": event, **fields},
+            ensure_ascii=False,
+            default=str,
+        )
+        with self._lock:
+            if self._closed:
+                return
+            if self._first_ts is None:
+                self._first_ts = ts
+            self._last_ts = ts
+            self._buffer.append(line)
+            self._buffered += len(line) + 1
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="notify-eventlog", daemon=True
+                )
+                self._thread.start()
+            full = self._buffered >= BUFFER_LIMIT
+        if full:
+            self._wake.set()
+
+    def listener(self, config: NotificationConfig, result: DeliveryResult) -> None:
+        """Dispatcher listener logging every delivery with its timings."""
+        self.log(
+            "delivery",
+            category=config.category,
+            type=config.type.value,
+            title=config.title,
+            agent=config.agent,
+            repo=config.repo,
+            task=config.task,
+            success=result.success,
+            backend=result.backend,
+            queued_ms=round(result.queued * 1000, 2),
+            duration_ms=round(result.duration * 1000, 2),
+            attempts=[
+                {"backend": backend, "ok": ok, "ms": round(seconds * 1000, 2)}
+                for backend, ok, seconds in result.attempts
+            ],
+        )
+
+    def flush(self) -> None:
+        """Write buffered events now."""
+        with self._lock:
+            lines, self._buffer = self._buffer, []
+            first_ts, self._first_ts = self._first_ts, None
+            last_ts = self._last_ts
+            self._buffered = 0
+        if not lines:
+            return
+        data = ("\n".join(lines) + "\n").encode("utf-8")
+        entry = {"t": round(first_ts, 3), "u": round(last_ts, 3), "n": len(lines)}
+        with self._write_lock:
+            try:
+                self._write(data, entry)
+            except OSError as e:
+                # The log is best effort, never fail a tool call because of it
+                print(f"Event log write failed: {e}", file=sys.stderr)
+
+    def close(self) -> None:
+        """Write what is buffered and stop the background thread."""
+        with self._lock:
+            self._closed = True
+            thread = self._thread
+        self._wake.set()
+        if thread is not None:
+            thread.join(timeout=10)
+        self.flush()
+
+    def _run(self) -> None:
+        """Flush on the interval, or earlier when the buffer is large."""
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+            if self._closed:
+                return
+
+    def _write(self, data: bytes, entry: dict) -> None:
+        """Append a block and its index entry, rotating when full."""
+        active = self.directory / ACTIVE
+        with _locked(self.directory):
+            with open(active, "ab") as f:
+                offset = f.tell()
+                f.write(data)
+                size = f.tell()
+            with open(_index_path(active), "a", encoding="utf-8") as f:
+                f.write(json.dumps({**entry, "o": offset}) + "\n")
+            if size < self.max_bytes:
+                return
+            self._rotate(active)
+            # Also segments left uncompressed by a process that died
+            for segment in self.directory.glob("events-*.jsonl"):
+                _compress(segment)
+            self._prune()
+
+    def _rotate(self, active: Path) -> None:
+        """Rename the active segment and its index (lock held)."""
+        stamp = datetime.now().strftime("%Y%m%dT%H%M%S-%f")
+        target = self.directory / f"events-{stamp}.jsonl"
+        suffix = 1
+        while target.exists() or target.with_suffix(".jsonl.gz").exists():
+            target = self.directory / f"events-{stamp}-{suffix}.jsonl"
+            suffix += 1
+        os.replace(_index_path(active), _index_path(target))
+        os.replace(active, target)
+
+    def _prune(self) -> None:
+        """Delete the oldest compressed segments beyond `keep` (lock held)."""
+        compressed = sorted(self.directory.glob("events-*.jsonl.gz"))
+        for segment in compressed[: max(0, len(compressed) - self.keep)]:
+            segment.unlink(missing_ok=True)
+            _index_path(segment).unlink(missing_ok=True)
+
+
+@contextmanager
+def _locked(directory: Path) -> Iterator[None]:
+    """Hold the directory's lock file (no-op where fcntl is missing)."""
+    try:
+        import fcntl
+    except ImportError:
+        yield
+        return
+    with open(directory / "events.lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        yield
+
+
+def _index_path(segment: Path) -> Path:
+    """Sidecar index of a segment."""
+    return segment.with_name(segment.name + ".idx")
+
+
+def _read_index(segment: Path) -> list[dict]:
+    """Index entries of a segment, in file order."""
+    try:
+        lines = _index_path(segment).read_text(encoding="utf-8").splitlines()
+    except OSError:
+        return []
+    entries = []
+    for line in lines:
+        try:
+            entries.append(json.loads(line))
+        except json.JSONDecodeError:
+            continue
+    return entries
+
+
+def _compress(segment: Path) -> None:
+    """
+    Gzip a rotated segment one block per member, with its own index (lock
+    held). The compressed index is written first: readers prefer the
+    compressed segment as soon as it exists.
+    """
+    index = _read_index(segment)
+    target = segment.with_suffix(".jsonl.gz")
+    tmp = target.with_name(target.name + ".tmp")
+    entries = []
+    with open(segment, "rb") as src, open(tmp, "wb") as dst:
+        size = os.fstat(src.fileno()).st_size
+        ends = [entry["o"] for entry in index[1:]] + [size]
+        for entry, end in zip(index, ends):
+            src.seek(entry["o"])
+            member = gzip.compress(src.read(end - entry["o"]))
+            entries.append({**entry, "o": dst.tell()})
+            dst.write(member)
+    _index_path(target).write_text(
+        "".join(json.dumps(entry) + "\n" for entry in entries), encoding="utf-8"
+    )
+    os.replace(tmp, target)
+    segment.unlink()
+    _index_path(segment).unlink(missing_ok=True)
+
+
+def segments(directory: Path) -> list[Path]:
+    """Segments from oldest to newest, the active one last."""
+    compressed = {path.name[: -len(".gz")] for path in directory.glob("events-*.gz")}
+    rotated = sorted(
+        [*directory.glob("events-*.jsonl.gz")]
+        # Rotated but not compressed yet
+        + [p for p in directory.glob("events-*.jsonl") if p.name not in compressed],
+        key=lambda path: path.name.split(".")[0],
+    )
+    active = directory / ACTIVE
+    return rotated + ([active] if active.exists() else [])
+
+
+def read_events(directory: Path, since: Optional[float] = None) -> Iterator[dict]:
+    """
+    Events at or after `since` (Unix time), oldest first.
+
+    The indexes pick the first segment and block to read, so earlier data
+    is skipped without being decompressed or parsed.
+    """
+    started = since is None
+    for path in segments(directory):
+        offset = 0
+        if not started:
+            index = _read_index(path)
+            # Blocks of concurrent writers overlap in time: start at the
+            # first block ending at or after `since`
+            block = next(
+                (entry for entry in index if entry.get("u", entry["t"]) >= since),
+                None,
+            )
+            if index and block is None:
+                continue
+            offset = block["o"] if block else 0
+            started = True
+        for event in _read_segment(path, offset):
+            if since is None or event.get("ts", 0) >= since:
+                yield event
+
+
+def _read_segment(path: Path, offset: int) -> Iterator[dict]:
+    """Events of a segment from a block offset."""
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        return  # Rotated or pruned meanwhile
+    with f:
+        f.seek(offset)
+        stream = gzip.GzipFile(fileobj=f) if path.suffix == ".gz" else f
+        for line in stream:
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue  # Partial line from a concurrent writer
+
+
+def tail(directory: Path, count: int = 20) -> list[dict]:
+    """The last `count` events, reading only the newest blocks."""
+    events: list[dict] = []
+    for path in reversed(segments(directory)):
+        index = _read_index(path)
+        needed = count - len(events)
+        # Walk back from the newest block until it holds enough events
+        block, found = len(index), 0
+        while block > 0 and found < needed:
+            block -= 1
+            found += index[block]["n"]
+        offset = index[block]["o"] if index else 0
+        events = list(_read_segment(path, offset))[-needed:] + events
+        if len(events) >= count:
+            break
+    return events[-count:]
+
+
+def event_log_dir_from_env() -> Optional[Path]:
+    """
+    Log directory from MCP_NOTIFY_EVENT_LOG ("none" disables the log).
+
+    Defaults to ~/.local/state/mcp-notify/events.
+    """
+    value = os.environ.get("MCP_NOTIFY_EVENT_LOG")
+    if value is None:
+        return Path.home() / ".local" / "state" / "mcp-notify" / "events"
+    if value.lower() in ("", "none", "off"):
+        return None
+    return Path(value).expanduser()
+
+
+def open_event_log() -> Optional[EventLog]:
+    """Event log configured by the environment, None if disabled."""
+    directory = event_log_dir_from_env()
+    if directory is None:
+        return None
+    try:
+        max_mb = float(os.environ.get("MCP_NOTIFY_EVENT_LOG_MAX_MB", 8))
+        keep = int(os.environ.get("MCP_NOTIFY_EVENT_LOG_KEEP", 20))
+    except ValueError:
+        max_mb, keep = 8, 20
+    try:
+        return EventLog(directory, max_bytes=int(max_mb * 1024 * 1024), keep=keep)
+    except OSError:
+        return None
+
+
+def main() -> None:
+    """Print events as JSON lines: the last ones, or all since a time."""
+    parser = argparse.ArgumentParser(description="Show notification events")
+    parser.add_argument("--dir", type=Path, help="Log directory")
+    parser.add_argument("--since", help="ISO time, e.g. 2025-01-31T12:00")
+    parser.add_argument("-n", type=int, default=20, help="Last N events")
+    args = parser.parse_args()
+
+    directory = args.dir or event_log_dir_from_env()
+    if directory is None or not directory.exists():
+        parser.error("no event log (set MCP_NOTIFY_EVENT_LOG or --dir)")
+    if args.since:
+        since = datetime.fromisoformat(args.since).timestamp()
+        events = read_events(directory, since)
+    else:
+        events = tail(directory, args.n)
+    for event in events:
+        print(json.dumps(event, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""Persistent history of delivered notifications.
+
+Append-only SQLite database in WAL mode, indexed by agent, repo, category,
+type and time, so agents can page through what they already told the user
+even with hundreds of thousands of entries. Writes come from the dispatcher
+worker threads; a lock serializes them on a single connection.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from notifier import DeliveryResult, NotificationConfig
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS notifications (
+    id INTEGER PRIMARY KEY,
+    created REAL NOT NULL,
+    category TEXT,
+    type TEXT NOT NULL,
+    title TEXT NOT NULL,
+    message TEXT NOT NULL,
+    agent TEXT,
+    repo TEXT,
+    task TEXT,
+    success INTEGER NOT NULL,
+    backend TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_notifications_created ON notifications (created);
+CREATE INDEX IF NOT EXISTS idx_notifications_agent ON notifications (agent, id);
+CREATE INDEX IF NOT EXISTS idx_notifications_repo ON notifications (repo, id);
+CREATE INDEX IF NOT EXISTS idx_notifications_category ON notifications (category, id);
+CREATE INDEX IF NOT EXISTS idx_notifications_type ON notifications (type, id);
+"""
+
+# Filters accepted by HistoryStore.query, mapped to their column
+FILTER_COLUMNS = {
+    "agent": "agent",
+    "repo": "repo",
+    "category": "category",
+    "type": "type",
+}
+
+
+@dataclass
+class HistoryEntry:
+    """One recorded notification."""
+
+    id: int
+    created: float
+    category: Optional[str]
+    type: str
+    title: str
+    message: str
+    agent: Optional[str]
+    repo: Optional[str]
+    task: Optional[str]
+    success: bool
+    backend: Optional[str]
+
+
+class HistoryStore:
+    """Append-only notification history backed by SQLite."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(
+            str(path), check_same_thread=False, isolation_level=None
+        )
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            # WAL + NORMAL: no fsync per commit, still crash-consistent
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SCHEMA)
+
+    def record(
+        self,
+        config: NotificationConfig,
+        result: DeliveryResult,
+        created: Optional[float] = None,
+    ) -> int:
+        """Append a delivery attempt. Returns its ID."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO notifications (created, category, type, title, message,"
+                " agent, repo, task, success, backend)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    created if created is not None else time.time(),
+                    config.category,
+                    config.type.value,
+                    config.title,
+                    config.message,
+                    config.agent,
+                    config.repo,
+                    config.task,
+                    int(result.success),
+                    result.backend,
+                ),
+            )
+        return cursor.lastrowid
+
+    def listener(self, config: NotificationConfig, result: DeliveryResult) -> None:
+        """Dispatcher listener recording every delivery."""
+        try:
+            self.record(config, result)
+        except sqlite3.Error:
+            # History is best effort, never fail a delivery because of it
+            pass
+
+    def query(
+        self,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        before_id: Optional[int] = None,
+        limit: int = 20,
+        **filters: Optional[str],
+    ) -> tuple[list[HistoryEntry], Optional[int]]:
+        """
+        Most recent entries first, filtered and paginated.
+
+        Args:
+            since: Only entries created at or after this Unix time
+            until: Only entries created before this Unix time
+            before_id: Pagination cursor returned by the previous page
+            limit: Maximum entries to return
+            **filters: Exact matches on agent, repo, category or type
+
+        Returns:
+            (entries, cursor for the next page or None when exhausted)
+
+        Raises:
+            ValueError: On an unknown filter.
+        """
+        clauses = []
+        params: list = []
+        for name, value in filters.items():
+            if name not in FILTER_COLUMNS:
+                raise ValueError(f"Unknown history filter: {name}")
+            if value is not None:
+                clauses.append(f"{FILTER_COLUMNS[name]} = ?")
+                params.append(value)
+        if since is not None:
+            clauses.append("created >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("created < ?")
+            params.append(until)
+        if before_id is not None:
+            clauses.append("id < ?")
+            params.append(before_id)
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        # Fetch one extra row to know whether another page exists
+        sql = (
+            "SELECT id, created, category, type, title, message, agent, repo, task,"
+            f" success, backend FROM notifications {where} ORDER BY id DESC LIMIT ?"
+        )
+        with self._lock:
+            rows = self._conn.execute(sql, (*params, limit + 1)).fetchall()
+
+        entries = [
+            HistoryEntry(*row[:9], success=bool(row[9]), backend=row[10])
+            for row in rows[:limit]
+        ]
+        cursor = entries[-1].id if len(rows) > limit else None
+        return entries, cursor
+
+    def close(self) -> None:
+        """Close the database."""
+        with self._lock:
+            self._conn.close()
+
+
+def history_path_from_env() -> Optional[Path]:
+    """
+    Database path from MCP_NOTIFY_HISTORY ("none" disables history).
+
+    Defaults to ~/.local/share/mcp-notify/history.db.
+    """
+    value = os.environ.get("MCP_NOTIFY_HISTORY")
+    if value is None:
+        return Path.home() / ".local" / "share" / "mcp-notify" / "history.db"
+    if value.lower() in ("", "none", "off"):
+        return None
+    return Path(value).expanduser()
+
+
+def open_history() -> Optional[HistoryStore]:
+    """History store configured by the environment, None if disabled."""
+    path = history_path_from_env()
+    if path is None:
+        return None
+    try:
+        return HistoryStore(path)
+    except (OSError, sqlite3.Error):
+        return None
@@ -0,0 +1,274 @@
+"""Notification content for each tool.
+
+Builders turn tool arguments into a NotificationConfig without sending
+anything, so single tool calls, batches and coalesced summaries format
+notifications the same way.
+"""
+
+from typing import Optional
+
+from notifier import NotificationConfig, make_config
+
+# ask_user urgency to notification type
+URGENCY_TO_TYPE = {
+    "low": "info",
+    "normal": "warning",
+    "high": "error",
+}
+
+URGENCY_EMOJIS = {"low": "ℹ️", "normal": "⚠️", "high": "🚨"}
+
+
+def _truncated_list(items: list[str], limit: int = 5) -> str:
+    """Comma-separated items, limited to `limit` with a "+N more" suffix."""
+    text = ", ".join(items[:limit])
+    if len(items) > limit:
+        text += f" (+{len(items) - limit} more)"
+    return text
+
+
+def ask_user_notification(arguments: dict) -> NotificationConfig:
+    """Notification for an ask_user call."""
+    title = arguments.get("title", "Question")
+    question = arguments.get("question", "")
+    options = arguments.get("options", [])
+    urgency = arguments.get("urgency", "normal")
+    repo = arguments.get("repo")
+    branch = arguments.get("branch")
+
+    # Build message with question and options
+    message = question
+    if options:
+        options_str = " | ".join(options)
+        message = f"{question}\n[{options_str}]"
+
+    # Build subtitle from repo and branch
+    subtitle_parts = []
+    if repo:
+        subtitle_parts.append(repo)
+    if branch:
+        subtitle_parts.append(branch)
+    subtitle = " @ ".join(subtitle_parts) if subtitle_parts else None
+
+    return make_config(
+        title=title,
+        message=message,
+        type=URGENCY_TO_TYPE.get(urgency, "warning"),
+        sound=True,
+        agent=arguments.get("agent"),
+        task=arguments.get("task"),
+        repo=repo,
+        subtitle=subtitle,  # Use combined repo@branch as subtitle
+        category="ask",
+    )
+
+
+def commit_subtitle(arguments: dict) -> str:
+    """Branch as subtitle, prefixed with the repo when known."""
+    branch = arguments.get("branch", "unknown")
+    repo = arguments.get("repo")
+    return f"{repo} @ {branch}" if repo else branch
+
+
+def commit_notification(arguments: dict) -> NotificationConfig:
+    """Notification for a notify_commit call."""
+    message = arguments.get("message", "")
+    files = arguments.get("files", [])
+
+    # Build notification body
+    body_parts = [message]
+    if files:
+        body_parts.append(f"Files: {_truncated_list(files)}")
+
+    return make_config(
+        title="Commit",
+        message="\n".join(body_parts),
+        type="info",  # low urgency = info (Ping sound)
+        sound=True,
+        agent=arguments.get("agent"),
+        repo=arguments.get("repo"),
+        subtitle=commit_subtitle(arguments),
+        category="commit",
+    )
+
+
+def merge_notification(arguments: dict) -> NotificationConfig:
+    """Notification for a notify_merge call."""
+    source_branch = arguments.get("source_branch", "unknown")
+    commits_count = arguments.get("commits_count")
+    files_count = arguments.get("files_count")
+    version = arguments.get("version")
+
+    # Build notification body
+    body_parts = [f"{source_branch} → main"]
+
+    stats = []
+    if commits_count:
+        stats.append(f"{commits_count} commit{'s' if commits_count > 1 else ''}")
+    if files_count:
+        stats.append(f"{files_count} file{'s' if files_count > 1 else ''}")
+    if stats:
+        body_parts.append(", ".join(stats))
+
+    if version:
+        body_parts.append(f"Version: {version}")
+
+    return make_config(
+        title="Merge sur main",
+        message="\n".join(body_parts),
+        type="warning",  # normal urgency = warning (Funk sound)
+        sound=True,
+        agent=arguments.get("agent"),
+        repo=arguments.get("repo"),  # Repo as subtitle
+        category="merge",
+    )
+
+
+def sync_notification(arguments: dict) -> NotificationConfig:
+    """Notification for a notify_sync call."""
+    worktrees = arguments.get("worktrees", [])
+    source = arguments.get("source", "main")
+    conflicts = arguments.get("conflicts", [])
+
+    # Build notification body
+    count = len(worktrees)
+    body_parts = [f"{count} worktree{'s' if count > 1 else ''} updated from {source}"]
+
+    if worktrees:
+        body_parts.append(_truncated_list(worktrees))
+
+    if conflicts:
+        body_parts.append(f"⚠️ Conflicts: {', '.join(conflicts)}")
+
+    return make_config(
+        title="Worktrees synchronisés",
+        message="\n".join(body_parts),
+        # Conflicts = normal, no conflicts = low
+        type="warning" if conflicts else "info",
+        sound=True,
+        repo=arguments.get("repo"),  # Repo as subtitle
+        category="sync",
+    )
+
+
+PROGRESS_BAR_WIDTH = 10
+
+
+def progress_fraction(arguments: dict) -> Optional[float]:
+    """Completed fraction (0 to 1) from `percent` or `current`/`total`."""
+    if arguments.get("percent") is not None:
+        fraction = float(arguments["percent"]) / 100
+    elif arguments.get("current") is not None and arguments.get("total"):
+        fraction = float(arguments["current"]) / float(arguments["total"])
+    else:
+        return None
+    return min(1.0, max(0.0, fraction))
+
+
+def progress_done(arguments: dict) -> bool:
+    """Whether this is the operation's last update."""
+    fraction = progress_fraction(arguments)
+    return bool(arguments.get("done")) or (fraction is not None and fraction >= 1)
+
+
+def progress_tag(arguments: dict) -> str:
+    """Tag shared by every update of one operation."""
+    parts = (arguments.get("repo"), arguments.get("agent"), arguments["progress_id"])
+    return "progress:" + "/".join(part or "" for part in parts)
+
+
+def progress_text(arguments: dict) -> str:
+    """Progress as "45% (18/40)", "18/40" or "" when not given."""
+    fraction = progress_fraction(arguments)
+    count = ""
+    if arguments.get("current") is not None and arguments.get("total"):
+        count = f"{arguments['current']}/{arguments['total']}"
+    if fraction is None:
+        return count
+    percent = f"{fraction * 100:.0f}%"
+    return f"{percent} ({count})" if count else percent
+
+
+def progress_notification(arguments: dict) -> NotificationConfig:
+    """Notification for a notify_progress call (one update)."""
+    done = progress_done(arguments)
+    fraction = 1.0 if done else progress_fraction(arguments)
+
+    body_parts = []
+    if fraction is not None:
+        filled = round(fraction * PROGRESS_BAR_WIDTH)
+        bar = "▓" * filled + "░" * (PROGRESS_BAR_WIDTH - filled)
+        body_parts.append(f"{bar} {progress_text(arguments)}".rstrip())
+    elif progress_text(arguments):
+        body_parts.append(progress_text(arguments))
+    if arguments.get("status"):
+        body_parts.append(arguments["status"])
+
+    return make_config(
+        title=arguments.get("title", "Progress"),
+        message="\n".join(body_parts) or ("Done" if done else "In progress"),
+        type="success" if done else "info",
+        # Only the final update chimes
+        sound=done,
+        # Keep the popup up between updates; the final one expires normally
+        timeout=10 if done else 60,
+        agent=arguments.get("agent"),
+        task=arguments.get("task"),
+        repo=arguments.get("repo"),
+        category="progress",
+        tag=progress_tag(arguments),
+    )
+
+
+def summarize_commits(events: list[dict]) -> NotificationConfig:
+    """Summary for a burst of notify_commit calls on one branch."""
+    branch = events[0].get("branch", "unknown")
+    files = {f for event in events for f in event.get("files", [])}
+    agents = {event["agent"] for event in events if event.get("agent")}
+
+    stats = f"{len(events)} commits on {branch}"
+    if files:
+        stats += f", {len(files)} file{'s' if len(files) > 1 else ''}"
+    body = f"{stats}\nLatest: {events[-1].get('message', '')}"
+
+    return make_config(
+        title="Commits",
+        message=body,
+        type="info",
+        sound=True,
+        agent=agents.pop() if len(agents) == 1 else None,
+        repo=events[0].get("repo"),
+        subtitle=commit_subtitle(events[0]),
+        category="commit",
+    )
+
+
+def summarize_syncs(events: list[dict]) -> NotificationConfig:
+    """Summary for a burst of notify_sync calls from one source branch."""
+    source = events[0].get("source", "main")
+    # Keep first-seen order while removing duplicates
+    worktrees = list(
+        dict.fromkeys(w for event in events for w in event.get("worktrees", []))
+    )
+    conflicts = list(
+        dict.fromkeys(c for event in events for c in event.get("conflicts", []))
+    )
+
+    count = len(worktrees)
+    body_parts = [
+        f"{len(events)} syncs from {source}, "
+        f"{count} worktree{'s' if count != 1 else ''}"
+    ]
+    if worktrees:
+        body_parts.append(_truncated_list(worktrees))
+    if conflicts:
+        body_parts.append(f"⚠️ Conflicts: {', '.join(conflicts)}")
+
+    return make_config(
+        title="Worktrees synchronisés",
+        message="\n".join(body_parts),
+        type="warning" if conflicts else "info",
+        sound=True,
+        repo=events[0].get("repo"),
+        category="sync",
+    )
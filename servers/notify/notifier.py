@@ -1,31 +1,16 @@
 """Cross-platform notification abstraction."""
 
-import platform
-import subprocess
-import shutil
-from dataclasses import dataclass
+import functools
+import os
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
 from enum import Enum
-from typing import Optional, Any
+from typing import Callable, Optional
 from pathlib import Path
 
-# Conditional PyObjC import for macOS
-PYOBJC_AVAILABLE = False
-NSUserNotification: Any = None
-NSUserNotificationCenter: Any = None
-NSImage: Any = None
-
-if platform.system() == "Darwin":
-    try:
-        from Foundation import (  # type: ignore[import-not-found]
-            NSUserNotification,
-            NSUserNotificationCenter,
-        )
-        from AppKit import NSImage  # type: ignore[import-not-found]
-
-        PYOBJC_AVAILABLE = True
-    except ImportError:
-        pass
-
 
 class NotificationType(Enum):
     """Type of notification, affects emoji and sound."""
@@ -48,6 +33,35 @@ class NotificationConfig:
     agent: Optional[str] = None
     task: Optional[str] = None
     repo: Optional[str] = None
+    # Displayed instead of repo when set (e.g. "repo @ branch")
+    subtitle: Optional[str] = None
+    # Kind of event: ask, commit, merge, sync (history and scheduling)
+    category: Optional[str] = None
+    # Notifications sharing a tag replace each other in place, on backends
+    # that support it (progress updates)
+    tag: Optional[str] = None
+
+    @property
+    def display_repo(self) -> Optional[str]:
+        """Subtitle shown by backends: explicit subtitle, else the repo."""
+        return self.subtitle or self.repo
+
+
+@dataclass
+class DeliveryResult:
+    """Outcome of a delivery attempt."""
+
+    success: bool
+    # Name of the backend that delivered the notification
+    backend: Optional[str] = None
+    # Server-assigned notification ID, when the backend has one
+    notification_id: Optional[int] = None
+    # Total time spent in backends, in seconds
+    duration: float = 0.0
+    # Time spent waiting in the dispatch queue, in seconds
+    queued: float = 0.0
+    # (backend, succeeded, seconds) for every backend tried, in order
+    attempts: list[tuple[str, bool, float]] = field(default_factory=list)
 
 
 # Emoji mapping for notification types
@@ -67,7 +81,7 @@ MACOS_SOUNDS = {
 }
 
 
-def _get_icon_path() -> Optional[str]:
+def get_icon_path() -> Optional[str]:
     """Get the path to the notification icon."""
     # Look for icon in assets folder relative to this file
     module_dir = Path(__file__).parent
@@ -77,11 +91,229 @@ def _get_icon_path() -> Optional[str]:
     return None
 
 
+@dataclass(frozen=True)
+class Capabilities:
+    """Notification support detected on this machine (probed once)."""
+
+    system: str
+    pyobjc: bool = False
+    osascript: bool = False
+    dbus: bool = False
+    notify_send: bool = False
+    powershell: bool = False
+    sound_player: Optional[str] = None  # pactl, paplay or aplay
+
+
+class Backend(ABC):
+    """A way of delivering notifications, registered with register_backend."""
+
+    # Registry name, used by MCP_NOTIFY_BACKEND
+    name: str = ""
+    # Lower priorities are tried first
+    priority: int = 100
+    # Whether the backend is picked automatically when available
+    auto: bool = True
+    # Seconds a send may block (helper processes are killed after this)
+    timeout: float = 5.0
+    # Whether failures open the backend's circuit breaker
+    breaker: bool = True
+    # Whether a tagged notification replaces the previous one with that tag
+    updates_in_place: bool = False
+
+    def __init__(self, capabilities: Capabilities):
+        self.capabilities = capabilities
+        self.timeout = _env_float("MCP_NOTIFY_BACKEND_TIMEOUT", self.timeout)
+        # Per thread: backends are shared by the dispatcher workers
+        self._local = threading.local()
+
+    @property
+    def last_notification_id(self) -> Optional[int]:
+        """Server-assigned ID of the last notification sent by this thread."""
+        return getattr(self._local, "notification_id", None)
+
+    @last_notification_id.setter
+    def last_notification_id(self, value: Optional[int]) -> None:
+        self._local.notification_id = value
+
+    @classmethod
+    @abstractmethod
+    def available(cls, capabilities: Capabilities) -> bool:
+        """Whether the backend can run with the detected capabilities."""
+
+    @abstractmethod
+    def send(self, config: NotificationConfig) -> bool:
+        """Deliver a notification. Returns True on success."""
+
+
+def _env_float(name: str, default: float) -> float:
+    """Read a positive number from the environment."""
+    try:
+        value = float(os.environ.get(name, default))
+    except ValueError:
+        return default
+    return value if value > 0 else default
+
+
+class CircuitBreaker:
+    """
+    Stops calling a failing backend and probes it again later (thread-safe).
+
+    After `failures` consecutive failures (timeouts included) the breaker
+    opens and calls are skipped for `cooldown` seconds. Then a single probe
+    call goes through: success closes the breaker, failure opens it again
+    for twice as long, up to `max_cooldown`.
+    """
+
+    def __init__(
+        self,
+        name: str = "",
+        failures: int = 3,
+        cooldown: float = 30.0,
+        max_cooldown: float = 300.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.name = name
+        self.failures = failures
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._consecutive = 0
+        self._open_until: Optional[float] = None
+        self._current_cooldown = cooldown
+        self._probing = False
+
+    @property
+    def is_open(self) -> bool:
+        """Whether calls are currently being skipped."""
+        with self._lock:
+            return self._open_until is not None and (
+                self._probing or self._clock() < self._open_until
+            )
+
+    def allow(self) -> bool:
+        """Whether to call the backend now (claims the probe when due)."""
+        with self._lock:
+            if self._open_until is None:
+                return True
+            if self._probing or self._clock() < self._open_until:
+                return False
+            self._probing = True
+            return True
+
+    def record(self, ok: bool) -> None:
+        """Record the outcome of an allowed call."""
+        with self._lock:
+            if ok:
+                if self._open_until is not None:
+                    print(f"Backend {self.name} recovered", file=sys.stderr)
+                self._consecutive = 0
+                self._open_until = None
+                self._current_cooldown = self.cooldown
+                self._probing = False
+                return
+
+            self._consecutive += 1
+            if self._probing:
+                self._current_cooldown = min(
+                    self._current_cooldown * 2, self.max_cooldown
+                )
+            elif self._consecutive < self.failures:
+                return
+            self._probing = False
+            self._open_until = self._clock() + self._current_cooldown
+            print(
+                f"Backend {self.name} failing, skipped for "
+                f"{self._current_cooldown:.0f}s",
+                file=sys.stderr,
+            )
+
+
+def breaker_from_env(name: str) -> CircuitBreaker:
+    """Circuit breaker tuned by MCP_NOTIFY_BREAKER_FAILURES and _COOLDOWN."""
+    return CircuitBreaker(
+        name,
+        failures=int(_env_float("MCP_NOTIFY_BREAKER_FAILURES", 3)),
+        cooldown=_env_float("MCP_NOTIFY_BREAKER_COOLDOWN", 30.0),
+    )
+
+
+# Registered backend classes, by name
+BACKENDS: dict[str, type[Backend]] = {}
+
+
+def register_backend(cls: type[Backend]) -> type[Backend]:
+    """Class decorator adding a backend to the registry."""
+    BACKENDS[cls.name] = cls
+    return cls
+
+
+@functools.cache
+def get_capabilities() -> Capabilities:
+    """Detect platform capabilities once and cache them."""
+    from backends import detect_capabilities
+
+    return detect_capabilities()
+
+
+def resolve_backends(
+    names: Optional[list[str]] = None,
+    capabilities: Optional[Capabilities] = None,
+) -> list[Backend]:
+    """
+    Instantiate the backends to try, in order.
+
+    Args:
+        names: Explicit backend names, tried in the given order. Defaults to
+            MCP_NOTIFY_BACKEND (comma-separated), then to every automatic
+            backend available on this machine, by priority.
+        capabilities: Detected capabilities (defaults to the cached probe)
+
+    Raises:
+        ValueError: If a named backend is not registered.
+    """
+    import backends  # noqa: F401 - registers the built-in backends
+
+    capabilities = capabilities or get_capabilities()
+
+    if names is None:
+        env = os.environ.get("MCP_NOTIFY_BACKEND", "")
+        names = [name.strip() for name in env.split(",") if name.strip()] or None
+
+    if names is not None:
+        unknown = [name for name in names if name not in BACKENDS]
+        if unknown:
+            raise ValueError(f"Unknown notification backend: {', '.join(unknown)}")
+        classes = [BACKENDS[name] for name in names]
+    else:
+        classes = sorted(
+            (cls for cls in BACKENDS.values() if cls.auto),
+            key=lambda cls: cls.priority,
+        )
+
+    return [cls(capabilities) for cls in classes if cls.available(capabilities)]
+
+
 class Notifier:
     """Cross-platform notification sender."""
 
-    def __init__(self):
-        self.system = platform.system()
+    def __init__(
+        self,
+        backends: Optional[list[Backend]] = None,
+        capabilities: Optional[Capabilities] = None,
+    ):
+        self.capabilities = capabilities or get_capabilities()
+        self.system = self.capabilities.system
+        self.backends = (
+            backends
+            if backends is not None
+            else resolve_backends(capabilities=self.capabilities)
+        )
+        self.breakers = {
+            backend.name: breaker_from_env(backend.name)
+            for backend in self.backends
+            if backend.breaker
+        }
 
     def send(self, config: NotificationConfig) -> bool:
         """
@@ -90,236 +322,65 @@ class Notifier:
         Returns:
             True if notification was sent successfully.
         """
-        if self.system == "Darwin":
-            return self._send_macos(config)
-        elif self.system == "Linux":
-            return self._send_linux(config)
-        elif self.system == "Windows":
-            return self._send_windows(config)
-        else:
-            return False
-
-    def _send_macos(self, config: NotificationConfig) -> bool:
-        """Send notification on macOS, preferring PyObjC over osascript."""
-        if PYOBJC_AVAILABLE:
-            return self._send_macos_pyobjc(config)
-        else:
-            return self._send_macos_osascript(config)
-
-    def _send_macos_pyobjc(self, config: NotificationConfig) -> bool:
-        """Send notification on macOS using PyObjC (native API)."""
-        try:
-            # Create notification
-            notification = NSUserNotification.alloc().init()
-
-            # Build title with emoji
-            emoji = EMOJIS.get(config.type, "")
-            title = f"{emoji} {config.title}"
-            notification.setTitle_(title)
-
-            # Set subtitle: repo name if provided
-            if config.repo:
-                notification.setSubtitle_(config.repo)
-
-            # Build message with agent and task context
-            message_parts = []
-            if config.agent:
-                message_parts.append(config.agent.capitalize())
-            if config.task:
-                message_parts.append(config.task)
-
-            if message_parts:
-                prefix = " | ".join(message_parts)
-                message = f"{prefix} - {config.message}"
-            else:
-                message = config.message
-            notification.setInformativeText_(message)
-
-            # Note: setContentImage_ displays a large image (not suitable)
-            # The app icon (Python) is shown automatically
-
-            # Play sound if requested
-            if config.sound:
-                sound_name = MACOS_SOUNDS.get(config.type, "default")
-                notification.setSoundName_(sound_name)
-
-            # Disable actions - notification does nothing when clicked
-            # By not setting any action buttons, the notification just dismisses on click
-            notification.setHasActionButton_(False)
-
-            # Deliver notification
-            center = NSUserNotificationCenter.defaultUserNotificationCenter()
-            center.deliverNotification_(notification)
+        return self.deliver(config).success
 
-            return True
-        except Exception:
-            # Fallback to osascript if PyObjC fails
-            return self._send_macos_osascript(config)
-
-    def _send_macos_osascript(self, config: NotificationConfig) -> bool:
-        """Send notification on macOS using osascript (fallback)."""
-        emoji = EMOJIS.get(config.type, "")
-        title = f"{emoji} {config.title}"
-        sound_name = MACOS_SOUNDS.get(config.type, "default") if config.sound else ""
-
-        # Build message with context
-        message_parts = []
-        if config.repo:
-            message_parts.append(f"[{config.repo}]")
-        if config.agent:
-            message_parts.append(config.agent.capitalize())
-        if config.task:
-            message_parts.append(config.task)
-
-        if message_parts:
-            prefix = " | ".join(message_parts)
-            message = f"{prefix} - {config.message}"
-        else:
-            message = config.message
-
-        # Escape quotes for AppleScript
-        title_escaped = title.replace('"', '\\"')
-        message_escaped = message.replace('"', '\\"')
-
-        script = (
-            f'display notification "{message_escaped}" with title "{title_escaped}"'
+    def deliver(self, config: NotificationConfig) -> DeliveryResult:
+        """
+        Try backends in order until one succeeds (thread-safe).
+
+        Backends whose circuit breaker is open are skipped, so a hung or
+        broken backend fails over to the next one without being waited on.
+        """
+        attempts = []
+        start = time.perf_counter()
+        for backend in self.backends:
+            breaker = self.breakers.get(backend.name)
+            if breaker is not None and not breaker.allow():
+                continue
+            backend.last_notification_id = None
+            attempt_start = time.perf_counter()
+            try:
+                ok = backend.send(config)
+            except Exception:
+                ok = False
+            if breaker is not None:
+                breaker.record(ok)
+            attempts.append((backend.name, ok, time.perf_counter() - attempt_start))
+            if ok:
+                return DeliveryResult(
+                    success=True,
+                    backend=backend.name,
+                    notification_id=backend.last_notification_id,
+                    duration=time.perf_counter() - start,
+                    attempts=attempts,
+                )
+        return DeliveryResult(
+            success=False, duration=time.perf_counter() - start, attempts=attempts
         )
-        if config.sound:
-            script += f' sound name "{sound_name}"'
 
-        try:
-            subprocess.run(["osascript", "-e", script], check=True, capture_output=True)
-            return True
-        except subprocess.CalledProcessError:
-            return False
-
-    def _send_linux(self, config: NotificationConfig) -> bool:
-        """Send notification on Linux using notify-send."""
-        if not shutil.which("notify-send"):
-            return False
-
-        emoji = EMOJIS.get(config.type, "")
-        title = f"{emoji} {config.title}"
-
-        # Build message with context
-        message_parts = []
-        if config.repo:
-            message_parts.append(f"[{config.repo}]")
-        if config.agent:
-            message_parts.append(config.agent.capitalize())
-        if config.task:
-            message_parts.append(config.task)
-
-        if message_parts:
-            prefix = " | ".join(message_parts)
-            message = f"{prefix} - {config.message}"
-        else:
-            message = config.message
-
-        # Map type to urgency
-        urgency_map = {
-            NotificationType.INFO: "normal",
-            NotificationType.SUCCESS: "normal",
-            NotificationType.WARNING: "normal",
-            NotificationType.ERROR: "critical",
-        }
-        urgency = urgency_map.get(config.type, "normal")
-
-        try:
-            cmd = [
-                "notify-send",
-                "--urgency",
-                urgency,
-                "--expire-time",
-                str(config.timeout * 1000),
-                title,
-                message,
-            ]
-            subprocess.run(cmd, check=True, capture_output=True)
-
-            # Play sound if requested
-            if config.sound:
-                self._play_linux_sound(config.type)
 
-            return True
-        except subprocess.CalledProcessError:
-            return False
-
-    def _play_linux_sound(self, ntype: NotificationType) -> None:
-        """Play a sound on Linux using paplay or aplay."""
-        # Try common sound paths
-        sound_files = {
-            NotificationType.INFO: "/usr/share/sounds/freedesktop/stereo/message.oga",
-            NotificationType.SUCCESS: "/usr/share/sounds/freedesktop/stereo/complete.oga",
-            NotificationType.WARNING: "/usr/share/sounds/freedesktop/stereo/dialog-warning.oga",
-            NotificationType.ERROR: "/usr/share/sounds/freedesktop/stereo/dialog-error.oga",
-        }
+_notifier: Optional[Notifier] = None
+_notifier_lock = threading.Lock()
 
-        sound_file = sound_files.get(ntype)
-        if not sound_file:
-            return
-
-        # Try paplay first (PulseAudio), then aplay (ALSA)
-        for player in ["paplay", "aplay"]:
-            if shutil.which(player):
-                try:
-                    subprocess.run(
-                        [player, sound_file], check=True, capture_output=True
-                    )
-                    break
-                except subprocess.CalledProcessError:
-                    continue
-
-    def _send_windows(self, config: NotificationConfig) -> bool:
-        """Send notification on Windows using PowerShell."""
-        emoji = EMOJIS.get(config.type, "")
-        title = f"{emoji} {config.title}"
-
-        # Build message with context
-        message_parts = []
-        if config.repo:
-            message_parts.append(f"[{config.repo}]")
-        if config.agent:
-            message_parts.append(config.agent.capitalize())
-        if config.task:
-            message_parts.append(config.task)
-
-        if message_parts:
-            prefix = " | ".join(message_parts)
-            message = f"{prefix} - {config.message}"
-        else:
-            message = config.message
-
-        # PowerShell script for toast notification
-        ps_script = f'''
-        [Windows.UI.Notifications.ToastNotificationManager, Windows.UI.Notifications, ContentType = WindowsRuntime] | Out-Null
-        [Windows.Data.Xml.Dom.XmlDocument, Windows.Data.Xml.Dom.XmlDocument, ContentType = WindowsRuntime] | Out-Null
-        
-        $template = @"
-        <toast duration="short">
-            <visual>
-                <binding template="ToastText02">
-                    <text id="1">{title}</text>
-                    <text id="2">{message}</text>
-                </binding>
-            </visual>
-            <audio silent="{str(not config.sound).lower()}"/>
-        </toast>
-"@
-        
-        $xml = New-Object Windows.Data.Xml.Dom.XmlDocument
-        $xml.LoadXml($template)
-        $toast = [Windows.UI.Notifications.ToastNotification]::new($xml)
-        [Windows.UI.Notifications.ToastNotificationManager]::CreateToastNotifier("OpenFlow").Show($toast)
-        '''
-
-        try:
-            subprocess.run(
-                ["powershell", "-Command", ps_script], check=True, capture_output=True
-            )
-            return True
-        except (subprocess.CalledProcessError, FileNotFoundError):
-            return False
+
+def get_notifier() -> Notifier:
+    """
+    Shared Notifier, resolved once per process.
+
+    Locked: the startup probe and the first delivery may race, and backends
+    keep per-instance state (breakers, in-place update IDs).
+    """
+    global _notifier
+    if _notifier is None:
+        with _notifier_lock:
+            if _notifier is None:
+                _notifier = Notifier()
+    return _notifier
+
+
+def resolved_notifier() -> Optional[Notifier]:
+    """Shared Notifier if already resolved (never probes backends)."""
+    return _notifier
 
 
 def send_notification(
@@ -348,12 +409,45 @@ def send_notification(
     Returns:
         True if notification was sent successfully.
     """
+    config = make_config(
+        title=title,
+        message=message,
+        type=type,
+        sound=sound,
+        timeout=timeout,
+        agent=agent,
+        task=task,
+        repo=repo,
+    )
+
+    return deliver(config).success
+
+
+def deliver(config: NotificationConfig) -> DeliveryResult:
+    """Send a prepared notification (blocking) with the shared Notifier."""
+    return get_notifier().deliver(config)
+
+
+def make_config(
+    title: str,
+    message: str,
+    type: str = "info",
+    sound: bool = True,
+    timeout: int = 10,
+    agent: Optional[str] = None,
+    task: Optional[str] = None,
+    repo: Optional[str] = None,
+    subtitle: Optional[str] = None,
+    category: Optional[str] = None,
+    tag: Optional[str] = None,
+) -> NotificationConfig:
+    """Build a NotificationConfig, falling back to INFO for unknown types."""
     try:
         ntype = NotificationType(type)
     except ValueError:
         ntype = NotificationType.INFO
 
-    config = NotificationConfig(
+    return NotificationConfig(
         title=title,
         message=message,
         type=ntype,
@@ -362,7 +456,7 @@ def send_notification(
         agent=agent,
         task=task,
         repo=repo,
+        subtitle=subtitle,
+        category=category,
+        tag=tag,
     )
-
-    notifier = Notifier()
-    return notifier.send(config)
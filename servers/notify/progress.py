@@ -0,0 +1,146 @@
+"""Throttled in-place progress notifications.
+
+A long operation reports progress through one notification updated in
+place (all updates share a tag, see NotificationConfig.tag) instead of a
+popup per step. Updates of one operation are sent one at a time, at most
+once per `interval` seconds: an update arriving earlier replaces the one
+waiting, so only the latest state is shown. When the backend that
+delivered the first update cannot update in place, intermediate updates
+are skipped and only the final one is sent.
+"""
+
+import asyncio
+import os
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from coalescer import Submitter
+from notifier import DeliveryResult, NotificationConfig
+
+# update() outcomes
+SENT = "sent"  # Delivered now (or as soon as the previous update is)
+THROTTLED = "throttled"  # Held back; sent unless a newer update replaces it
+SKIPPED = "skipped"  # Dropped: the backend cannot update in place
+
+# Forget operations not updated for this long (never finished)
+STALE_AFTER = 600.0
+
+
+def interval_from_env() -> float:
+    """Minimum seconds between updates from MCP_NOTIFY_PROGRESS_INTERVAL."""
+    try:
+        return max(0.0, float(os.environ.get("MCP_NOTIFY_PROGRESS_INTERVAL", 1.0)))
+    except ValueError:
+        return 1.0
+
+
+@dataclass
+class _Operation:
+    """State of one progress notification."""
+
+    last_sent: float = float("-inf")
+    # Latest update not sent yet
+    pending: Optional[NotificationConfig] = None
+    final: bool = False
+    sender: Optional[asyncio.Task] = None
+    # Whether the delivering backend updates in place (None: not known yet)
+    in_place: Optional[bool] = None
+
+
+class ProgressTracker:
+    """Sends progress updates per tag, throttled and in order."""
+
+    def __init__(
+        self,
+        interval: float,
+        submit: Submitter,
+        updates_in_place: Callable[[str], bool],
+        clock: Callable[[], float] = time.monotonic,
+        submit_final: Optional[Submitter] = None,
+    ):
+        """
+        Args:
+            interval: Minimum seconds between two updates of an operation
+            submit: Delivers a notification (e.g. Dispatcher.submit)
+            updates_in_place: Whether a backend (by name) replaces tagged
+                notifications
+            clock: Monotonic time source, in seconds
+            submit_final: Delivers the final update of an operation (default:
+                submit), e.g. with a priority that is never shed
+        """
+        self.interval = interval
+        self._submit = submit
+        self._submit_final = submit_final or submit
+        self._updates_in_place = updates_in_place
+        self._clock = clock
+        self._operations: dict[str, _Operation] = {}
+
+    @property
+    def active(self) -> int:
+        """Operations with an update waiting or being sent."""
+        return sum(1 for op in self._operations.values() if op.sender is not None)
+
+    def update(self, config: NotificationConfig, final: bool = False) -> str:
+        """
+        Show `config` as the latest state of its operation (config.tag).
+
+        Returns:
+            SENT, THROTTLED or SKIPPED.
+        """
+        self._forget_stale()
+        op = self._operations.setdefault(config.tag, _Operation())
+        if not final and op.in_place is False:
+            return SKIPPED
+
+        throttled = op.sender is not None or (
+            self._clock() - op.last_sent < self.interval
+        )
+        op.pending = config
+        op.final = op.final or final
+        if op.sender is None:
+            op.sender = asyncio.create_task(self._send(config.tag, op))
+        return THROTTLED if throttled else SENT
+
+    def listener(self, config: NotificationConfig, result: DeliveryResult) -> None:
+        """Dispatcher listener learning whether updates replace each other."""
+        op = self._operations.get(config.tag) if config.tag else None
+        if op is not None and result.success and result.backend:
+            op.in_place = self._updates_in_place(result.backend)
+
+    async def flush(self) -> None:
+        """Wait until every waiting update is sent."""
+        senders = [op.sender for op in self._operations.values() if op.sender]
+        if senders:
+            await asyncio.gather(*senders, return_exceptions=True)
+
+    async def _send(self, tag: str, op: _Operation) -> None:
+        """Send the operation's latest update until none is waiting."""
+        try:
+            while op.pending is not None:
+                delay = op.last_sent + self.interval - self._clock()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                config, op.pending = op.pending, None
+                op.last_sent = self._clock()
+                submit = self._submit_final if op.final else self._submit
+                # Wait for delivery: the next update needs this one's ID
+                try:
+                    await submit(config, wait=True)
+                except Exception:
+                    pass
+        finally:
+            op.sender = None
+            if op.final and op.pending is None:
+                self._operations.pop(tag, None)
+
+    def _forget_stale(self) -> None:
+        """Drop idle operations that were never finished."""
+        now = self._clock()
+        stale = [
+            tag
+            for tag, op in self._operations.items()
+            if op.sender is None and now - op.last_sent > STALE_AFTER
+        ]
+        for tag in stale:
+            del self._operations[tag]
@@ -0,0 +1,173 @@
+"""Rate limiting and duplicate suppression for notifications.
+
+Protects the desktop from runaway agent loops: a token bucket per key
+(agent, repo, urgency) caps the sustained rate of questions, and a TTL
+cache drops questions identical to one asked recently.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Hashable, Optional
+
+
+def _env_float(name: str, default: float) -> float:
+    """Read a non-negative float from the environment."""
+    try:
+        return max(0.0, float(os.environ.get(name, default)))
+    except ValueError:
+        return default
+
+
+@dataclass
+class TokenBucket:
+    """Classic token bucket: `capacity` burst, refilled at `rate` tokens/s."""
+
+    capacity: float
+    rate: float
+    tokens: float
+    updated: float
+
+    def try_acquire(self, now: float) -> bool:
+        """Take a token if one is available."""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def retry_after(self) -> float:
+        """Seconds until the next token is available."""
+        if self.tokens >= 1:
+            return 0.0
+        if self.rate <= 0:
+            return float("inf")
+        return (1 - self.tokens) / self.rate
+
+
+class RateLimiter:
+    """Token buckets keyed by caller (e.g. agent, repo and urgency)."""
+
+    def __init__(
+        self,
+        per_minute: float,
+        burst: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Args:
+            per_minute: Sustained rate allowed per key (0 disables limiting)
+            burst: Events allowed back to back before the rate applies
+            clock: Monotonic time source, in seconds
+        """
+        self.rate = per_minute / 60
+        self.burst = max(1.0, burst)
+        self._clock = clock
+        self._buckets: dict[Hashable, TokenBucket] = {}
+
+    def allow(self, key: Hashable) -> bool:
+        """Whether an event for `key` may go through now."""
+        if self.rate <= 0:
+            return True
+        now = self._clock()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            self._prune(now)
+            bucket = TokenBucket(self.burst, self.rate, self.burst, now)
+            self._buckets[key] = bucket
+        return bucket.try_acquire(now)
+
+    def retry_after(self, key: Hashable) -> float:
+        """Seconds until `key` gets its next token."""
+        bucket = self._buckets.get(key)
+        return bucket.retry_after() if bucket else 0.0
+
+    def _prune(self, now: float) -> None:
+        """Forget buckets that have refilled completely (they hold no state)."""
+        refill_time = self.burst / self.rate
+        stale = [
+            key
+            for key, bucket in self._buckets.items()
+            if now - bucket.updated >= refill_time
+        ]
+        for key in stale:
+            del self._buckets[key]
+
+
+class DedupeCache:
+    """Remembers fingerprints for `ttl` seconds (thread-safe)."""
+
+    def __init__(
+        self,
+        ttl: float,
+        max_entries: int = 4096,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Args:
+            ttl: Seconds a fingerprint suppresses duplicates (0 disables)
+            max_entries: Oldest fingerprints are evicted beyond this size
+            clock: Monotonic time source, in seconds
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._clock = clock
+        # Fingerprint -> time first seen, oldest first
+        self._seen: OrderedDict[str, float] = OrderedDict()
+        # Fingerprints are forgotten from dispatcher threads
+        self._lock = threading.Lock()
+
+    def age(self, fingerprint: str) -> Optional[float]:
+        """Seconds since `fingerprint` was recorded, None if unknown or expired."""
+        now = self._clock()
+        with self._lock:
+            self._expire(now)
+            seen = self._seen.get(fingerprint)
+        return None if seen is None else now - seen
+
+    def add(self, fingerprint: str) -> None:
+        """Record a fingerprint."""
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self._seen[fingerprint] = self._clock()
+            self._seen.move_to_end(fingerprint)
+            while len(self._seen) > self.max_entries:
+                self._seen.popitem(last=False)
+
+    def discard(self, fingerprint: str) -> None:
+        """Forget a fingerprint, if recorded."""
+        with self._lock:
+            self._seen.pop(fingerprint, None)
+
+    def _expire(self, now: float) -> None:
+        """Drop fingerprints older than the TTL (lock held)."""
+        while self._seen:
+            fingerprint, seen = next(iter(self._seen.items()))
+            if now - seen < self.ttl:
+                break
+            del self._seen[fingerprint]
+
+
+def fingerprint(*parts: object) -> str:
+    """Stable hash of JSON-serializable parts."""
+    payload = json.dumps(parts, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def ask_limiter_from_env() -> RateLimiter:
+    """ask_user rate limiter from MCP_NOTIFY_ASK_RATE / MCP_NOTIFY_ASK_BURST."""
+    return RateLimiter(
+        per_minute=_env_float("MCP_NOTIFY_ASK_RATE", 6),
+        burst=_env_float("MCP_NOTIFY_ASK_BURST", 3),
+    )
+
+
+def ask_dedupe_from_env() -> DedupeCache:
+    """ask_user duplicate cache from MCP_NOTIFY_ASK_DEDUPE_TTL (seconds)."""
+    return DedupeCache(ttl=_env_float("MCP_NOTIFY_ASK_DEDUPE_TTL", 300))
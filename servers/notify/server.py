@@ -1,17 +1,71 @@
 """MCP Server for user interaction notifications."""
 
 import asyncio
+import functools
+import sys
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
 
 from mcp.server import Server
 from mcp.server.stdio import stdio_server
 from mcp.types import Tool, TextContent
 
-from notifier import send_notification
-
+from coalescer import Coalescer, window_from_env
+from daemon import idle_timeout_from_env, serve
+from dispatcher import (
+    ACK_DELIVERED,
+    PRIORITY_MERGE,
+    SHED,
+    default_ack_mode,
+    dispatcher,
+    priority_name,
+)
+from eventlog import open_event_log
+from history import open_history
+from messages import (
+    URGENCY_EMOJIS,
+    ask_user_notification,
+    commit_notification,
+    merge_notification,
+    progress_done,
+    progress_notification,
+    progress_text,
+    summarize_commits,
+    summarize_syncs,
+    sync_notification,
+)
+from notifier import (
+    BACKENDS,
+    DeliveryResult,
+    NotificationConfig,
+    get_notifier,
+    resolved_notifier,
+)
+from progress import SKIPPED, THROTTLED, ProgressTracker, interval_from_env
+from ratelimit import ask_dedupe_from_env, ask_limiter_from_env, fingerprint
+from shim import socket_path_from_env
+from webhook import close_sink, get_sink, webhook_mode
+
+# Shared helpers live next to the server directories
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from common.metrics import Metrics  # noqa: E402
+from common.startup import profile_startup  # noqa: E402
 
 # Create the MCP server
 server = Server("notify")
 
+# Shared by every tool: opt into synchronous delivery for this call
+WAIT_PROPERTY = {
+    "type": "boolean",
+    "description": (
+        "Wait until the notification is delivered instead of returning "
+        "as soon as it is queued."
+    ),
+}
+
 
 @server.list_tools()
 async def list_tools() -> list[Tool]:
@@ -63,13 +117,18 @@ async def list_tools() -> list[Tool]:
                         "type": "string",
                         "description": "Name or number of the current task.",
                     },
+                    "wait": WAIT_PROPERTY,
                 },
                 "required": ["title", "question"],
             },
         ),
         Tool(
             name="notify_commit",
-            description="Notify the user that a commit was made. Use this after committing changes.",
+            description=(
+                "Notify the user that a commit was made. Use this after committing changes. "
+                "Commits on the same repo and branch made in quick succession are "
+                "merged into one summary notification."
+            ),
             inputSchema={
                 "type": "object",
                 "properties": {
@@ -94,6 +153,11 @@ async def list_tools() -> list[Tool]:
                         "type": "string",
                         "description": "Name of the agent that made the commit.",
                     },
+                    "repo": {
+                        "type": "string",
+                        "description": "Repository name.",
+                    },
+                    "wait": WAIT_PROPERTY,
                 },
                 "required": ["branch", "message"],
             },
@@ -128,6 +192,7 @@ async def list_tools() -> list[Tool]:
                         "type": "string",
                         "description": "Name of the agent that performed the merge.",
                     },
+                    "wait": WAIT_PROPERTY,
                 },
                 "required": ["source_branch"],
             },
@@ -156,16 +221,187 @@ async def list_tools() -> list[Tool]:
                         "items": {"type": "string"},
                         "description": "List of conflicts if any.",
                     },
+                    "wait": WAIT_PROPERTY,
                 },
                 "required": ["worktrees"],
             },
         ),
+        Tool(
+            name="notify_progress",
+            description=(
+                "Report progress of a long operation (e.g. syncing 40 worktrees) "
+                "in a single notification updated in place. Call it with the same "
+                "progress_id at each step and with done=true at the end. Updates "
+                "are rate-limited: intermediate ones may be merged or skipped."
+            ),
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "progress_id": {
+                        "type": "string",
+                        "description": "Identifier of the operation, the same for every update.",
+                    },
+                    "title": {
+                        "type": "string",
+                        "description": "Title of the operation (e.g., 'Syncing worktrees').",
+                    },
+                    "status": {
+                        "type": "string",
+                        "description": "Current step (e.g., 'feature/login rebased').",
+                    },
+                    "percent": {
+                        "type": "number",
+                        "description": "Completion from 0 to 100.",
+                    },
+                    "current": {
+                        "type": "integer",
+                        "description": "Steps done (with total, e.g. 12 of 40).",
+                    },
+                    "total": {
+                        "type": "integer",
+                        "description": "Total number of steps.",
+                    },
+                    "done": {
+                        "type": "boolean",
+                        "description": "Last update: the operation is finished.",
+                    },
+                    "repo": {
+                        "type": "string",
+                        "description": "Repository name.",
+                    },
+                    "agent": {
+                        "type": "string",
+                        "description": "Name of the agent running the operation.",
+                    },
+                    "task": {
+                        "type": "string",
+                        "description": "Name or number of the current task.",
+                    },
+                },
+                "required": ["progress_id", "title"],
+            },
+        ),
+        Tool(
+            name="notify_batch",
+            description=(
+                "Send several notifications in one call (e.g. after syncing many "
+                "worktrees or replaying a merge train). Each event has a 'type' "
+                "(ask, commit, merge or sync) plus the arguments of the matching "
+                "tool (ask_user, notify_commit, notify_merge or notify_sync). "
+                "All events are validated before anything is sent. "
+                "Returns one result line per event."
+            ),
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "events": {
+                        "type": "array",
+                        "items": {
+                            "type": "object",
+                            "properties": {
+                                "type": {
+                                    "type": "string",
+                                    "enum": ["ask", "commit", "merge", "sync"],
+                                    "description": "Kind of event.",
+                                },
+                            },
+                            "required": ["type"],
+                        },
+                        "description": "Events to notify, in order.",
+                    },
+                    "wait": WAIT_PROPERTY,
+                },
+                "required": ["events"],
+            },
+        ),
+        Tool(
+            name="list_notifications",
+            description=(
+                "List notifications already sent to the user, most recent first. "
+                "Use this after resuming work to see what the user was already told."
+            ),
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "agent": {
+                        "type": "string",
+                        "description": "Only notifications sent by this agent.",
+                    },
+                    "repo": {
+                        "type": "string",
+                        "description": "Only notifications about this repository.",
+                    },
+                    "category": {
+                        "type": "string",
+                        "enum": ["ask", "commit", "merge", "sync"],
+                        "description": "Only this kind of notification.",
+                    },
+                    "type": {
+                        "type": "string",
+                        "enum": ["info", "success", "warning", "error"],
+                        "description": "Only this notification type.",
+                    },
+                    "since": {
+                        "type": "string",
+                        "description": "Only notifications at or after this time (ISO 8601 or Unix seconds).",
+                    },
+                    "until": {
+                        "type": "string",
+                        "description": "Only notifications before this time (ISO 8601 or Unix seconds).",
+                    },
+                    "limit": {
+                        "type": "integer",
+                        "description": "Maximum number of notifications to return (1-200).",
+                        "default": 20,
+                    },
+                    "cursor": {
+                        "type": "string",
+                        "description": "Cursor returned by the previous page.",
+                    },
+                },
+                "required": [],
+            },
+        ),
+        Tool(
+            name="server_stats",
+            description=(
+                "Show notification server statistics: tool and backend latency "
+                "percentiles, delivery counts and errors, and queue depth."
+            ),
+            inputSchema={"type": "object", "properties": {}, "required": []},
+        ),
     ]
 
 
 @server.call_tool()
 async def call_tool(name: str, arguments: dict) -> list[TextContent]:
     """Handle tool calls."""
+    start = time.perf_counter()
+    error = None
+    result: list[TextContent] = []
+    try:
+        with metrics.timer("tool_call", tool=name):
+            result = await _dispatch_tool(name, arguments)
+        return result
+    except Exception as e:
+        error = repr(e)
+        raise
+    finally:
+        if events is not None:
+            events.log(
+                "tool",
+                tool=name,
+                agent=arguments.get("agent"),
+                repo=arguments.get("repo"),
+                ms=round((time.perf_counter() - start) * 1000, 2),
+                # First line of the acknowledgement (queued, suppressed, ...)
+                result=result[0].text.split("\n", 1)[0] if result else None,
+                error=error,
+            )
+
+
+async def _dispatch_tool(name: str, arguments: dict) -> list[TextContent]:
+    """Route a tool call to its handler."""
     if name == "ask_user":
         return await _handle_ask_user(arguments)
     elif name == "notify_commit":
@@ -174,217 +410,493 @@ async def call_tool(name: str, arguments: dict) -> list[TextContent]:
         return await _handle_notify_merge(arguments)
     elif name == "notify_sync":
         return await _handle_notify_sync(arguments)
+    elif name == "notify_progress":
+        return await _handle_notify_progress(arguments)
+    elif name == "notify_batch":
+        return await _handle_notify_batch(arguments)
+    elif name == "list_notifications":
+        return await _handle_list_notifications(arguments)
+    elif name == "server_stats":
+        return [TextContent(type="text", text=metrics.render_text())]
     else:
         return [TextContent(type="text", text=f"Unknown tool: {name}")]
 
 
-async def _handle_ask_user(arguments: dict) -> list[TextContent]:
-    """Handle ask_user tool call."""
-    title = arguments.get("title", "Question")
-    question = arguments.get("question", "")
-    options = arguments.get("options", [])
+def _wait(arguments: dict) -> bool:
+    """Whether the call waits for delivery (`wait`, else MCP_NOTIFY_ACK)."""
+    return bool(arguments.get("wait", default_ack_mode() == ACK_DELIVERED))
+
+
+def _ack(success: Optional[bool | str]) -> str:
+    """Suffix telling the agent the notification was only queued, or shed."""
+    if success == SHED:
+        return " - dropped (load shedding)"
+    return " (queued)" if success is None else ""
+
+
+FAILED_TEXT = "Failed to send notification. Platform may not be supported."
+
+
+def _result(success: Optional[bool | str], text: str) -> list[TextContent]:
+    """Tool result for a delivered or queued notification, or the failure."""
+    if success is False:
+        return [TextContent(type="text", text=FAILED_TEXT)]
+    return [TextContent(type="text", text=f"{text}{_ack(success)}")]
+
+
+# Latency and throughput of tools and backends (server_stats, Prometheus file)
+metrics = Metrics("mcp_notify")
+
+
+def _record_delivery(config: NotificationConfig, result: DeliveryResult) -> None:
+    """Dispatcher listener timing every backend attempt."""
+    if result.backend == SHED:
+        metrics.inc("shed_total", category=config.category or "other")
+        return
+    metrics.inc("deliveries_total", category=config.category or "other")
+    # Time to reach a worker, per class: what a blocked question waits for
+    metrics.observe("queue_wait", result.queued, priority=priority_name(config))
+    metrics.observe("delivery", result.duration)
+    if not result.success:
+        metrics.inc("delivery_failures_total")
+    for backend, ok, seconds in result.attempts:
+        metrics.observe("backend_send", seconds, backend=backend)
+        if not ok:
+            metrics.inc("backend_errors_total", backend=backend)
+
+
+dispatcher.add_listener(_record_delivery)
+
+# Delivery history (None when MCP_NOTIFY_HISTORY=none), structured JSONL event
+# log (None when MCP_NOTIFY_EVENT_LOG=none) and HTTP webhooks (None without
+# configuration), opened by _open_stores() when the server starts: importing
+# the server touches no file
+history = None
+events = None
+webhook_sink = None
+
+
+def _open_stores() -> None:
+    """Open the history, event log and webhooks, and wire them to delivery."""
+    global history, events, webhook_sink
+    history = open_history()
+    if history is not None:
+        dispatcher.add_listener(history.listener)
+    events = open_event_log()
+    if events is not None:
+        dispatcher.add_listener(events.listener)
+    # "always" mode copies every notification to the webhooks, otherwise they
+    # are the "webhook" fallback backend
+    webhook_sink = get_sink()
+    if webhook_sink is not None:
+        if webhook_mode() == "always":
+            dispatcher.add_listener(webhook_sink.listener)
+        metrics.gauge("webhook_pending", lambda: webhook_sink.pending)
+        metrics.gauge("webhook_sent", lambda: webhook_sink.sent)
+        metrics.gauge("webhook_spooled", lambda: webhook_sink.spooled)
+        metrics.gauge("webhook_dropped", lambda: webhook_sink.dropped)
+
+
+# Runaway-loop protection for ask_user
+ask_limiter = ask_limiter_from_env()
+ask_dedupe = ask_dedupe_from_env()
+
+
+def _question_fingerprint(config: NotificationConfig) -> str:
+    """What makes two questions duplicates: title, question and options."""
+    return fingerprint(config.title, config.message)
+
+
+def _forget_undelivered_question(
+    config: NotificationConfig, result: DeliveryResult
+) -> None:
+    """Dispatcher listener: a question that failed or was shed may be asked again."""
+    if config.category == "ask" and not result.success:
+        ask_dedupe.discard(_question_fingerprint(config))
+
+
+dispatcher.add_listener(_forget_undelivered_question)
+
+# Burst coalescing per tool (window in seconds, 0 disables)
+coalescers = {
+    "notify_commit": Coalescer(
+        window=window_from_env("notify_commit", 5.0),
+        summarize=summarize_commits,
+        submit=dispatcher.submit,
+    ),
+    "notify_sync": Coalescer(
+        window=window_from_env("notify_sync", 5.0),
+        summarize=summarize_syncs,
+        submit=dispatcher.submit,
+    ),
+}
+
+
+def _open_circuits() -> int:
+    """Backends currently skipped by their circuit breaker."""
+    notifier = resolved_notifier()
+    if notifier is None:
+        return 0  # Backends not probed yet
+    return sum(breaker.is_open for breaker in notifier.breakers.values())
+
+
+# In-place progress notifications, rate-limited per operation
+progress_tracker = ProgressTracker(
+    interval=interval_from_env(),
+    submit=dispatcher.submit,
+    updates_in_place=lambda name: name in BACKENDS and BACKENDS[name].updates_in_place,
+    # The final update ("done") ranks with merges: never shed
+    submit_final=functools.partial(dispatcher.submit, priority=PRIORITY_MERGE),
+)
+dispatcher.add_listener(progress_tracker.listener)
+
+metrics.gauge("queue_depth", lambda: dispatcher.pending)
+metrics.gauge("open_circuits", _open_circuits)
+metrics.gauge("coalescing_pending", lambda: sum(c.pending for c in coalescers.values()))
+
+
+def _ask_suppression(arguments: dict, config: NotificationConfig) -> Optional[str]:
+    """
+    Check ask_user loop protection, recording the question if it may go out.
+
+    The record is dropped again if the question is not delivered (see
+    _forget_undelivered_question): only a question that reached the user
+    blocks identical ones.
+
+    Returns:
+        "Suppressed (...)" text when the question must not be sent.
+    """
+    agent = arguments.get("agent")
+
+    # Drop repeated questions, then cap the rate per agent, repo and urgency
+    question_id = _question_fingerprint(config)
+    age = ask_dedupe.age(question_id)
+    if age is not None:
+        return (
+            f"Suppressed (duplicate): the same question was sent {age:.0f}s ago. "
+            "Wait for the user's answer instead of asking again."
+        )
+    limiter_key = (agent, arguments.get("repo"), arguments.get("urgency", "normal"))
+    if not ask_limiter.allow(limiter_key):
+        retry = ask_limiter.retry_after(limiter_key)
+        return (
+            f"Suppressed (ratelimited): too many questions from "
+            f"{agent or 'this agent'}; retry in {retry:.0f}s."
+        )
+    ask_dedupe.add(question_id)
+    return None
+
+
+def _ask_user_ack(arguments: dict) -> str:
+    """Acknowledgement text for a question."""
     urgency = arguments.get("urgency", "normal")
-    repo = arguments.get("repo")
-    branch = arguments.get("branch")
+    emoji = URGENCY_EMOJIS.get(urgency, "❓")
     agent = arguments.get("agent")
-    task = arguments.get("task")
-
-    # Map urgency to notification type
-    urgency_to_type = {
-        "low": "info",
-        "normal": "warning",
-        "high": "error",
-    }
-    ntype = urgency_to_type.get(urgency, "warning")
-
-    # Build message with question and options
-    message = question
-    if options:
-        options_str = " | ".join(options)
-        message = f"{question}\n[{options_str}]"
-
-    # Build subtitle from repo and branch
-    subtitle_parts = []
-    if repo:
-        subtitle_parts.append(repo)
-    if branch:
-        subtitle_parts.append(branch)
-    subtitle = " @ ".join(subtitle_parts) if subtitle_parts else None
-
-    # Send the notification
-    success = send_notification(
-        title=title,
-        message=message,
-        type=ntype,
-        sound=True,
-        agent=agent,
-        task=task,
-        repo=subtitle,  # Use combined repo@branch as subtitle
-    )
+    agent_info = f" [{agent}]" if agent else ""
+    return f"{emoji} Question sent{agent_info}: {arguments.get('title', 'Question')}"
 
-    if success:
-        emoji = {"low": "ℹ️", "normal": "⚠️", "high": "🚨"}.get(urgency, "❓")
-        agent_info = f" [{agent}]" if agent else ""
-        return [
-            TextContent(type="text", text=f"{emoji} Question sent{agent_info}: {title}")
-        ]
-    else:
-        return [
-            TextContent(
-                type="text",
-                text="Failed to send notification. Platform may not be supported.",
-            )
-        ]
+
+def _commit_ack(arguments: dict) -> str:
+    """Acknowledgement text for a commit."""
+    commit_hash = arguments.get("hash", "")
+    hash_info = f" {commit_hash}" if commit_hash else ""
+    return f"Commit notified:{hash_info} on {arguments.get('branch', 'unknown')}"
+
+
+def _merge_ack(arguments: dict) -> str:
+    """Acknowledgement text for a merge."""
+    return f"Merge notified: {arguments.get('source_branch', 'unknown')} → main"
+
+
+def _sync_ack(arguments: dict) -> str:
+    """Acknowledgement text for a sync."""
+    return f"Sync notified: {len(arguments.get('worktrees', []))} worktrees updated"
+
+
+async def _handle_ask_user(arguments: dict) -> list[TextContent]:
+    """Handle ask_user tool call."""
+    config = ask_user_notification(arguments)
+    suppressed = _ask_suppression(arguments, config)
+    if suppressed:
+        return [TextContent(type="text", text=suppressed)]
+
+    success = await dispatcher.submit(config, wait=_wait(arguments))
+    return _result(success, _ask_user_ack(arguments))
 
 
 async def _handle_notify_commit(arguments: dict) -> list[TextContent]:
     """Handle notify_commit tool call."""
-    branch = arguments.get("branch", "unknown")
-    message = arguments.get("message", "")
-    files = arguments.get("files", [])
-    commit_hash = arguments.get("hash", "")
-    agent = arguments.get("agent")
-
-    # Build notification body
-    body_parts = [message]
-    if files:
-        files_str = ", ".join(files[:5])  # Limit to 5 files
-        if len(files) > 5:
-            files_str += f" (+{len(files) - 5} more)"
-        body_parts.append(f"Files: {files_str}")
-
-    body = "\n".join(body_parts)
-
-    # Send notification with low urgency (info type)
-    success = send_notification(
-        title="Commit",
-        message=body,
-        type="info",  # low urgency = info (Ping sound)
-        sound=True,
-        agent=agent,
-        repo=branch,  # Branch as subtitle
+    # Merged with other commits on the same repo and branch
+    key = (arguments.get("repo"), arguments.get("branch", "unknown"))
+    success = await coalescers["notify_commit"].add(
+        key, commit_notification(arguments), arguments, wait=_wait(arguments)
     )
-
-    if success:
-        hash_info = f" {commit_hash}" if commit_hash else ""
-        return [
-            TextContent(type="text", text=f"Commit notified:{hash_info} on {branch}")
-        ]
-    else:
-        return [
-            TextContent(
-                type="text",
-                text="Failed to send notification. Platform may not be supported.",
-            )
-        ]
+    return _result(success, _commit_ack(arguments))
 
 
 async def _handle_notify_merge(arguments: dict) -> list[TextContent]:
     """Handle notify_merge tool call."""
-    source_branch = arguments.get("source_branch", "unknown")
-    commits_count = arguments.get("commits_count")
-    files_count = arguments.get("files_count")
-    version = arguments.get("version")
-    repo = arguments.get("repo")
-    agent = arguments.get("agent")
+    success = await dispatcher.submit(
+        merge_notification(arguments), wait=_wait(arguments)
+    )
+    return _result(success, _merge_ack(arguments))
 
-    # Build notification body
-    body_parts = [f"{source_branch} → main"]
-
-    stats = []
-    if commits_count:
-        stats.append(f"{commits_count} commit{'s' if commits_count > 1 else ''}")
-    if files_count:
-        stats.append(f"{files_count} file{'s' if files_count > 1 else ''}")
-    if stats:
-        body_parts.append(", ".join(stats))
-
-    if version:
-        body_parts.append(f"Version: {version}")
-
-    body = "\n".join(body_parts)
-
-    # Send notification with normal urgency (warning type)
-    success = send_notification(
-        title="Merge sur main",
-        message=body,
-        type="warning",  # normal urgency = warning (Funk sound)
-        sound=True,
-        agent=agent,
-        repo=repo,  # Repo as subtitle
+
+async def _handle_notify_sync(arguments: dict) -> list[TextContent]:
+    """Handle notify_sync tool call."""
+    # Merged with other syncs of the same repo and source branch
+    key = (arguments.get("repo"), arguments.get("source", "main"))
+    success = await coalescers["notify_sync"].add(
+        key, sync_notification(arguments), arguments, wait=_wait(arguments)
     )
+    return _result(success, _sync_ack(arguments))
 
-    if success:
+
+async def _handle_notify_progress(arguments: dict) -> list[TextContent]:
+    """Handle notify_progress tool call."""
+    outcome = progress_tracker.update(
+        progress_notification(arguments), final=progress_done(arguments)
+    )
+    text = f"Progress {arguments['progress_id']}"
+    if progress_text(arguments):
+        text += f": {progress_text(arguments)}"
+    if progress_done(arguments):
+        text += " (done)"
+    if outcome == THROTTLED:
+        text += " (throttled: shown unless a newer update comes first)"
+    elif outcome == SKIPPED:
+        text += " (skipped: this backend cannot update in place)"
+    else:
+        text += _ack(None)
+    return [TextContent(type="text", text=text)]
+
+
+# notify_batch event types: (notification builder, acknowledgement, required fields)
+BATCH_EVENTS = {
+    "ask": (ask_user_notification, _ask_user_ack, ("title", "question")),
+    "commit": (commit_notification, _commit_ack, ("branch", "message")),
+    "merge": (merge_notification, _merge_ack, ("source_branch",)),
+    "sync": (sync_notification, _sync_ack, ("worktrees",)),
+}
+
+# Expected JSON types of event fields (arrays hold strings)
+BATCH_FIELD_TYPES = {
+    "title": str,
+    "question": str,
+    "urgency": str,
+    "agent": str,
+    "task": str,
+    "repo": str,
+    "branch": str,
+    "message": str,
+    "source_branch": str,
+    "source": str,
+    "version": str,
+    "options": list,
+    "files": list,
+    "worktrees": list,
+    "conflicts": list,
+    "commits_count": int,
+    "files_count": int,
+}
+
+BATCH_TYPE_NAMES = {str: "a string", int: "an integer", list: "an array of strings"}
+
+
+def _has_type(value, expected: type) -> bool:
+    """Whether a JSON value is of a BATCH_FIELD_TYPES type."""
+    if expected is list:
+        return isinstance(value, list) and all(isinstance(v, str) for v in value)
+    if expected is int:
+        return isinstance(value, int) and not isinstance(value, bool)
+    return isinstance(value, expected)
+
+
+def _validate_event(event) -> Optional[str]:
+    """Error message for an invalid notify_batch event, None if valid."""
+    if not isinstance(event, dict):
+        return "event must be an object"
+    kind = event.get("type")
+    if kind not in BATCH_EVENTS:
+        return f"unknown type {kind!r} (expected one of {', '.join(BATCH_EVENTS)})"
+    missing = [name for name in BATCH_EVENTS[kind][2] if name not in event]
+    if missing:
+        return f"missing {', '.join(missing)}"
+    required = BATCH_EVENTS[kind][2]
+    for name, expected in BATCH_FIELD_TYPES.items():
+        if name not in event:
+            continue
+        value = event[name]
+        # Optional strings may be null, as when the argument is left out
+        if value is None and expected is str and name not in required:
+            continue
+        if not _has_type(value, expected):
+            return f"{name} must be {BATCH_TYPE_NAMES[expected]}"
+    return None
+
+
+async def _handle_notify_batch(arguments: dict) -> list[TextContent]:
+    """Handle notify_batch tool call."""
+    events = arguments.get("events", [])
+    if not isinstance(events, list) or not events:
         return [
-            TextContent(type="text", text=f"Merge notified: {source_branch} → main")
+            TextContent(type="text", text="Error: events must be a non-empty array")
         ]
-    else:
+
+    # Validate everything before sending anything
+    errors = [
+        f"  {index}. {error}"
+        for index, error in enumerate(map(_validate_event, events), start=1)
+        if error
+    ]
+    if errors:
         return [
             TextContent(
                 type="text",
-                text="Failed to send notification. Platform may not be supported.",
+                text="Invalid batch, nothing was sent:\n" + "\n".join(errors),
             )
         ]
 
-
-async def _handle_notify_sync(arguments: dict) -> list[TextContent]:
-    """Handle notify_sync tool call."""
-    worktrees = arguments.get("worktrees", [])
-    source = arguments.get("source", "main")
-    repo = arguments.get("repo")
-    conflicts = arguments.get("conflicts", [])
-
-    # Build notification body
-    count = len(worktrees)
-    body_parts = [f"{count} worktree{'s' if count > 1 else ''} updated from {source}"]
-
-    if worktrees:
-        worktrees_str = ", ".join(worktrees[:5])  # Limit to 5
-        if len(worktrees) > 5:
-            worktrees_str += f" (+{len(worktrees) - 5} more)"
-        body_parts.append(worktrees_str)
-
-    if conflicts:
-        body_parts.append(f"⚠️ Conflicts: {', '.join(conflicts)}")
-
-    body = "\n".join(body_parts)
-
-    # Determine urgency based on conflicts
-    ntype = "warning" if conflicts else "info"  # Conflicts = normal, no conflicts = low
-
-    # Send notification
-    success = send_notification(
-        title="Worktrees synchronisés",
-        message=body,
-        type=ntype,
-        sound=True,
-        repo=repo,  # Repo as subtitle
-    )
-
-    if success:
-        return [
-            TextContent(type="text", text=f"Sync notified: {count} worktrees updated")
-        ]
-    else:
+    # Build every notification before the loop protection records anything
+    built = [BATCH_EVENTS[event["type"]][0](event) for event in events]
+
+    # Questions keep their loop protection; the rest is delivered as given
+    lines: list[Optional[str]] = []
+    configs = []
+    for event, config in zip(events, built):
+        suppressed = _ask_suppression(event, config) if event["type"] == "ask" else None
+        if suppressed:
+            lines.append(suppressed)
+        else:
+            lines.append(None)
+            configs.append(config)
+
+    # One dispatcher job: every notification goes through one backend session
+    results = await dispatcher.submit_batch(configs, wait=_wait(arguments))
+    outcomes = iter(results if results is not None else [None] * len(configs))
+
+    text_lines = []
+    for index, (event, line) in enumerate(zip(events, lines), start=1):
+        if line is None:
+            success = next(outcomes)
+            ack = BATCH_EVENTS[event["type"]][1](event)
+            line = FAILED_TEXT if success is False else f"{ack}{_ack(success)}"
+        text_lines.append(f"{index}. {event['type']}: {line}")
+
+    return [TextContent(type="text", text="\n".join(text_lines))]
+
+
+def _parse_time(value) -> Optional[float]:
+    """Unix time from an ISO 8601 string or a number of seconds."""
+    if value is None or value == "":
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return datetime.fromisoformat(str(value)).timestamp()
+
+
+async def _handle_list_notifications(arguments: dict) -> list[TextContent]:
+    """Handle list_notifications tool call."""
+    if history is None:
         return [
             TextContent(
                 type="text",
-                text="Failed to send notification. Platform may not be supported.",
+                text="Notification history is disabled (MCP_NOTIFY_HISTORY=none).",
             )
         ]
 
+    try:
+        since = _parse_time(arguments.get("since"))
+        until = _parse_time(arguments.get("until"))
+        cursor = arguments.get("cursor")
+        before_id = int(cursor) if cursor else None
+        limit = max(1, min(int(arguments.get("limit", 20)), 200))
+    except (TypeError, ValueError) as e:
+        return [TextContent(type="text", text=f"Invalid argument: {e}")]
+
+    entries, next_cursor = await asyncio.to_thread(
+        history.query,
+        since=since,
+        until=until,
+        before_id=before_id,
+        limit=limit,
+        agent=arguments.get("agent"),
+        repo=arguments.get("repo"),
+        category=arguments.get("category"),
+        type=arguments.get("type"),
+    )
+
+    if not entries:
+        return [TextContent(type="text", text="No notifications found.")]
+
+    lines = []
+    for entry in entries:
+        when = datetime.fromtimestamp(entry.created).isoformat(timespec="seconds")
+        kind = f"{entry.category}/{entry.type}" if entry.category else entry.type
+        context = ", ".join(part for part in (entry.agent, entry.repo) if part)
+        status = "" if entry.success else " [FAILED]"
+        summary = entry.message.splitlines()[0] if entry.message else ""
+        line = f"#{entry.id} {when} [{kind}] {entry.title}: {summary}"
+        if context:
+            line += f" ({context})"
+        lines.append(line + status)
+
+    if next_cursor is not None:
+        lines.append(f"\nMore results: cursor={next_cursor}")
+
+    return [TextContent(type="text", text="\n".join(lines))]
+
+
+@asynccontextmanager
+async def _running():
+    """Start delivery, then flush and drain it when the server stops."""
+    await asyncio.to_thread(_open_stores)
+    dispatcher.start()
+    metrics.start_exporter_from_env()
+    # Probe backends once at startup, off the event loop
+    probe = asyncio.create_task(asyncio.to_thread(get_notifier))
+    try:
+        yield
+    finally:
+        # Deliver what agents already queued before exiting
+        for coalescer in coalescers.values():
+            await coalescer.flush()
+        await progress_tracker.flush()
+        await dispatcher.stop(drain=True)
+        # Post (or spool) what the webhook sink still holds
+        await asyncio.to_thread(close_sink)
+        if events is not None:
+            await asyncio.to_thread(events.close)
+        await asyncio.gather(probe, return_exceptions=True)
+
+
+async def _session(read_stream, write_stream) -> None:
+    """Serve one MCP client on the given streams."""
+    await server.run(read_stream, write_stream, server.create_initialization_options())
+
 
 async def main():
     """Run the MCP server."""
-    async with stdio_server() as (read_stream, write_stream):
-        await server.run(
-            read_stream, write_stream, server.create_initialization_options()
-        )
+    async with _running():
+        async with stdio_server() as (read_stream, write_stream):
+            await _session(read_stream, write_stream)
+
+
+async def daemon_main():
+    """Serve every session on the machine from one process (see shim.py)."""
+    async with _running():
+        await serve(socket_path_from_env(), _session, idle_timeout_from_env())
 
 
 def run():
     """Entry point for the server."""
-    asyncio.run(main())
+    if "--profile-startup" in sys.argv[1:]:
+        print(profile_startup(Path(__file__).resolve().parent))
+    elif "--daemon" in sys.argv[1:]:
+        asyncio.run(daemon_main())
+    else:
+        asyncio.run(main())
 
 
 if __name__ == "__main__":
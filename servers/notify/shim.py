@@ -0,0 +1,144 @@
+"""Thin stdio entry point forwarding to the shared notify daemon.
+
+Every session used to start its own server process with the full `mcp`
+import. This shim only uses the standard library: it connects to the
+daemon's Unix socket (starting `server.py --daemon` when nobody listens)
+and copies MCP messages between stdio and the socket, byte for byte. The
+daemon runs one MCP session per connection, so dedupe, rate limits,
+coalescing and history are shared by every session on the machine.
+
+Falls back to running the server in-process when the daemon cannot be
+started (or on platforms without Unix sockets).
+"""
+
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+SERVER = Path(__file__).resolve().parent / "server.py"
+
+# How long to wait for a freshly spawned daemon to listen
+START_TIMEOUT = 10.0
+
+
+def socket_path_from_env() -> Path:
+    """
+    Daemon socket from MCP_NOTIFY_SOCKET.
+
+    Defaults to $XDG_RUNTIME_DIR/mcp-notify.sock, else a per-user directory
+    in the temporary directory.
+    """
+    value = os.environ.get("MCP_NOTIFY_SOCKET")
+    if value:
+        return Path(value).expanduser()
+    runtime = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime:
+        return Path(runtime) / "mcp-notify.sock"
+    return Path(tempfile.gettempdir()) / f"mcp-notify-{os.getuid()}" / "notify.sock"
+
+
+def connect(path: Path) -> Optional[socket.socket]:
+    """Connected socket, None if no daemon is listening."""
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(str(path))
+        return sock
+    except OSError:
+        sock.close()
+        return None
+
+
+def start_daemon(path: Path, timeout: float = START_TIMEOUT) -> Optional[socket.socket]:
+    """
+    Start the daemon unless another shim just did, and connect to it.
+
+    A lock file serializes concurrent shims so only one daemon is spawned.
+    """
+    import fcntl
+
+    path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+    with open(path.with_name(path.name + ".lock"), "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        sock = connect(path)
+        if sock is not None:
+            return sock
+
+        log = open(path.with_name("mcp-notify-daemon.log"), "ab")
+        process = subprocess.Popen(
+            [sys.executable, str(SERVER), "--daemon"],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=log,
+            # Outlive the session that started it
+            start_new_session=True,
+        )
+        log.close()
+
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline and process.poll() is None:
+            sock = connect(path)
+            if sock is not None:
+                return sock
+            time.sleep(0.05)
+    return None
+
+
+def pump(sock: socket.socket) -> int:
+    """Copy stdin to the socket and the socket to stdout until either closes."""
+
+    def forward_stdin() -> None:
+        stdin = sys.stdin.buffer
+        try:
+            while chunk := stdin.read1(65536):
+                sock.sendall(chunk)
+        except OSError:
+            pass
+        finally:
+            # Tell the daemon the session is over; it closes its side
+            try:
+                sock.shutdown(socket.SHUT_WR)
+            except OSError:
+                pass
+
+    threading.Thread(target=forward_stdin, name="shim-stdin", daemon=True).start()
+
+    stdout = sys.stdout.buffer
+    try:
+        while chunk := sock.recv(65536):
+            stdout.write(chunk)
+            stdout.flush()
+    except OSError:
+        return 1
+    finally:
+        sock.close()
+    return 0
+
+
+def main() -> int:
+    """Forward this stdio session to the daemon."""
+    if sys.platform == "win32" or not hasattr(socket, "AF_UNIX"):
+        sock = None
+    else:
+        path = socket_path_from_env()
+        try:
+            sock = connect(path) or start_daemon(path)
+        except OSError:
+            sock = None
+
+    if sock is None:
+        # No daemon: serve this session ourselves
+        os.execv(sys.executable, [sys.executable, str(SERVER)])
+    return pump(sock)
+
+
+if __name__ == "__main__":
+    code = main()
+    sys.stdout.flush()
+    # The stdin thread may still be blocked in a read: skip interpreter teardown
+    os._exit(code)
@@ -0,0 +1,241 @@
+"""Background sound playback for notifications (Linux).
+
+Sounds are played from a single background thread so delivery never waits
+for a sound to finish. Each sink keeps a cheaply replayable handle per
+notification type: the PulseAudio sink uploads each file once to the sound
+server's sample cache (decoded there) and then only asks it to replay the
+sample by name. Overlapping requests are collapsed, so a burst of
+notifications produces a single chime, unless a later one is more severe.
+"""
+
+import functools
+import os
+import queue
+import shutil
+import subprocess
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Callable, Optional
+
+from notifier import Capabilities, NotificationType
+
+
+# Freedesktop sound theme files
+LINUX_SOUND_FILES = {
+    NotificationType.INFO: "/usr/share/sounds/freedesktop/stereo/message.oga",
+    NotificationType.SUCCESS: "/usr/share/sounds/freedesktop/stereo/complete.oga",
+    NotificationType.WARNING: "/usr/share/sounds/freedesktop/stereo/dialog-warning.oga",
+    NotificationType.ERROR: "/usr/share/sounds/freedesktop/stereo/dialog-error.oga",
+}
+
+# Sounds rank by severity: a more severe sound is never collapsed into a milder one
+SEVERITY = {
+    NotificationType.INFO: 0,
+    NotificationType.SUCCESS: 1,
+    NotificationType.WARNING: 2,
+    NotificationType.ERROR: 3,
+}
+
+# Seconds a pactl call may take: a hung sound server must not stall later sounds
+PACTL_TIMEOUT = 3.0
+
+
+class SoundSink(ABC):
+    """Something that can play a notification sound without blocking."""
+
+    name: str = ""
+
+    @abstractmethod
+    def play(self, ntype: NotificationType, path: str) -> bool:
+        """Start playing the sound for `ntype`. Returns False on failure."""
+
+    def is_playing(self) -> bool:
+        """Whether the last sound started is still playing, if known."""
+        return False
+
+
+class PactlSampleSink(SoundSink):
+    """
+    PulseAudio/PipeWire sample cache.
+
+    The first play of each type uploads (and decodes) the file once with
+    `pactl upload-sample`; later plays are a `pactl play-sample` by name,
+    which returns immediately.
+    """
+
+    name = "pactl"
+
+    def __init__(self, fallback: Optional[SoundSink] = None):
+        """
+        Args:
+            fallback: Sink used when the sound server rejects pactl
+        """
+        self.fallback = fallback
+        self._uploaded: set[NotificationType] = set()
+
+    def play(self, ntype: NotificationType, path: str) -> bool:
+        sample = f"openflow-{ntype.value}"
+        try:
+            if ntype not in self._uploaded:
+                subprocess.run(
+                    ["pactl", "upload-sample", path, sample],
+                    check=True,
+                    capture_output=True,
+                    timeout=PACTL_TIMEOUT,
+                )
+                self._uploaded.add(ntype)
+            subprocess.run(
+                ["pactl", "play-sample", sample],
+                check=True,
+                capture_output=True,
+                timeout=PACTL_TIMEOUT,
+            )
+            return True
+        except (subprocess.SubprocessError, OSError):
+            # Sound server restarted (cache lost) or unreachable: re-upload next time
+            self._uploaded.discard(ntype)
+            return self.fallback.play(ntype, path) if self.fallback else False
+
+    def is_playing(self) -> bool:
+        return self.fallback.is_playing() if self.fallback else False
+
+
+class PlayerProcessSink(SoundSink):
+    """Spawns a player (paplay or aplay) without waiting for it to finish."""
+
+    def __init__(self, player: str):
+        self.name = player
+        self._process: Optional[subprocess.Popen] = None
+
+    def play(self, ntype: NotificationType, path: str) -> bool:
+        try:
+            self._process = subprocess.Popen(
+                [self.name, path],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+            return True
+        except OSError:
+            return False
+
+    def is_playing(self) -> bool:
+        return self._process is not None and self._process.poll() is None
+
+
+class FakeSink(SoundSink):
+    """Records plays instead of making noise (tests and benchmarks)."""
+
+    name = "fake"
+
+    def __init__(self):
+        self.played: list[NotificationType] = []
+
+    def play(self, ntype: NotificationType, path: str) -> bool:
+        self.played.append(ntype)
+        return True
+
+
+class SoundPlayer:
+    """Plays notification sounds on a background thread, collapsing overlaps."""
+
+    def __init__(
+        self,
+        sink: SoundSink,
+        collapse_window: float = 1.5,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Args:
+            sink: Where sounds are played
+            collapse_window: Requests within this many seconds of the last
+                sound started are dropped unless more severe than it (the
+                sink's own playing state also counts as busy)
+            clock: Monotonic time source, in seconds
+        """
+        self.sink = sink
+        self.collapse_window = collapse_window
+        self._clock = clock
+        self._last_start = float("-inf")
+        self._last_severity = SEVERITY[NotificationType.INFO]
+        # Requested sounds not yet played
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._requests: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread: Optional[threading.Thread] = None
+
+    def play(self, ntype: NotificationType) -> bool:
+        """
+        Request a sound; returns immediately.
+
+        Returns:
+            False if the request was collapsed into a sound already playing
+            (of the same or a higher severity).
+        """
+        path = LINUX_SOUND_FILES.get(ntype)
+        if not path:
+            return False
+
+        with self._lock:
+            now = self._clock()
+            severity = SEVERITY[ntype]
+            busy = (
+                self._pending
+                or now - self._last_start < self.collapse_window
+                or self.sink.is_playing()
+            )
+            if busy and severity <= self._last_severity:
+                return False
+            self._pending += 1
+            self._last_start = now
+            self._last_severity = severity
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="notify-sound", daemon=True
+                )
+                self._thread.start()
+
+        self._requests.put((ntype, path))
+        return True
+
+    def _run(self) -> None:
+        """Play requested sounds one at a time."""
+        while True:
+            ntype, path = self._requests.get()
+            try:
+                self.sink.play(ntype, path)
+            except Exception:
+                pass
+            with self._lock:
+                self._pending -= 1
+
+
+def create_sink(capabilities: Capabilities) -> Optional[SoundSink]:
+    """
+    Pick a sound sink: MCP_NOTIFY_SOUND_SINK if set (pactl, paplay, aplay,
+    fake or none), else the best player detected at startup.
+    """
+    name = os.environ.get("MCP_NOTIFY_SOUND_SINK") or capabilities.sound_player
+    if name == "pactl":
+        fallback = PlayerProcessSink("paplay") if shutil.which("paplay") else None
+        return PactlSampleSink(fallback)
+    if name in ("paplay", "aplay"):
+        return PlayerProcessSink(name)
+    if name == "fake":
+        return FakeSink()
+    return None
+
+
+@functools.cache
+def get_sound_player(capabilities: Capabilities) -> Optional[SoundPlayer]:
+    """Shared SoundPlayer for the detected capabilities (None: no sound)."""
+    sink = create_sink(capabilities)
+    return SoundPlayer(sink) if sink else None
+
+
+def detect_sound_player() -> Optional[str]:
+    """Best available sound player: pactl (sample cache), paplay or aplay."""
+    return next(
+        (p for p in ("pactl", "paplay", "aplay") if shutil.which(p)),
+        None,
+    )
@@ -0,0 +1,59 @@
+"""D-Bus client: every call, reconnect included, finishes within its timeout."""
+
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import backends
+from backends import BusUnavailableError, DBusNotifications
+
+
+class SlowConnection:
+    """A bus connection whose replies never come in time."""
+
+    def __init__(self, calls: list[float]):
+        self.calls = calls
+
+    def send_and_get_reply(self, message, timeout):
+        self.calls.append(timeout)
+        time.sleep(timeout)
+        raise TimeoutError("no reply")
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def reply_timeouts(monkeypatch):
+    """Timeouts passed to the fake bus, one per attempt."""
+    calls: list[float] = []
+    jeepney = SimpleNamespace(
+        DBusAddress=lambda *args, **kwargs: None,
+        DBusErrorResponse=type("DBusErrorResponse", (Exception,), {}),
+        new_method_call=lambda *args: None,
+        open_dbus_connection=lambda bus: SlowConnection(calls),
+        unwrap_msg=lambda reply: reply,
+    )
+    monkeypatch.setattr(backends, "_jeepney", lambda: jeepney)
+    return calls
+
+
+def test_retry_counts_against_the_same_deadline(reply_timeouts):
+    client = DBusNotifications(reply_timeout=10.0)
+
+    started = time.monotonic()
+    with pytest.raises(BusUnavailableError):
+        client.notify("Title", "Body", timeout=0.2)
+
+    assert time.monotonic() - started < 0.5
+    assert reply_timeouts[0] <= 0.2
+    # The reconnect only gets what the first attempt left
+    assert sum(reply_timeouts) <= 0.2 + 0.01
+
+
+def test_default_timeout_is_reply_timeout(reply_timeouts):
+    client = DBusNotifications(reply_timeout=0.1)
+
+    assert client.service_reachable() is False
+    assert 0 < reply_timeouts[0] <= 0.1
@@ -0,0 +1,95 @@
+"""Load shedding results and the never-shed final progress update."""
+
+import asyncio
+import threading
+
+from dispatcher import PRIORITY_MERGE, SHED, Dispatcher
+from notifier import DeliveryResult, NotificationConfig
+from progress import ProgressTracker
+
+
+def notification(category: str, title: str = "t") -> NotificationConfig:
+    return NotificationConfig(title=title, message="m", category=category)
+
+
+def blocked_dispatcher() -> tuple[Dispatcher, threading.Event]:
+    """One worker stuck in send until the event is set; shed from one job."""
+    release = threading.Event()
+
+    def send(config: NotificationConfig) -> DeliveryResult:
+        release.wait(5)
+        return DeliveryResult(success=True, backend="test")
+
+    return Dispatcher(send, workers=1, max_pending=8, shed_at=1), release
+
+
+def test_shed_on_arrival_is_reported_without_waiting():
+    async def scenario():
+        dispatcher, release = blocked_dispatcher()
+        busy = await dispatcher.submit(notification("merge"))
+        await asyncio.sleep(0.05)  # Taken by the worker
+        queued = await dispatcher.submit(notification("merge"))
+        shed = await dispatcher.submit(notification("commit"))
+        batch = await dispatcher.submit_batch(
+            [notification("sync"), notification("sync")]
+        )
+        release.set()
+        await dispatcher.stop()
+        return busy, queued, shed, batch, dispatcher.shed
+
+    busy, queued, shed, batch, count = asyncio.run(scenario())
+
+    assert (busy, queued) == (None, None)
+    assert shed == SHED
+    assert batch == [SHED, SHED]
+    assert count == 3
+
+
+def test_priority_override_is_never_shed():
+    async def scenario():
+        dispatcher, release = blocked_dispatcher()
+        await dispatcher.submit(notification("merge"))
+        await asyncio.sleep(0.05)
+        await dispatcher.submit(notification("merge"))
+        kept = dispatcher.submit(
+            notification("progress"), wait=True, priority=PRIORITY_MERGE
+        )
+        task = asyncio.create_task(kept)
+        await asyncio.sleep(0.05)
+        release.set()
+        result = await task
+        await dispatcher.stop()
+        return result
+
+    assert asyncio.run(scenario()) is True
+
+
+def test_final_progress_update_uses_the_final_submitter():
+    sent: list[tuple[str, str]] = []
+
+    def submitter(kind: str):
+        async def submit(config: NotificationConfig, wait: bool = False):
+            sent.append((kind, config.title))
+            return True
+
+        return submit
+
+    async def scenario():
+        tracker = ProgressTracker(
+            interval=0,
+            submit=submitter("update"),
+            updates_in_place=lambda name: True,
+            submit_final=submitter("final"),
+        )
+        step = notification("progress", "step")
+        step.tag = "op"
+        tracker.update(step)
+        await tracker.flush()
+        done = notification("progress", "done")
+        done.tag = "op"
+        tracker.update(done, final=True)
+        await tracker.flush()
+
+    asyncio.run(scenario())
+
+    assert sent == [("update", "step"), ("final", "done")]
@@ -0,0 +1,191 @@
+"""Tool handlers: notify_batch validation and ask_user loop protection."""
+
+import asyncio
+import os
+
+import pytest
+
+# No history database, event log or desktop backend for these tests
+os.environ.setdefault("MCP_NOTIFY_HISTORY", "none")
+os.environ.setdefault("MCP_NOTIFY_EVENT_LOG", "none")
+os.environ.setdefault("MCP_NOTIFY_BACKEND", "null")
+
+import server  # noqa: E402
+from dispatcher import Dispatcher  # noqa: E402
+from notifier import DeliveryResult  # noqa: E402
+from ratelimit import DedupeCache, RateLimiter  # noqa: E402
+
+
+class FakeDispatcher:
+    """Records notifications and answers with preset results."""
+
+    def __init__(self):
+        self.sent = []
+        self.result = True
+
+    async def submit(self, config, wait=False, priority=None):
+        self.sent.append(config)
+        return self.result
+
+    async def submit_batch(self, configs, wait=False, priority=None):
+        self.sent.extend(configs)
+        return [self.result] * len(configs)
+
+
+@pytest.fixture(autouse=True)
+def loop_protection(monkeypatch):
+    monkeypatch.setattr(server, "ask_dedupe", DedupeCache(ttl=600))
+    monkeypatch.setattr(server, "ask_limiter", RateLimiter(per_minute=600, burst=100))
+
+
+@pytest.fixture
+def dispatcher(monkeypatch):
+    fake = FakeDispatcher()
+    monkeypatch.setattr(server, "dispatcher", fake)
+    return fake
+
+
+@pytest.fixture
+def delivering(monkeypatch):
+    """
+    Install a real dispatcher whose deliveries succeed or fail as told (the
+    returned list), with the server's listener forgetting failed questions.
+    """
+    outcomes: list[bool] = []
+
+    def install() -> Dispatcher:
+        def send(config):
+            return DeliveryResult(success=outcomes.pop(0) if outcomes else True)
+
+        real = Dispatcher(send, workers=1)
+        real.add_listener(server._forget_undelivered_question)
+        monkeypatch.setattr(server, "dispatcher", real)
+        return real
+
+    return outcomes, install
+
+
+def call(handler, arguments: dict) -> str:
+    return asyncio.run(handler({"wait": True, **arguments}))[0].text
+
+
+QUESTION = {"title": "Deploy?", "question": "Deploy to production?"}
+
+
+@pytest.mark.parametrize(
+    "event, error",
+    [
+        (
+            {"type": "commit", "branch": "main", "message": "m", "files": [1, 2]},
+            "files",
+        ),
+        (
+            {"type": "ask", "title": "T", "question": "Q", "options": [1, None]},
+            "options",
+        ),
+        ({"type": "sync", "worktrees": [{"a": 1}]}, "worktrees"),
+        ({"type": "commit", "branch": 3, "message": "m"}, "branch"),
+        (
+            {"type": "merge", "source_branch": "f", "commits_count": True},
+            "commits_count",
+        ),
+    ],
+)
+def test_batch_with_wrongly_typed_items_sends_nothing(dispatcher, event, error):
+    text = call(
+        server._handle_notify_batch, {"events": [{"type": "ask", **QUESTION}, event]}
+    )
+
+    assert text.startswith("Invalid batch, nothing was sent")
+    assert f"2. {error} must be" in text
+    assert dispatcher.sent == []
+    # The valid question was not recorded: sending it again is not a duplicate
+    assert "Question sent" in call(server._handle_ask_user, QUESTION)
+
+
+def test_batch_accepts_null_optional_strings(dispatcher):
+    event = {"type": "commit", "branch": "main", "message": "m", "repo": None}
+
+    text = call(server._handle_notify_batch, {"events": [event]})
+
+    assert text == "1. commit: Commit notified: on main"
+    assert len(dispatcher.sent) == 1
+
+
+def ask(arguments: dict) -> str:
+    """One ask_user call, in the running loop."""
+    return server._handle_ask_user(arguments)
+
+
+def test_delivered_question_blocks_duplicates(delivering):
+    outcomes, install = delivering
+
+    async def scenario():
+        dispatcher = install()
+        first = (await ask({"wait": True, **QUESTION}))[0].text
+        again = (await ask({"wait": True, **QUESTION}))[0].text
+        await dispatcher.stop()
+        return first, again
+
+    first, again = asyncio.run(scenario())
+
+    assert first.startswith("⚠️ Question sent")
+    assert again.startswith("Suppressed (duplicate)")
+
+
+def test_failed_question_can_be_asked_again(delivering):
+    outcomes, install = delivering
+    outcomes.append(False)
+
+    async def scenario():
+        dispatcher = install()
+        failed = (await ask({"wait": True, **QUESTION}))[0].text
+        retried = (await ask({"wait": True, **QUESTION}))[0].text
+        await dispatcher.stop()
+        return failed, retried
+
+    failed, retried = asyncio.run(scenario())
+
+    assert failed == server.FAILED_TEXT
+    assert retried.startswith("⚠️ Question sent")
+
+
+def test_queued_question_forgotten_when_delivery_fails(delivering):
+    outcomes, install = delivering
+    outcomes.append(False)
+
+    async def scenario():
+        dispatcher = install()
+        queued = (await ask({"wait": False, **QUESTION}))[0].text
+        # Asked again before the delivery failed: still a duplicate
+        early = (await ask({"wait": False, **QUESTION}))[0].text
+        await dispatcher.stop()  # Drains the queue: the delivery fails
+        install()
+        later = (await ask({"wait": True, **QUESTION}))[0].text
+        await server.dispatcher.stop()
+        return queued, early, later
+
+    queued, early, later = asyncio.run(scenario())
+
+    assert queued.endswith("(queued)")
+    assert early.startswith("Suppressed (duplicate)")
+    assert later.startswith("⚠️ Question sent")
+
+
+def test_failed_question_in_batch_can_be_asked_again(delivering):
+    outcomes, install = delivering
+    outcomes.extend([True, False])
+    commit = {"type": "commit", "branch": "main", "message": "m"}
+
+    async def scenario():
+        dispatcher = install()
+        events = [commit, {"type": "ask", **QUESTION}]
+        batch = await server._handle_notify_batch({"events": events, "wait": True})
+        retried = (await ask({"wait": True, **QUESTION}))[0].text
+        await dispatcher.stop()
+        return batch[0].text, retried
+
+    batch, retried = asyncio.run(scenario())
+
+    assert batch.splitlines()[1] == f"2. ask: {server.FAILED_TEXT}"
+    assert retried.startswith("⚠️ Question sent")
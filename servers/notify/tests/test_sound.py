@@ -0,0 +1,151 @@
+"""Sound playback: collapsing overlapping sounds and the pactl sample cache."""
+
+import subprocess
+import time
+
+import pytest
+
+from notifier import NotificationType
+from sound import FakeSink, PactlSampleSink, SoundPlayer
+
+
+def wait_for(condition, timeout: float = 2.0) -> None:
+    """Wait for the background player thread to catch up."""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("timed out waiting for the sound thread")
+        time.sleep(0.005)
+
+
+class Clock:
+    """Manually advanced monotonic clock."""
+
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_burst_plays_one_sound():
+    sink, clock = FakeSink(), Clock()
+    player = SoundPlayer(sink, collapse_window=1.5, clock=clock)
+
+    results = [player.play(NotificationType.INFO) for _ in range(5)]
+    wait_for(lambda: sink.played)
+
+    assert results == [True, False, False, False, False]
+    assert sink.played == [NotificationType.INFO]
+
+
+def test_sound_after_collapse_window_plays_again():
+    sink, clock = FakeSink(), Clock()
+    player = SoundPlayer(sink, collapse_window=1.5, clock=clock)
+
+    assert player.play(NotificationType.WARNING)
+    wait_for(lambda: len(sink.played) == 1)
+    clock.now += 1.0
+    assert not player.play(NotificationType.INFO)
+    clock.now += 1.0
+    wait_for(lambda: not player._pending)
+    assert player.play(NotificationType.INFO)
+    wait_for(lambda: len(sink.played) == 2)
+
+    assert sink.played == [NotificationType.WARNING, NotificationType.INFO]
+
+
+def test_more_severe_sound_is_not_collapsed():
+    sink, clock = FakeSink(), Clock()
+    player = SoundPlayer(sink, collapse_window=1.5, clock=clock)
+
+    assert player.play(NotificationType.INFO)
+    assert player.play(NotificationType.ERROR)
+    # Collapsed into the error: same or milder
+    assert not player.play(NotificationType.ERROR)
+    assert not player.play(NotificationType.WARNING)
+    wait_for(lambda: not player._pending)
+
+    assert sink.played == [NotificationType.INFO, NotificationType.ERROR]
+
+
+def test_busy_sink_still_plays_a_more_severe_sound():
+    class BusySink(FakeSink):
+        def is_playing(self) -> bool:
+            return True
+
+    sink = BusySink()
+    player = SoundPlayer(sink, clock=Clock())
+
+    assert not player.play(NotificationType.INFO)
+    assert player.play(NotificationType.ERROR)
+    wait_for(lambda: not player._pending)
+    assert sink.played == [NotificationType.ERROR]
+
+
+def test_busy_sink_collapses_requests():
+    class BusySink(FakeSink):
+        def is_playing(self) -> bool:
+            return True
+
+    player = SoundPlayer(BusySink(), clock=Clock())
+
+    assert not player.play(NotificationType.INFO)
+
+
+@pytest.fixture
+def pactl(monkeypatch):
+    """Record pactl commands instead of running them."""
+    calls: list[list[str]] = []
+    failing: set[str] = set()
+
+    def run(command, **kwargs):
+        calls.append(command)
+        if command[1] in failing:
+            raise subprocess.CalledProcessError(1, command)
+        return subprocess.CompletedProcess(command, 0)
+
+    monkeypatch.setattr(subprocess, "run", run)
+    return calls, failing
+
+
+def test_pactl_uploads_each_sample_once(pactl):
+    calls, _ = pactl
+    sink = PactlSampleSink()
+
+    for _ in range(3):
+        assert sink.play(NotificationType.INFO, "/sounds/message.oga")
+    assert sink.play(NotificationType.ERROR, "/sounds/error.oga")
+
+    assert calls == [
+        ["pactl", "upload-sample", "/sounds/message.oga", "openflow-info"],
+        ["pactl", "play-sample", "openflow-info"],
+        ["pactl", "play-sample", "openflow-info"],
+        ["pactl", "play-sample", "openflow-info"],
+        ["pactl", "upload-sample", "/sounds/error.oga", "openflow-error"],
+        ["pactl", "play-sample", "openflow-error"],
+    ]
+
+
+def test_pactl_failure_falls_back_and_uploads_again(pactl):
+    calls, failing = pactl
+    fallback = FakeSink()
+    sink = PactlSampleSink(fallback)
+    sink.play(NotificationType.INFO, "/sounds/message.oga")
+
+    # Sound server restarted: the cached sample is gone
+    failing.add("play-sample")
+    assert sink.play(NotificationType.INFO, "/sounds/message.oga")
+    assert fallback.played == [NotificationType.INFO]
+
+    failing.clear()
+    calls.clear()
+    sink.play(NotificationType.INFO, "/sounds/message.oga")
+    assert calls[0][:2] == ["pactl", "upload-sample"]
+
+
+def test_pactl_failure_without_fallback(pactl):
+    _, failing = pactl
+    failing.add("upload-sample")
+
+    assert not PactlSampleSink().play(NotificationType.INFO, "/sounds/message.oga")
@@ -0,0 +1,181 @@
+"""Webhook sink against a local HTTP stand-in."""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import webhook
+from dispatcher import SHED
+from notifier import DeliveryResult, NotificationConfig, NotificationType
+from webhook import Webhook, WebhookSink
+
+
+class StandIn(ThreadingHTTPServer):
+    """Records posted requests and answers with scripted status codes."""
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), Handler)
+        self.requests: list[dict] = []
+        # Status of the next requests, then `status`
+        self.script: list[int] = []
+        self.status = 200
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/hook"
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        server = self.server
+        server.requests.append(
+            {
+                "time": time.monotonic(),
+                "port": self.client_address[1],
+                "body": json.loads(body),
+            }
+        )
+        status = server.script.pop(0) if server.script else server.status
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def endpoint():
+    server = StandIn()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(autouse=True)
+def no_jitter(monkeypatch):
+    """Retry after the full backoff delay."""
+    monkeypatch.setattr(webhook.random, "uniform", lambda low, high: high)
+
+
+def notification(title: str) -> NotificationConfig:
+    return NotificationConfig(title=title, message="body", type=NotificationType.INFO)
+
+
+def wait_for(condition, timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("timed out waiting for the webhook sink")
+        time.sleep(0.01)
+
+
+def titles(request: dict) -> list[str]:
+    return [item["title"] for item in request["body"]["notifications"]]
+
+
+def test_notifications_are_batched(endpoint):
+    sink = WebhookSink([Webhook("test", endpoint.url)], batch_window=0.2)
+    for title in ("one", "two", "three"):
+        assert sink.submit(notification(title)) == 1
+
+    wait_for(lambda: sink.sent == 3)
+    sink.close()
+
+    assert [titles(request) for request in endpoint.requests] == [
+        ["one", "two", "three"]
+    ]
+
+
+def test_listener_skips_shed_notifications(endpoint):
+    sink = WebhookSink([Webhook("test", endpoint.url)], batch_window=0)
+
+    sink.listener(notification("shed"), DeliveryResult(success=False, backend=SHED))
+    sink.listener(notification("failed"), DeliveryResult(success=False))
+    sink.listener(notification("sent"), DeliveryResult(success=True, backend="null"))
+    wait_for(lambda: sink.sent == 2)
+    sink.close()
+
+    assert sorted(sum(map(titles, endpoint.requests), [])) == ["failed", "sent"]
+
+
+def test_batches_reuse_one_connection(endpoint):
+    sink = WebhookSink([Webhook("test", endpoint.url)], batch_window=0, max_batch=1)
+    for title in ("one", "two", "three"):
+        sink.submit(notification(title))
+
+    wait_for(lambda: sink.sent == 3)
+    sink.close()
+
+    assert len(endpoint.requests) == 3
+    assert len({request["port"] for request in endpoint.requests}) == 1
+
+
+def test_server_errors_back_off_exponentially(endpoint):
+    endpoint.script = [503, 503]
+    sink = WebhookSink([Webhook("test", endpoint.url)], batch_window=0, backoff=0.1)
+    sink.submit(notification("retried"))
+
+    wait_for(lambda: sink.sent == 1)
+    sink.close()
+
+    first, second, third = (request["time"] for request in endpoint.requests)
+    assert second - first == pytest.approx(0.1, abs=0.05)
+    assert third - second == pytest.approx(0.2, abs=0.05)
+    assert titles(endpoint.requests[-1]) == ["retried"]
+
+
+def test_spool_is_replayed_after_a_restart(endpoint, tmp_path):
+    hook = Webhook("test", endpoint.url)
+    endpoint.status = 503
+    sink = WebhookSink([hook], tmp_path, batch_window=0, max_attempts=2, backoff=0.01)
+    sink.submit(notification("spooled"))
+
+    wait_for(lambda: sink.spooled == 1)
+    sink.close()
+    spool = tmp_path / "test.jsonl"
+    assert [json.loads(line)["title"] for line in spool.read_text().splitlines()] == [
+        "spooled"
+    ]
+
+    endpoint.status = 200
+    endpoint.requests.clear()
+    restarted = WebhookSink([hook], tmp_path, batch_window=0)
+
+    wait_for(lambda: restarted.sent == 1)
+    restarted.close()
+    assert [titles(request) for request in endpoint.requests] == [["spooled"]]
+    assert not spool.exists()
+
+
+def test_client_errors_are_dropped(endpoint, tmp_path):
+    endpoint.status = 400
+    sink = WebhookSink([Webhook("test", endpoint.url)], tmp_path, batch_window=0)
+    sink.submit(notification("rejected"))
+
+    wait_for(lambda: sink.dropped == 1)
+    time.sleep(0.1)
+    sink.close()
+
+    assert len(endpoint.requests) == 1
+    assert sink.sent == 0
+    assert not list(tmp_path.iterdir())
+
+
+def test_filters_route_notifications(endpoint):
+    hook = Webhook("test", endpoint.url, repos=["open-flow"])
+    sink = WebhookSink([hook])
+
+    other = NotificationConfig(title="t", message="m", repo="elsewhere")
+    assert sink.submit(other) == 0
+    assert sink.pending == 0
@@ -0,0 +1,566 @@
+"""HTTP webhook sink for notifications (ntfy, Slack-compatible or JSON).
+
+Lets agents on headless machines reach people: notifications matching a
+webhook's repo, agent and category filters are queued and posted from a
+dedicated thread, so neither tool calls nor delivery workers wait on the
+network. Requests go through keep-alive connections (one per host), are
+batched per webhook, retried with exponential backoff, and spooled to
+disk when the endpoint stays down; the spool is replayed once it answers
+again (or on the next start).
+
+Configuration is a JSON file (MCP_NOTIFY_WEBHOOKS):
+
+    {
+      "mode": "fallback",
+      "webhooks": [
+        {"name": "phone", "url": "https://ntfy.sh/my-topic", "format": "ntfy"},
+        {"name": "team", "url": "https://hooks.slack.com/services/...",
+         "format": "slack", "repos": ["open-flow"], "agents": ["executor"]}
+      ]
+    }
+
+or a single endpoint from MCP_NOTIFY_WEBHOOK_URL / MCP_NOTIFY_WEBHOOK_FORMAT.
+"""
+
+import http.client
+import json
+import os
+import queue
+import random
+import re
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Optional
+from urllib.parse import urlsplit
+
+from dispatcher import SHED
+from notifier import EMOJIS, DeliveryResult, NotificationConfig, NotificationType
+
+FORMATS = ("json", "slack", "ntfy")
+
+# Fallback: used by the "webhook" backend when no desktop backend delivered.
+# Always: every notification is also sent to the matching webhooks.
+MODES = ("fallback", "always")
+
+NTFY_PRIORITIES = {
+    NotificationType.INFO: 3,
+    NotificationType.SUCCESS: 3,
+    NotificationType.WARNING: 4,
+    NotificationType.ERROR: 5,
+}
+
+NTFY_TAGS = {
+    NotificationType.INFO: "information_source",
+    NotificationType.SUCCESS: "white_check_mark",
+    NotificationType.WARNING: "warning",
+    NotificationType.ERROR: "rotating_light",
+}
+
+
+class PermanentError(Exception):
+    """The endpoint rejected the request (4xx): retrying will not help."""
+
+
+class TransientError(Exception):
+    """The endpoint failed (5xx, 429): retry later."""
+
+
+@dataclass
+class Webhook:
+    """One endpoint and the notifications routed to it."""
+
+    name: str
+    url: str
+    format: str = "json"
+    headers: dict[str, str] = field(default_factory=dict)
+    # Empty filters match everything
+    repos: list[str] = field(default_factory=list)
+    agents: list[str] = field(default_factory=list)
+    categories: list[str] = field(default_factory=list)
+
+    def matches(self, config: NotificationConfig) -> bool:
+        """Whether a notification is routed to this webhook."""
+        return (
+            (not self.repos or config.repo in self.repos)
+            and (not self.agents or config.agent in self.agents)
+            and (not self.categories or config.category in self.categories)
+        )
+
+
+def notification_payload(config: NotificationConfig) -> dict:
+    """JSON-serializable notification, as queued, spooled and posted."""
+    return {
+        "title": config.title,
+        "message": config.message,
+        "type": config.type.value,
+        "category": config.category,
+        "agent": config.agent,
+        "repo": config.repo,
+        "subtitle": config.display_repo,
+        "task": config.task,
+        "time": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+
+
+def _text(item: dict) -> str:
+    """One notification as plain text, with its context."""
+    emoji = EMOJIS.get(NotificationType(item["type"]), "")
+    context = " | ".join(
+        part
+        for part in (item.get("subtitle"), item.get("agent"), item.get("task"))
+        if part
+    )
+    header = f"{emoji} {item['title']}" + (f" [{context}]" if context else "")
+    return f"{header}\n{item['message']}"
+
+
+def encode(webhook: Webhook, items: list[dict]) -> tuple[bytes, dict[str, str]]:
+    """Request body and headers posting a batch of notifications."""
+    if webhook.format == "slack":
+        # Incoming webhooks take one message: the batch becomes its lines
+        body = {"text": "\n\n".join(_text(item) for item in items)}
+        return json.dumps(body).encode(), {"Content-Type": "application/json"}
+
+    if webhook.format == "ntfy":
+        types = [NotificationType(item["type"]) for item in items]
+        if len(items) == 1:
+            title = items[0]["title"]
+            message = _text(items[0]).split("\n", 1)[1]
+        else:
+            title = f"{len(items)} notifications"
+            message = "\n\n".join(_text(item) for item in items)
+        # http.client sends headers as latin-1: pass the UTF-8 bytes through
+        headers = {
+            "Title": title.encode("utf-8").decode("latin-1"),
+            "Priority": str(max(NTFY_PRIORITIES[t] for t in types)),
+            "Tags": ",".join(dict.fromkeys(NTFY_TAGS[t] for t in types)),
+        }
+        return message.encode(), headers
+
+    body = {"notifications": items}
+    return json.dumps(body).encode(), {"Content-Type": "application/json"}
+
+
+class HTTPPool:
+    """Keep-alive HTTP(S) connections, one per host (used by one thread)."""
+
+    def __init__(self, timeout: float = 10.0):
+        self.timeout = timeout
+        self._connections: dict[tuple[str, str], http.client.HTTPConnection] = {}
+
+    def post(self, url: str, body: bytes, headers: dict[str, str]) -> int:
+        """
+        POST and return the status code, reusing the host's connection.
+
+        Raises:
+            OSError, http.client.HTTPException: If the endpoint is unreachable.
+        """
+        parts = urlsplit(url)
+        key = (parts.scheme, parts.netloc)
+        path = parts.path or "/"
+        if parts.query:
+            path += f"?{parts.query}"
+
+        for attempt in range(2):
+            reused = key in self._connections
+            conn = self._connections.get(key) or self._open(parts.scheme, parts.netloc)
+            self._connections[key] = conn
+            try:
+                conn.request("POST", path, body=body, headers=headers)
+                response = conn.getresponse()
+                response.read()
+                if response.will_close:
+                    self._drop(key)
+                return response.status
+            except (OSError, http.client.HTTPException):
+                self._drop(key)
+                # A kept-alive connection the server closed meanwhile: retry once
+                if not reused or attempt:
+                    raise
+        raise http.client.HTTPException("unreachable")
+
+    def close(self) -> None:
+        """Close every connection."""
+        for key in list(self._connections):
+            self._drop(key)
+
+    def _open(self, scheme: str, netloc: str) -> http.client.HTTPConnection:
+        if scheme == "https":
+            return http.client.HTTPSConnection(netloc, timeout=self.timeout)
+        return http.client.HTTPConnection(netloc, timeout=self.timeout)
+
+    def _drop(self, key: tuple[str, str]) -> None:
+        conn = self._connections.pop(key, None)
+        if conn is not None:
+            conn.close()
+
+
+@dataclass
+class _Endpoint:
+    """Send state of one webhook (sink thread only)."""
+
+    webhook: Webhook
+    spool: Optional[Path]
+    pending: list[dict] = field(default_factory=list)
+    # Monotonic time the first pending item arrived
+    since: float = 0.0
+    failures: int = 0
+    retry_at: float = 0.0
+    # Notifications waiting in the spool file
+    spooled: int = 0
+
+
+class WebhookSink:
+    """Posts notifications to webhooks from a background thread."""
+
+    def __init__(
+        self,
+        webhooks: list[Webhook],
+        spool_dir: Optional[Path] = None,
+        batch_window: float = 0.5,
+        max_batch: int = 20,
+        max_attempts: int = 5,
+        backoff: float = 1.0,
+        max_backoff: float = 60.0,
+        max_spool: int = 10000,
+        pool: Optional[HTTPPool] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Args:
+            webhooks: Endpoints and their filters
+            spool_dir: Where undeliverable notifications are kept (None: dropped)
+            batch_window: Seconds to wait for more notifications before posting
+            max_batch: Most notifications per request
+            max_attempts: Failed attempts before a batch is spooled
+            backoff: Delay after the first failure, doubled on each failure
+            max_backoff: Longest delay between attempts
+            max_spool: Most notifications kept on disk per webhook
+            pool: HTTP connection pool (defaults to a new one)
+            clock: Monotonic time source, in seconds
+        """
+        self.webhooks = webhooks
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.max_spool = max_spool
+        self._pool = pool or HTTPPool()
+        self._clock = clock
+        self._endpoints = [
+            _Endpoint(webhook, _spool_path(spool_dir, webhook) if spool_dir else None)
+            for webhook in webhooks
+        ]
+        self._requests: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.sent = 0
+        self.dropped = 0
+        # Left over from a previous run: replay it without waiting for a submit
+        if any(e.spool is not None and e.spool.exists() for e in self._endpoints):
+            self._start()
+
+    @property
+    def pending(self) -> int:
+        """Notifications queued or waiting in memory."""
+        return self._requests.qsize() + sum(len(e.pending) for e in self._endpoints)
+
+    @property
+    def spooled(self) -> int:
+        """Notifications waiting on disk for their endpoint to come back."""
+        return sum(endpoint.spooled for endpoint in self._endpoints)
+
+    def submit(self, config: NotificationConfig) -> int:
+        """
+        Queue a notification for every matching webhook; returns immediately.
+
+        Returns:
+            Number of webhooks the notification was routed to.
+        """
+        targets = [
+            i for i, e in enumerate(self._endpoints) if e.webhook.matches(config)
+        ]
+        if targets:
+            self._start()
+            self._requests.put((targets, notification_payload(config)))
+        return len(targets)
+
+    def listener(self, config: NotificationConfig, result: DeliveryResult) -> None:
+        """Dispatcher listener copying every notification to the webhooks."""
+        # Shed under load: posting it anyway would defeat the shedding
+        if result.backend != SHED:
+            self.submit(config)
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Send what can be sent within `timeout`, spool the rest and stop."""
+        with self._lock:
+            thread = self._thread
+        if thread is None:
+            return
+        self._requests.put(None)
+        thread.join(timeout)
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="notify-webhook", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self) -> None:
+        """Batch, post, back off and spool (sink thread)."""
+        # Left over from a previous run: try again now
+        for endpoint in self._endpoints:
+            self._unspool(endpoint)
+
+        while True:
+            try:
+                request = self._requests.get(timeout=self._next_wakeup())
+            except queue.Empty:
+                request = ()
+            if request is None:
+                self._shutdown()
+                return
+            if request:
+                targets, item = request
+                for index in targets:
+                    endpoint = self._endpoints[index]
+                    if not endpoint.pending:
+                        endpoint.since = self._clock()
+                    endpoint.pending.append(item)
+
+            now = self._clock()
+            for endpoint in self._endpoints:
+                if self._due(endpoint, now):
+                    self._send(endpoint)
+
+    def _due(self, endpoint: _Endpoint, now: float) -> bool:
+        """Whether the endpoint's next batch should be posted now."""
+        if now < endpoint.retry_at:
+            return False
+        if endpoint.spooled:
+            return True
+        if not endpoint.pending:
+            return False
+        full = len(endpoint.pending) >= self.max_batch
+        return full or now - endpoint.since >= self.batch_window
+
+    def _next_wakeup(self) -> Optional[float]:
+        """Seconds until an endpoint becomes due, None if nothing is pending."""
+        deadlines = [
+            (
+                endpoint.retry_at
+                if endpoint.spooled
+                else max(endpoint.retry_at, endpoint.since + self.batch_window)
+            )
+            for endpoint in self._endpoints
+            if endpoint.pending or endpoint.spooled
+        ]
+        if not deadlines:
+            return None
+        return max(0.0, min(deadlines) - self._clock())
+
+    def _send(self, endpoint: _Endpoint) -> None:
+        """Post one batch, updating backoff and spool state."""
+        # Older notifications first: retry the spool before newer ones
+        self._unspool(endpoint)
+        if not endpoint.pending:
+            return
+        batch = endpoint.pending[: self.max_batch]
+        webhook = endpoint.webhook
+        try:
+            body, headers = encode(webhook, batch)
+            status = self._pool.post(webhook.url, body, {**headers, **webhook.headers})
+            if status == 429 or status >= 500:
+                raise TransientError(f"HTTP {status}")
+            if status >= 400:
+                raise PermanentError(f"HTTP {status}")
+        except PermanentError as e:
+            # Malformed request or bad credentials: drop instead of retrying
+            print(f"Webhook {webhook.name}: rejected ({e})", file=sys.stderr)
+            del endpoint.pending[: len(batch)]
+            self.dropped += len(batch)
+            return
+        except (TransientError, OSError, http.client.HTTPException) as e:
+            endpoint.failures += 1
+            delay = min(self.max_backoff, self.backoff * 2 ** (endpoint.failures - 1))
+            # Jitter so several sessions do not retry in lockstep
+            endpoint.retry_at = self._clock() + delay * random.uniform(0.5, 1.0)
+            if endpoint.failures == self.max_attempts:
+                print(f"Webhook {webhook.name}: down ({e}), spooling", file=sys.stderr)
+            if endpoint.failures >= self.max_attempts:
+                self._spool(endpoint)
+            return
+
+        del endpoint.pending[: len(batch)]
+        self.sent += len(batch)
+        endpoint.failures = 0
+        endpoint.retry_at = 0.0
+        endpoint.since = self._clock()
+
+    def _spool(self, endpoint: _Endpoint) -> None:
+        """Move pending notifications to disk (dropped without a spool)."""
+        items, endpoint.pending = endpoint.pending, []
+        if endpoint.spool is None:
+            self.dropped += len(items)
+            return
+        try:
+            existing = _read_spool(endpoint.spool)
+            kept = (existing + items)[-self.max_spool :]
+            self.dropped += len(existing) + len(items) - len(kept)
+            endpoint.spool.parent.mkdir(parents=True, exist_ok=True)
+            tmp = endpoint.spool.with_suffix(".tmp")
+            tmp.write_text(
+                "".join(json.dumps(item) + "\n" for item in kept), encoding="utf-8"
+            )
+            os.replace(tmp, endpoint.spool)
+            endpoint.spooled = len(kept)
+        except OSError as e:
+            print(
+                f"Webhook {endpoint.webhook.name}: spool failed ({e})", file=sys.stderr
+            )
+            self.dropped += len(items)
+
+    def _unspool(self, endpoint: _Endpoint) -> None:
+        """Queue spooled notifications again, ahead of newer ones."""
+        if endpoint.spool is None or not endpoint.spool.exists():
+            endpoint.spooled = 0
+            return
+        endpoint.spooled = 0
+        try:
+            items = _read_spool(endpoint.spool)
+            endpoint.spool.unlink()
+        except OSError:
+            return
+        if items:
+            endpoint.pending[:0] = items
+            endpoint.since = self._clock() - self.batch_window
+
+    def _shutdown(self) -> None:
+        """Last attempt for every endpoint not backing off, then spool."""
+        now = self._clock()
+        for endpoint in self._endpoints:
+            while endpoint.pending and now >= endpoint.retry_at:
+                before = len(endpoint.pending)
+                self._send(endpoint)
+                if len(endpoint.pending) >= before:
+                    break
+            if endpoint.pending:
+                self._spool(endpoint)
+        self._pool.close()
+
+
+def _spool_path(spool_dir: Path, webhook: Webhook) -> Path:
+    """Spool file of a webhook, named after it."""
+    return spool_dir / f"{re.sub(r'[^A-Za-z0-9_.-]', '_', webhook.name)}.jsonl"
+
+
+def _read_spool(path: Path) -> list[dict]:
+    """Spooled notifications, skipping corrupt lines."""
+    if not path.exists():
+        return []
+    items = []
+    for line in path.read_text(encoding="utf-8").splitlines():
+        try:
+            items.append(json.loads(line))
+        except json.JSONDecodeError:
+            continue
+    return items
+
+
+def load_config() -> tuple[list[Webhook], str]:
+    """
+    Webhooks and mode from MCP_NOTIFY_WEBHOOK_URL, else the JSON file at
+    MCP_NOTIFY_WEBHOOKS (default ~/.config/mcp-notify/webhooks.json).
+
+    Invalid entries are reported on stderr and skipped.
+    """
+    mode = os.environ.get("MCP_NOTIFY_WEBHOOK_MODE")
+    url = os.environ.get("MCP_NOTIFY_WEBHOOK_URL")
+    if url:
+        entries = [
+            {
+                "name": "default",
+                "url": url,
+                "format": os.environ.get("MCP_NOTIFY_WEBHOOK_FORMAT", "json"),
+            }
+        ]
+    else:
+        path = Path(
+            os.environ.get(
+                "MCP_NOTIFY_WEBHOOKS",
+                Path.home() / ".config" / "mcp-notify" / "webhooks.json",
+            )
+        ).expanduser()
+        if not path.exists():
+            return [], "fallback"
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Ignoring webhook configuration {path}: {e}", file=sys.stderr)
+            return [], "fallback"
+        entries = data.get("webhooks", [])
+        mode = mode or data.get("mode")
+
+    webhooks = []
+    for index, entry in enumerate(entries):
+        try:
+            webhook = Webhook(**{"name": f"webhook{index + 1}", **entry})
+        except TypeError as e:
+            print(f"Ignoring webhook {index + 1}: {e}", file=sys.stderr)
+            continue
+        if webhook.format not in FORMATS or urlsplit(webhook.url).scheme not in (
+            "http",
+            "https",
+        ):
+            print(
+                f"Ignoring webhook {webhook.name}: bad url or format", file=sys.stderr
+            )
+            continue
+        webhooks.append(webhook)
+
+    return webhooks, mode if mode in MODES else "fallback"
+
+
+def spool_dir_from_env() -> Path:
+    """Spool directory from MCP_NOTIFY_WEBHOOK_SPOOL."""
+    value = os.environ.get("MCP_NOTIFY_WEBHOOK_SPOOL")
+    if value:
+        return Path(value).expanduser()
+    return Path.home() / ".local" / "state" / "mcp-notify" / "spool"
+
+
+_sink: Optional[WebhookSink] = None
+_mode = "fallback"
+_loaded = False
+_load_lock = threading.Lock()
+
+
+def get_sink() -> Optional[WebhookSink]:
+    """Shared sink configured by the environment, None without webhooks."""
+    global _sink, _mode, _loaded
+    with _load_lock:
+        if not _loaded:
+            webhooks, _mode = load_config()
+            if webhooks:
+                _sink = WebhookSink(webhooks, spool_dir_from_env())
+            _loaded = True
+    return _sink
+
+
+def webhook_mode() -> str:
+    """Configured mode: fallback or always."""
+    get_sink()
+    return _mode
+
+
+def close_sink(timeout: float = 5.0) -> None:
+    """Flush and stop the shared sink if it was started."""
+    if _sink is not None:
+        _sink.close(timeout)
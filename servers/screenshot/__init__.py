@@ -1,3 +1,3 @@
-"""MCP Screenshot Server - Capture screen and windows on macOS."""
+"""MCP Screenshot Server - Capture screen and windows on macOS and X11."""
 
 __version__ = "0.1.0"
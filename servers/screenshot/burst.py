@@ -0,0 +1,218 @@
+"""Burst capture: N frames at a sub-second interval, unchanged ones dropped.
+
+Each frame is compared with the last frame kept. Frames are compared at
+1/DIFF_SCALE size with Pillow's C routines (difference, threshold,
+histogram), so a comparison costs a few milliseconds even on a 5K
+screen. A frame is kept when more than `threshold` percent of its
+pixels changed; its changed regions are reported as boxes in full-size
+pixel coordinates. Kept frames are written in a background thread so
+that encoding does not delay the next capture.
+
+Requires Pillow.
+"""
+
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Optional
+
+from postprocess import ProcessOptions, process_image
+from screenshotter import ensure_screenshot_dir, unique_stem
+
+MAX_FRAMES = 60
+MIN_INTERVAL = 0.05
+MAX_DURATION = 60.0
+
+# Frames are compared at this fraction of their size (noise is averaged out)
+DIFF_SCALE = 4
+
+# Gray level difference below which a pixel counts as unchanged
+PIXEL_TOLERANCE = 16
+
+# Changed regions are built from cells of DIFF_SCALE * CELL pixels
+CELL = 8
+
+# More regions than this are merged into their bounding box
+MAX_BOXES = 8
+
+
+def _thumbnail(image):
+    """The gray, 1/DIFF_SCALE size copy frames are compared by."""
+    return image.reduce(DIFF_SCALE).convert("L")
+
+
+def _changed_cells(previous, current) -> tuple[float, list[tuple[int, int]]]:
+    """
+    Compare the thumbnails of two same-size frames.
+
+    Returns:
+        (percent of pixels changed, changed cells as (column, row))
+    """
+    from PIL import ImageChops
+
+    diff = ImageChops.difference(previous, current)
+    mask = diff.point(lambda level: 255 if level > PIXEL_TOLERANCE else 0)
+    changed = mask.histogram()[255]
+    percent = 100.0 * changed / (mask.width * mask.height)
+    if not changed:
+        return percent, []
+    # A cell is changed when any of its pixels is (average above zero)
+    cells = mask.reduce(CELL)
+    width = cells.width
+    return percent, [
+        (i % width, i // width) for i, value in enumerate(cells.getdata()) if value
+    ]
+
+
+def _boxes(
+    cells: list[tuple[int, int]], cell_size: int, size: tuple[int, int]
+) -> list[list[int]]:
+    """Group adjacent changed cells into [x, y, width, height] boxes."""
+    remaining = set(cells)
+    groups = []
+    while remaining:
+        start = remaining.pop()
+        queue, left, top, right, bottom = deque([start]), *start, *start
+        while queue:
+            column, row = queue.popleft()
+            left, right = min(left, column), max(right, column)
+            top, bottom = min(top, row), max(bottom, row)
+            for neighbour in (
+                (column + 1, row),
+                (column - 1, row),
+                (column, row + 1),
+                (column, row - 1),
+            ):
+                if neighbour in remaining:
+                    remaining.remove(neighbour)
+                    queue.append(neighbour)
+        groups.append((left, top, right, bottom))
+    if len(groups) > MAX_BOXES:
+        groups = [
+            (
+                min(g[0] for g in groups),
+                min(g[1] for g in groups),
+                max(g[2] for g in groups),
+                max(g[3] for g in groups),
+            )
+        ]
+    boxes = []
+    for left, top, right, bottom in sorted(groups, key=lambda g: (g[1], g[0])):
+        x, y = left * cell_size, top * cell_size
+        boxes.append(
+            [
+                x,
+                y,
+                min(size[0], (right + 1) * cell_size) - x,
+                min(size[1], (bottom + 1) * cell_size) - y,
+            ]
+        )
+    return boxes
+
+
+def _save(image, path: Path, format: str, process: Optional[ProcessOptions]) -> dict:
+    """Write a kept frame (and its processed copy); runs in the writer thread."""
+    if format == "png":
+        image.save(path, "PNG", compress_level=3)
+    else:
+        image.save(path, "JPEG", quality=90)
+    if process is not None and process.enabled:
+        processed = process_image(path, process)
+        if "error" not in processed:
+            return processed
+    return {}
+
+
+def capture_burst(
+    grab: Callable[[], object],
+    frames: int = 10,
+    interval: float = 0.5,
+    threshold: float = 0.5,
+    format: str = "png",
+    process: Optional[ProcessOptions] = None,
+) -> dict:
+    """Capture `frames` frames, `interval` seconds apart, keep the changed ones.
+
+    Args:
+        grab: Returns the current frame as a Pillow RGB image
+        frames: Frames to capture (2 to MAX_FRAMES)
+        interval: Seconds between the starts of two captures
+        threshold: Percent of pixels that must change for a frame to be kept
+            (the first frame is always kept)
+        format: Image format of kept frames (png or jpg)
+        process: Limits for processed copies of kept frames
+
+    Returns:
+        dict with frames (index, t, time, path, width, height, changed,
+        boxes and processed_* fields of each kept frame), captured and
+        duration, or error
+    """
+    try:
+        import PIL  # noqa: F401
+    except ImportError:
+        return {"error": "Burst capture requires Pillow (pip install Pillow)"}
+
+    frames = max(2, min(MAX_FRAMES, int(frames)))
+    interval = max(MIN_INTERVAL, float(interval))
+    if frames * interval > MAX_DURATION:
+        return {"error": f"A burst may last at most {MAX_DURATION:g} seconds"}
+
+    stem = unique_stem("burst")
+    directory = ensure_screenshot_dir()
+    extension = "jpg" if format == "jpg" else "png"
+    kept: list[dict] = []
+    writes: list[Future] = []
+    last = None  # Thumbnail of the last frame kept
+    captured = 0
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="burst") as writer:
+        for index in range(frames):
+            delay = start + index * interval - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            taken = time.monotonic()
+            try:
+                image = grab()
+            except (RuntimeError, OSError) as e:
+                if not kept:
+                    return {"error": str(e)}
+                break  # E.g. the window was closed: return what we have
+            captured += 1
+            taken_at = datetime.now()
+            thumbnail = _thumbnail(image)
+            if last is None:
+                percent, boxes = 100.0, []
+            elif thumbnail.size != last.size:
+                percent, boxes = 100.0, [[0, 0, *image.size]]
+            else:
+                percent, cells = _changed_cells(last, thumbnail)
+                if percent <= threshold:
+                    continue
+                boxes = _boxes(cells, DIFF_SCALE * CELL, image.size)
+            path = directory / f"{stem}-{index:03d}.{extension}"
+            kept.append(
+                {
+                    "index": index,
+                    "t": round(taken - start, 3),
+                    "time": taken_at.isoformat(timespec="milliseconds"),
+                    "path": str(path),
+                    "width": image.width,
+                    "height": image.height,
+                    "changed": round(percent, 2),
+                    "boxes": boxes,
+                }
+            )
+            writes.append(writer.submit(_save, image, path, extension, process))
+            last = thumbnail
+    for frame, write in zip(kept, writes):
+        try:
+            frame.update(write.result())
+        except OSError as e:
+            frame["error"] = f"Cannot write frame: {e}"
+    return {
+        "frames": kept,
+        "captured": captured,
+        "duration": round(time.monotonic() - start, 3),
+    }
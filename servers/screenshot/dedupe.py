@@ -0,0 +1,178 @@
+"""Recognize a capture identical to the previous one of the same target.
+
+Polling agents often capture the same unchanged screen again and again.
+Each capture is hashed; when it matches the previous capture of the same
+target (screen or window, and format), the new file is deleted and the
+previous path is returned instead, flagged unchanged.
+
+Every remembered capture has two hashes:
+- exact: BLAKE2 of the encoded pixel data only (PNG IDAT chunks, JPEG
+  entropy-coded data), so metadata such as timestamps does not matter.
+  Needs no image library.
+- perceptual: a 256-bit difference hash of a 17x16 gray thumbnail, equal
+  (or within a few bits) for visually identical images. Needs Pillow (None
+  without it). Only "perceptual" mode matches on it: it also treats tiny
+  changes (a blinking cursor, a clock) as unchanged, and may hide a small
+  text edit.
+
+The exact hash is compared first: a repeated frame is recognized without
+decoding it, and only changed frames pay for the perceptual hash.
+"""
+
+import hashlib
+import os
+import struct
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Hashable, Optional
+
+from imageinfo import PNG_SIGNATURE
+
+MODES = ("exact", "perceptual", "off")
+
+# Perceptual hash grid: HASH_SIZE x HASH_SIZE bits
+HASH_SIZE = 16
+
+
+def mode_from_env() -> str:
+    """Matching mode from MCP_SCREENSHOT_DEDUPE (exact, perceptual or off)."""
+    mode = os.environ.get("MCP_SCREENSHOT_DEDUPE", "exact").lower()
+    return mode if mode in MODES else "exact"
+
+
+def distance_from_env() -> int:
+    """Differing perceptual hash bits still considered the same image."""
+    try:
+        return max(0, int(os.environ.get("MCP_SCREENSHOT_DEDUPE_DISTANCE", 4)))
+    except ValueError:
+        return 4
+
+
+def content_hash(path: Path) -> str:
+    """Hash of the image data of a PNG or JPEG (whole file otherwise)."""
+    data = path.read_bytes()
+    digest = hashlib.blake2b(digest_size=16)
+    if data.startswith(PNG_SIGNATURE):
+        offset = len(PNG_SIGNATURE)
+        while offset + 8 <= len(data):
+            length, kind = struct.unpack_from(">I4s", data, offset)
+            if kind == b"IDAT":
+                digest.update(memoryview(data)[offset + 8 : offset + 8 + length])
+            offset += 12 + length
+    elif data.startswith(b"\xff\xd8"):
+        digest.update(memoryview(data)[_jpeg_scan_start(data) :])
+    else:
+        digest.update(data)
+    return digest.hexdigest()
+
+
+def _jpeg_scan_start(data: bytes) -> int:
+    """Offset of the first SOS segment (after the metadata segments)."""
+    offset = 2
+    while offset + 4 <= len(data) and data[offset] == 0xFF:
+        marker = data[offset + 1]
+        if marker == 0xDA:
+            return offset
+        if marker == 0xFF:  # Fill byte
+            offset += 1
+            continue
+        (length,) = struct.unpack_from(">H", data, offset + 2)
+        offset += 2 + length
+    return 0
+
+
+def perceptual_hash(path: Path) -> Optional[int]:
+    """Difference hash of the image, None without Pillow."""
+    try:
+        from PIL import Image
+    except ImportError:
+        return None
+    with Image.open(path) as image:
+        # JPEG decodes straight at a reduced size
+        image.draft("L", (HASH_SIZE * 8, HASH_SIZE * 8))
+        small = image.convert("L").resize(
+            (HASH_SIZE + 1, HASH_SIZE), Image.Resampling.BOX
+        )
+    pixels = small.tobytes()
+    bits = 0
+    for row in range(HASH_SIZE):
+        start = row * (HASH_SIZE + 1)
+        for column in range(start, start + HASH_SIZE):
+            bits = bits << 1 | (pixels[column] < pixels[column + 1])
+    return bits
+
+
+@dataclass
+class _Entry:
+    """The last distinct capture of a target."""
+
+    path: Path
+    exact: str
+    perceptual: Optional[int]
+    captured_at: float
+    # Width, height, ... probed once from the file
+    dimensions: dict
+
+
+class CaptureCache:
+    """Last capture per target, to recognize unchanged ones (thread-safe)."""
+
+    def __init__(self, mode: str = "exact", distance: int = 4):
+        """
+        Args:
+            mode: "exact", "perceptual" or "off"
+            distance: Perceptual hash bits allowed to differ
+        """
+        self.mode = mode
+        self.distance = distance
+        self.hits = 0
+        self._entries: dict[Hashable, _Entry] = {}
+        self._lock = threading.Lock()
+
+    def check(
+        self, target: Hashable, path: Path, probe: Callable[[Path], dict]
+    ) -> tuple[_Entry, bool]:
+        """
+        Compare the new capture of `target` at `path` with the previous one.
+
+        Returns:
+            (the previous entry, True) when it is the same image, else
+            (an entry for the new capture, remembered for next time, False).
+            `probe` reads the dimensions of new captures only.
+        """
+        if self.mode == "off":
+            return _Entry(path, "", None, time.time(), probe(path)), False
+        try:
+            exact = content_hash(path)
+        except OSError:
+            exact = ""
+        with self._lock:
+            previous = self._entries.get(target)
+        if previous is not None and (not exact or not previous.path.exists()):
+            previous = None
+        if previous is not None and previous.exact == exact:
+            return self._hit(previous)
+        try:
+            perceptual = perceptual_hash(path) if exact else None
+        except OSError:
+            perceptual = None
+        if (
+            self.mode == "perceptual"
+            and previous is not None
+            and perceptual is not None
+            and previous.perceptual is not None
+            and (perceptual ^ previous.perceptual).bit_count() <= self.distance
+        ):
+            return self._hit(previous)
+        entry = _Entry(path, exact, perceptual, time.time(), probe(path))
+        if exact:
+            with self._lock:
+                self._entries[target] = entry
+        return entry, False
+
+    def _hit(self, previous: _Entry) -> tuple[_Entry, bool]:
+        with self._lock:
+            self.hits += 1
+        return previous, True
@@ -0,0 +1,162 @@
+"""Image metadata read from PNG and JPEG file headers.
+
+Only the header is read: the PNG chunks before the image data (IHDR, and
+pHYs for the resolution) or the JPEG markers up to the first frame header
+(SOFn, and the JFIF APP0 segment). Pixel data is never decoded, so this
+works on any platform without an image library or external command.
+"""
+
+import struct
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Optional
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+# Screen resolution at scale factor 1 (macOS writes 144 DPI for Retina)
+BASE_DPI = 72.0
+
+PNG_COLOR_TYPES = {
+    0: "grayscale",
+    2: "rgb",
+    3: "palette",
+    4: "grayscale+alpha",
+    6: "rgba",
+}
+
+JPEG_COLOR_TYPES = {1: "grayscale", 3: "ycbcr", 4: "cmyk"}
+
+# SOFn markers carrying the frame size (C4 DHT, C8 JPG and CC DAC are not)
+JPEG_SOF_MARKERS = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+# Markers without a length field
+JPEG_STANDALONE_MARKERS = frozenset([0x01, *range(0xD0, 0xD8)])
+
+INCHES_PER_METER = 0.0254
+
+
+class ImageInfoError(ValueError):
+    """The file is not a PNG or JPEG image, or its header is malformed."""
+
+
+@dataclass(frozen=True)
+class ImageInfo:
+    """Header metadata of an image."""
+
+    format: str  # "png" or "jpeg"
+    width: int
+    height: int
+    color_type: str
+    bit_depth: int
+    # Horizontal and vertical resolution, when the file records it
+    dpi: Optional[tuple[float, float]] = None
+
+    @property
+    def scale(self) -> Optional[float]:
+        """Display scale factor (2.0 for a Retina capture), if known."""
+        if self.dpi is None:
+            return None
+        return round(self.dpi[0] / BASE_DPI, 2)
+
+
+def read_image_info(path: Path) -> ImageInfo:
+    """
+    Metadata of a PNG or JPEG file.
+
+    Raises:
+        ImageInfoError: Unknown format or malformed header
+        OSError: The file cannot be read
+    """
+    with open(path, "rb") as f:
+        start = f.read(len(PNG_SIGNATURE))
+        if start == PNG_SIGNATURE:
+            return _read_png(f)
+        if start[:2] == b"\xff\xd8":
+            f.seek(2)
+            return _read_jpeg(f)
+    raise ImageInfoError(f"Not a PNG or JPEG image: {path}")
+
+
+def _read_exact(f: BinaryIO, size: int) -> bytes:
+    """Read `size` bytes or fail on a truncated file."""
+    data = f.read(size)
+    if len(data) != size:
+        raise ImageInfoError("Truncated image header")
+    return data
+
+
+def _read_png(f: BinaryIO) -> ImageInfo:
+    """Walk the chunks before IDAT (signature already read)."""
+    length, kind = struct.unpack(">I4s", _read_exact(f, 8))
+    if kind != b"IHDR" or length != 13:
+        raise ImageInfoError("PNG does not start with IHDR")
+    width, height, bit_depth, color, _, _, _ = struct.unpack(
+        ">IIBBBBB", _read_exact(f, 13)
+    )
+    f.seek(4, 1)  # CRC
+    dpi = None
+    # pHYs must precede the image data: stop at the first IDAT
+    while True:
+        header = f.read(8)
+        if len(header) != 8:
+            break
+        length, kind = struct.unpack(">I4s", header)
+        if kind in (b"IDAT", b"IEND"):
+            break
+        if kind == b"pHYs" and length == 9:
+            x, y, unit = struct.unpack(">IIB", _read_exact(f, 9))
+            if unit == 1 and x and y:  # Pixels per meter
+                dpi = (
+                    round(x * INCHES_PER_METER, 1),
+                    round(y * INCHES_PER_METER, 1),
+                )
+            f.seek(4, 1)
+            continue
+        f.seek(length + 4, 1)  # Data and CRC
+    return ImageInfo(
+        format="png",
+        width=width,
+        height=height,
+        color_type=PNG_COLOR_TYPES.get(color, f"unknown ({color})"),
+        bit_depth=bit_depth,
+        dpi=dpi,
+    )
+
+
+def _read_jpeg(f: BinaryIO) -> ImageInfo:
+    """Walk the markers up to the first SOFn (SOI already read)."""
+    dpi = None
+    while True:
+        byte = _read_exact(f, 1)
+        if byte != b"\xff":
+            raise ImageInfoError("Malformed JPEG marker")
+        marker = _read_exact(f, 1)[0]
+        while marker == 0xFF:  # Fill bytes
+            marker = _read_exact(f, 1)[0]
+        if marker in JPEG_STANDALONE_MARKERS:
+            continue
+        if marker in (0xD9, 0xDA):  # EOI, SOS: no frame header before them
+            raise ImageInfoError("JPEG has no frame header")
+        (length,) = struct.unpack(">H", _read_exact(f, 2))
+        if length < 2:
+            raise ImageInfoError("Malformed JPEG segment")
+        if marker in JPEG_SOF_MARKERS:
+            precision, height, width, components = struct.unpack(
+                ">BHHB", _read_exact(f, 6)
+            )
+            return ImageInfo(
+                format="jpeg",
+                width=width,
+                height=height,
+                color_type=JPEG_COLOR_TYPES.get(
+                    components, f"unknown ({components} components)"
+                ),
+                bit_depth=precision,
+                dpi=dpi,
+            )
+        data = _read_exact(f, length - 2)
+        if marker == 0xE0 and data[:5] == b"JFIF\x00" and len(data) >= 12:
+            unit, x, y = struct.unpack(">BHH", data[7:12])
+            if x and y and unit in (1, 2):  # Per inch, per centimeter
+                factor = 1.0 if unit == 1 else 2.54
+                dpi = (round(x * factor, 1), round(y * factor, 1))
@@ -0,0 +1,200 @@
+"""Shrink screenshots for vision models: resize, re-encode, byte budget.
+
+A full-resolution PNG from a 5K display is several megabytes. The
+processed copy is downscaled to a maximum edge and/or pixel count,
+re-encoded as JPEG, WebP or (optionally palette-quantized) PNG, and its
+quality lowered until it fits a byte budget. It is written next to the
+original, which is kept.
+
+Requires Pillow (optional dependency, `pip install Pillow`). All pixel
+work is done by Pillow's C routines, never per pixel in Python; callers
+run `process_image` in a worker thread.
+"""
+
+import io
+import math
+import os
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Optional
+
+FORMATS = ("jpeg", "webp", "png")
+EXTENSIONS = {"jpeg": "jpg", "webp": "webp", "png": "png"}
+
+# Lowest quality tried before downscaling further to meet a byte budget
+MIN_QUALITY = 40
+
+# Downscale rounds allowed when even MIN_QUALITY is over budget
+MAX_SHRINKS = 6
+
+# Background for images with alpha encoded as JPEG
+BACKGROUND = (255, 255, 255)
+
+
+@dataclass(frozen=True)
+class ProcessOptions:
+    """What the processed copy must satisfy."""
+
+    max_dimension: Optional[int] = None  # Longest edge, in pixels
+    max_megapixels: Optional[float] = None
+    max_bytes: Optional[int] = None
+    format: str = "jpeg"
+    quality: int = 85  # Starting quality of lossy formats (1-95)
+    colors: int = 0  # Quantize to this many colors (png only, 0 = off)
+
+    @property
+    def enabled(self) -> bool:
+        """Whether any limit asks for a processed copy."""
+        return bool(self.max_dimension or self.max_megapixels or self.max_bytes)
+
+
+def _env_number(name: str, kind: type) -> Optional[float]:
+    """Positive number from the environment, None when unset or invalid."""
+    try:
+        value = kind(os.environ.get(name, 0))
+    except ValueError:
+        return None
+    return value if value > 0 else None
+
+
+def options_from_env() -> ProcessOptions:
+    """
+    Defaults from MCP_SCREENSHOT_MAX_DIMENSION, MCP_SCREENSHOT_MAX_MEGAPIXELS,
+    MCP_SCREENSHOT_MAX_BYTES, MCP_SCREENSHOT_OUTPUT_FORMAT,
+    MCP_SCREENSHOT_QUALITY and MCP_SCREENSHOT_COLORS (all off by default).
+    """
+    fmt = os.environ.get("MCP_SCREENSHOT_OUTPUT_FORMAT", "jpeg").lower()
+    if fmt == "jpg":
+        fmt = "jpeg"
+    return ProcessOptions(
+        max_dimension=_env_number("MCP_SCREENSHOT_MAX_DIMENSION", int),
+        max_megapixels=_env_number("MCP_SCREENSHOT_MAX_MEGAPIXELS", float),
+        max_bytes=_env_number("MCP_SCREENSHOT_MAX_BYTES", int),
+        format=fmt if fmt in FORMATS else "jpeg",
+        quality=min(95, int(_env_number("MCP_SCREENSHOT_QUALITY", int) or 85)),
+        colors=min(256, int(_env_number("MCP_SCREENSHOT_COLORS", int) or 0)),
+    )
+
+
+def with_overrides(options: ProcessOptions, **overrides: object) -> ProcessOptions:
+    """`options` with the overrides that are not None."""
+    return replace(options, **{k: v for k, v in overrides.items() if v is not None})
+
+
+def target_size(width: int, height: int, options: ProcessOptions) -> tuple[int, int]:
+    """Size after applying the dimension and megapixel limits (never larger)."""
+    factor = 1.0
+    if options.max_dimension:
+        factor = min(factor, options.max_dimension / max(width, height))
+    if options.max_megapixels:
+        factor = min(factor, math.sqrt(options.max_megapixels * 1e6 / (width * height)))
+    return max(1, round(width * factor)), max(1, round(height * factor))
+
+
+def process_image(path: Path, options: ProcessOptions) -> dict:
+    """
+    Write a processed copy of the image at `path`.
+
+    Returns:
+        dict with processed_path, processed_width, processed_height,
+        processed_bytes, processed_format, quality (lossy formats) and
+        over_budget, or error
+    """
+    try:
+        from PIL import Image
+    except ImportError:
+        return {"error": "Pillow is not installed (pip install Pillow)"}
+
+    try:
+        with Image.open(path) as source:
+            source.load()
+            image = _prepare(source, options)
+    except (OSError, ValueError) as e:
+        return {"error": f"Cannot read {path.name}: {e}"}
+
+    size = target_size(image.width, image.height, options)
+    data, quality = b"", None
+    for _ in range(MAX_SHRINKS + 1):
+        resized = _resize(image, size)
+        data, quality = _encode_within(resized, options)
+        if not options.max_bytes or len(data) <= options.max_bytes:
+            break
+        # Bytes scale roughly with the pixel count
+        factor = math.sqrt(options.max_bytes / len(data)) * 0.95
+        size = (max(1, int(size[0] * factor)), max(1, int(size[1] * factor)))
+
+    target = path.with_name(f"{path.stem}-processed.{EXTENSIONS[options.format]}")
+    target.write_bytes(data)
+    result = {
+        "processed_path": str(target),
+        "processed_width": size[0],
+        "processed_height": size[1],
+        "processed_bytes": len(data),
+        "processed_format": options.format,
+        "over_budget": bool(options.max_bytes and len(data) > options.max_bytes),
+    }
+    if quality is not None:
+        result["quality"] = quality
+    return result
+
+
+def _prepare(image, options: ProcessOptions):
+    """Convert to a mode the output format can encode."""
+    from PIL import Image
+
+    has_alpha = image.mode in ("RGBA", "LA", "PA") or "transparency" in image.info
+    if options.format == "jpeg":
+        if has_alpha:
+            rgba = image.convert("RGBA")
+            flat = Image.new("RGB", rgba.size, BACKGROUND)
+            flat.paste(rgba, mask=rgba.getchannel("A"))
+            return flat
+        return image.convert("L" if image.mode in ("1", "L") else "RGB")
+    return image.convert("RGBA" if has_alpha else "RGB")
+
+
+def _resize(image, size: tuple[int, int]):
+    """Downscale with a box reduction first, then Lanczos (fast and sharp)."""
+    from PIL import Image
+
+    if size == image.size:
+        return image
+    return image.resize(size, Image.Resampling.LANCZOS, reducing_gap=3.0)
+
+
+def _encode(image, options: ProcessOptions, quality: int) -> bytes:
+    """Encode `image` in the output format."""
+    buffer = io.BytesIO()
+    if options.format == "png":
+        if options.colors:
+            image = image.quantize(options.colors)
+        image.save(buffer, "PNG", optimize=True)
+    elif options.format == "webp":
+        image.save(buffer, "WEBP", quality=quality, method=4)
+    else:
+        image.save(buffer, "JPEG", quality=quality, optimize=True, progressive=True)
+    return buffer.getvalue()
+
+
+def _encode_within(image, options: ProcessOptions) -> tuple[bytes, Optional[int]]:
+    """
+    Encode at the highest quality fitting the byte budget, searching down
+    to MIN_QUALITY. Returns the smallest encoding when none fits.
+    """
+    if options.format == "png":
+        return _encode(image, options, 0), None
+    data = _encode(image, options, options.quality)
+    if not options.max_bytes or len(data) <= options.max_bytes:
+        return data, options.quality
+    best, best_quality = _encode(image, options, MIN_QUALITY), MIN_QUALITY
+    if len(best) > options.max_bytes:
+        return best, best_quality
+    low, high = MIN_QUALITY + 1, options.quality - 1
+    while low <= high:
+        middle = (low + high) // 2
+        candidate = _encode(image, options, middle)
+        if len(candidate) <= options.max_bytes:
+            best, best_quality, low = candidate, middle, middle + 1
+        else:
+            high = middle - 1
+    return best, best_quality
@@ -0,0 +1,139 @@
+"""Capture regions: a rectangle of a screen or window.
+
+Coordinates are relative to the captured screen or window, in pixels or
+in points (logical units: one point is `scale` pixels on a Retina
+display). Backends that can capture a rectangle directly do so (X11 grabs
+only the region, macOS `screencapture -R`); otherwise the capture is
+cropped once decoded (`crop_file`) and only the region is re-encoded.
+
+A PNG is decoded only down to the last row of the region: its rows are
+compressed in order, so the decoder stops there. A JPEG is decoded whole:
+libjpeg cannot stop part way, and a lossless crop would need jpegtran.
+"""
+
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Optional
+
+from imageinfo import ImageInfoError, read_image_info
+
+UNITS = ("pixels", "points")
+
+
+@dataclass(frozen=True)
+class Region:
+    """A rectangle in `units`."""
+
+    x: int
+    y: int
+    width: int
+    height: int
+    units: str = "pixels"
+
+    def to_pixels(self, scale: float) -> "Region":
+        """The region in pixels, given the display scale factor."""
+        if self.units == "pixels" or scale == 1:
+            return replace(self, units="pixels")
+        return Region(
+            round(self.x * scale),
+            round(self.y * scale),
+            round(self.width * scale),
+            round(self.height * scale),
+        )
+
+    def clip(self, width: int, height: int) -> Optional["Region"]:
+        """The part inside a width x height area, None if it is empty."""
+        left, top = max(0, self.x), max(0, self.y)
+        right = min(width, self.x + self.width)
+        bottom = min(height, self.y + self.height)
+        if right <= left or bottom <= top:
+            return None
+        return Region(left, top, right - left, bottom - top, self.units)
+
+    @property
+    def box(self) -> tuple[int, int, int, int]:
+        """(left, top, right, bottom), as Pillow crops."""
+        return self.x, self.y, self.x + self.width, self.y + self.height
+
+
+def parse_region(value: object) -> Optional[Region]:
+    """
+    Region from a tool argument: {"x", "y", "width", "height", "units"}.
+
+    Raises:
+        ValueError: Malformed region
+    """
+    if value is None:
+        return None
+    if not isinstance(value, dict):
+        raise ValueError("region must be an object with x, y, width and height")
+    try:
+        region = Region(
+            int(value["x"]),
+            int(value["y"]),
+            int(value["width"]),
+            int(value["height"]),
+            str(value.get("units", "pixels")),
+        )
+    except (KeyError, TypeError, ValueError):
+        raise ValueError("region needs integer x, y, width and height") from None
+    if region.width <= 0 or region.height <= 0:
+        raise ValueError("region width and height must be positive")
+    if region.units not in UNITS:
+        raise ValueError(f"region units must be one of {', '.join(UNITS)}")
+    return region
+
+
+def crop_image(image, region: Region, scale: float = 1.0):
+    """
+    Crop a decoded Pillow image to `region` (clipped to the image).
+
+    Raises:
+        ValueError: The region is outside the image
+    """
+    pixels = region.to_pixels(scale).clip(image.width, image.height)
+    if pixels is None:
+        raise ValueError("region is outside the captured area")
+    return image.crop(pixels.box)
+
+
+def _decode_rows(image, bottom: int) -> None:
+    """Have a PNG opened but not loaded decode only its first `bottom` rows."""
+    if (
+        image.format != "PNG"
+        or image.info.get("interlace")  # Passes spread over the whole image
+        or getattr(image, "is_animated", False)
+        or len(image.tile) != 1
+    ):
+        return
+    name, _, offset, args = image.tile[0]
+    image.tile = [(name, (0, 0, image.width, bottom), offset, args)]
+
+
+def crop_file(path: Path, region: Region) -> None:
+    """
+    Replace an image file by its `region`, re-encoded in its own format
+    (points are converted with the scale of the file). A PNG is decoded
+    down to the bottom of the region only.
+
+    Raises:
+        ValueError: The region is outside the image
+        OSError: The file cannot be read or written
+        ImportError: Pillow is not installed
+    """
+    from PIL import Image
+
+    try:
+        scale = read_image_info(path).scale or 1.0
+    except ImageInfoError:
+        scale = 1.0
+    with Image.open(path) as image:
+        fmt, info = image.format, image.info
+        pixels = region.to_pixels(scale).clip(image.width, image.height)
+        if pixels is not None:
+            _decode_rows(image, pixels.y + pixels.height)
+        cropped = crop_image(image, region, scale)
+    options = {"dpi": info["dpi"]} if "dpi" in info else {}
+    if fmt == "JPEG":
+        options["quality"] = 90
+    cropped.save(path, fmt, **options)
@@ -1,15 +1,65 @@
-"""Screenshot capture logic for macOS."""
+"""Screenshot capture logic for macOS (screencapture) and Linux (X11)."""
 
+import binascii
+import itertools
+import mmap
 import os
 import subprocess
 import sys
+import tempfile
+import time
 from datetime import datetime
 from pathlib import Path
+from typing import Callable, Optional
 
+import x11capture
+from dedupe import CaptureCache, distance_from_env, mode_from_env
+from imageinfo import ImageInfoError, read_image_info
+from postprocess import ProcessOptions, process_image
+from region import Region, crop_file, crop_image
+from windows import WindowIndex, WindowSourceError, default_source, ttl_from_env
 
 # Temp directory for screenshots
 SCREENSHOT_DIR = Path("/tmp/mcp-screenshot")
 
+# Largest file returned inline as image content (base64 grows it by 4/3)
+INLINE_MAX_BYTES = 2 * 1024 * 1024
+
+# Last capture of each target, to recognize unchanged ones
+capture_cache = CaptureCache(mode_from_env(), distance_from_env())
+
+# On-screen windows, enumerated at most every few seconds
+window_index = WindowIndex(default_source(), ttl_from_env())
+
+NO_X11_DISPLAY = "No X11 display: set DISPLAY (Wayland sessions need XWayland)"
+
+MIME_TYPES = {".png": "image/png", ".jpg": "image/jpeg", ".webp": "image/webp"}
+
+# Suffix of capture file names (next() on a count is atomic)
+_file_numbers = itertools.count(1)
+
+# Called with (command name, seconds, succeeded) after each external command
+_subprocess_listeners: list[Callable[[str, float, bool], None]] = []
+
+
+def add_subprocess_listener(listener: Callable[[str, float, bool], None]) -> None:
+    """Observe the duration of every external command (metrics)."""
+    _subprocess_listeners.append(listener)
+
+
+def _run(cmd: list[str], timeout: float) -> subprocess.CompletedProcess:
+    """Run an external command, reporting its duration to the listeners."""
+    start = time.perf_counter()
+    ok = False
+    try:
+        result = subprocess.run(cmd, capture_output=True, timeout=timeout)
+        ok = result.returncode == 0
+        return result
+    finally:
+        elapsed = time.perf_counter() - start
+        for listener in _subprocess_listeners:
+            listener(cmd[0], elapsed, ok)
+
 
 def ensure_screenshot_dir() -> Path:
     """Ensure the screenshot directory exists."""
@@ -17,11 +67,19 @@ def ensure_screenshot_dir() -> Path:
     return SCREENSHOT_DIR
 
 
+def unique_stem(prefix: str) -> str:
+    """A timestamped file name stem no other capture of this process uses.
+
+    Captures of different targets (screens, windows, regions) can happen
+    within the same millisecond: a counter keeps their files apart.
+    """
+    timestamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")[:-3]
+    return f"{prefix}-{timestamp}-{next(_file_numbers):04d}"
+
+
 def generate_filename(prefix: str = "screenshot", format: str = "png") -> Path:
-    """Generate a timestamped filename for the screenshot."""
-    timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
-    filename = f"{prefix}-{timestamp}.{format}"
-    return ensure_screenshot_dir() / filename
+    """Generate a unique, timestamped filename for the screenshot."""
+    return ensure_screenshot_dir() / f"{unique_stem(prefix)}.{format}"
 
 
 def check_screen_recording_permission() -> bool:
@@ -60,19 +118,32 @@ def capture_screen(
     screen_index: int = 0,
     format: str = "png",
     delay: float = 0,
+    process: Optional[ProcessOptions] = None,
+    region: Optional[Region] = None,
 ) -> dict:
-    """Capture the entire screen.
+    """Capture the entire screen, or a region of it.
 
     Args:
         screen_index: Index of the screen to capture (0 = main screen)
         format: Image format (png or jpg)
         delay: Delay in seconds before capture
+        process: Limits for a processed copy (see postprocess_capture)
+        region: Rectangle of the screen to keep
 
     Returns:
-        dict with path, width, height, format, or error
+        dict with path, width, height, format (and processed_* fields), or error
     """
+    if sys.platform.startswith("linux"):
+        return _capture_x11(
+            lambda path: x11capture.capture_screen(path, screen_index, format, region),
+            ("screen", screen_index, format, region),
+            "screen",
+            format,
+            delay,
+            process,
+        )
     if sys.platform != "darwin":
-        return {"error": "Screen capture is only supported on macOS"}
+        return {"error": "Screen capture is only supported on macOS and Linux (X11)"}
 
     filepath = generate_filename("screen", format)
 
@@ -86,14 +157,20 @@ def capture_screen(
     # Add format
     cmd.extend(["-t", format])
 
+    # Capture only the region when screencapture can (points, main screen)
+    native_region = region is not None and region.units == "points"
+    native_region = native_region and screen_index == 0
+    if native_region:
+        cmd.extend(["-R", f"{region.x},{region.y},{region.width},{region.height}"])
+
     # Add screen selection for multi-monitor
-    if screen_index > 0:
+    elif screen_index > 0:
         cmd.extend(["-D", str(screen_index + 1)])  # screencapture uses 1-based index
 
     cmd.append(str(filepath))
 
     try:
-        result = subprocess.run(cmd, capture_output=True, timeout=30)
+        result = _run(cmd, timeout=30)
 
         if result.returncode != 0:
             return {"error": f"screencapture failed: {result.stderr.decode()}"}
@@ -103,14 +180,16 @@ def capture_screen(
                 "error": "Screenshot file was not created. Check screen recording permissions."
             }
 
-        # Get image dimensions using sips
-        dimensions = get_image_dimensions(filepath)
+        if region is not None and not native_region:
+            error = _crop_capture(filepath, region)
+            if error:
+                return {"error": error}
 
-        return {
-            "path": str(filepath),
-            "format": format,
-            **dimensions,
-        }
+        return finish_capture(
+            ("screen", screen_index, format, region),
+            {"path": str(filepath), "format": format},
+            process,
+        )
 
     except subprocess.TimeoutExpired:
         return {"error": "Screenshot capture timed out"}
@@ -122,21 +201,28 @@ def capture_window(
     window_title: str,
     format: str = "png",
     delay: float = 0,
+    process: Optional[ProcessOptions] = None,
+    region: Optional[Region] = None,
 ) -> dict:
-    """Capture a window by its title.
+    """Capture a window by its title, or a region of it.
 
     Args:
-        window_title: Full or partial window title to match
+        window_title: Window title, app name or part of them (fuzzy match)
         format: Image format (png or jpg)
         delay: Delay in seconds before capture
+        process: Limits for a processed copy (see postprocess_capture)
+        region: Rectangle of the window to keep (from its top-left corner)
 
     Returns:
-        dict with path, width, height, format, window_title, or error
+        dict with path, width, height, format, window_title (and processed_*
+        fields), or error
     """
-    if sys.platform != "darwin":
-        return {"error": "Window capture is only supported on macOS"}
+    if sys.platform != "darwin" and not sys.platform.startswith("linux"):
+        return {"error": "Window capture is only supported on macOS and Linux (X11)"}
+    if sys.platform.startswith("linux") and not x11capture.available():
+        return {"error": NO_X11_DISPLAY}
 
-    # Find window ID by title
+    # Find window ID by title; the list of windows reuses the same enumeration
     window_info = find_window_by_title(window_title)
 
     if window_info is None:
@@ -149,6 +235,21 @@ def capture_window(
     window_id = window_info["id"]
     actual_title = window_info["title"]
 
+    if sys.platform.startswith("linux"):
+        result = _capture_x11(
+            lambda path: x11capture.capture_window(path, window_id, format, region),
+            ("window", window_id, format, region),
+            "window",
+            format,
+            delay,
+            process,
+            window_title=actual_title,
+        )
+        if "error" in result:
+            # The window may be gone: enumerate again next time
+            window_index.invalidate()
+        return result
+
     filepath = generate_filename("window", format)
 
     # Build screencapture command for window
@@ -161,24 +262,28 @@ def capture_window(
     cmd.append(str(filepath))
 
     try:
-        result = subprocess.run(cmd, capture_output=True, timeout=30)
+        result = _run(cmd, timeout=30)
 
         if result.returncode != 0:
+            window_index.invalidate()
             return {"error": f"screencapture failed: {result.stderr.decode()}"}
 
         if not filepath.exists():
+            window_index.invalidate()
             return {
                 "error": "Screenshot file was not created. Check screen recording permissions."
             }
 
-        dimensions = get_image_dimensions(filepath)
+        if region is not None:
+            error = _crop_capture(filepath, region)
+            if error:
+                return {"error": error}
 
-        return {
-            "path": str(filepath),
-            "format": format,
-            "window_title": actual_title,
-            **dimensions,
-        }
+        return finish_capture(
+            ("window", window_id, format, region),
+            {"path": str(filepath), "format": format, "window_title": actual_title},
+            process,
+        )
 
     except subprocess.TimeoutExpired:
         return {"error": "Screenshot capture timed out"}
@@ -186,105 +291,216 @@ def capture_window(
         return {"error": f"Screenshot capture failed: {str(e)}"}
 
 
-def find_window_by_title(title: str) -> dict | None:
-    """Find a window by its title (partial match).
+def _crop_capture(filepath: Path, region: Region) -> Optional[str]:
+    """Crop a captured file to `region`; an error message on failure."""
+    try:
+        crop_file(filepath, region)
+    except ImportError:
+        error = "Cropping a capture to a region requires Pillow (pip install Pillow)"
+    except (ValueError, OSError) as e:
+        error = f"Cannot crop to the region: {e}"
+    else:
+        return None
+    filepath.unlink(missing_ok=True)
+    return error
+
+
+def _capture_x11(
+    capture: Callable[[Path], None],
+    target: tuple,
+    prefix: str,
+    format: str,
+    delay: float,
+    process: Optional[ProcessOptions],
+    **extra: str,
+) -> dict:
+    """Run an X11 capture into a new file and describe the result."""
+    if not x11capture.available():
+        return {"error": NO_X11_DISPLAY}
+    if delay > 0:
+        time.sleep(delay)
 
-    Returns dict with 'id' and 'title' if found, None otherwise.
-    Uses Quartz CGWindowListCopyWindowInfo for accurate window IDs.
-    """
+    filepath = generate_filename(prefix, format)
     try:
-        import Quartz
+        capture(filepath)
+    except x11capture.X11Error as e:
+        return {"error": f"X11 capture failed: {e}"}
+    except OSError as e:
+        return {"error": f"Screenshot capture failed: {e}"}
+
+    return finish_capture(
+        target, {"path": str(filepath), "format": format, **extra}, process
+    )
 
-        # Get all windows
-        window_list = Quartz.CGWindowListCopyWindowInfo(
-            Quartz.kCGWindowListOptionOnScreenOnly
-            | Quartz.kCGWindowListExcludeDesktopElements,
-            Quartz.kCGNullWindowID,
-        )
 
-        title_lower = title.lower()
-
-        for window in window_list:
-            window_title = window.get(Quartz.kCGWindowName, "")
-            window_owner = window.get(Quartz.kCGWindowOwnerName, "")
-            window_id = window.get(Quartz.kCGWindowNumber)
-
-            # Check window title
-            if window_title and title_lower in window_title.lower():
-                return {
-                    "id": window_id,
-                    "title": f"{window_owner}: {window_title}"
-                    if window_owner
-                    else window_title,
-                }
-            # Also check owner name (app name)
-            if window_owner and title_lower in window_owner.lower():
-                return {
-                    "id": window_id,
-                    "title": f"{window_owner}: {window_title}"
-                    if window_title
-                    else window_owner,
-                }
+def grab_frame(
+    screen_index: int = 0,
+    window_id: Optional[int] = None,
+    region: Optional[Region] = None,
+):
+    """Capture the screen or a window (or a region of it) as an in-memory
+    Pillow RGB image.
+
+    Used for bursts: on X11 pixels never touch the disk; on macOS each frame
+    is a screencapture run into a temporary file.
+
+    Raises:
+        RuntimeError: Capture failed or is unsupported here
+        ImportError: Pillow is not installed
+    """
+    from PIL import Image
 
-        return None
+    if sys.platform.startswith("linux"):
+        if not x11capture.available():
+            raise RuntimeError(NO_X11_DISPLAY)
+        try:
+            if window_id is not None:
+                frame = x11capture.grab_window(window_id, region)
+            else:
+                frame = x11capture.grab_screen(screen_index, region)
+            return x11capture.to_image(*frame)
+        except x11capture.X11Error as e:
+            if window_id is not None:
+                window_index.invalidate()
+            raise RuntimeError(f"X11 capture failed: {e}") from None
+    if sys.platform != "darwin":
+        raise RuntimeError("Screen capture is only supported on macOS and Linux (X11)")
+
+    cmd = ["screencapture", "-x", "-t", "png"]
+    if window_id is not None:
+        cmd.extend(["-l", str(window_id)])
+    elif screen_index > 0:
+        cmd.extend(["-D", str(screen_index + 1)])
+    fd, name = tempfile.mkstemp(suffix=".png", dir=ensure_screenshot_dir())
+    os.close(fd)
+    try:
+        result = _run([*cmd, name], timeout=30)
+        if result.returncode != 0:
+            if window_id is not None:
+                window_index.invalidate()
+            raise RuntimeError(f"screencapture failed: {result.stderr.decode()}")
+        with Image.open(name) as image:
+            if region is None:
+                return image.convert("RGB")
+            scale = read_image_info(Path(name)).scale or 1.0
+            return crop_image(image, region, scale).convert("RGB")
+    except ValueError as e:
+        raise RuntimeError(f"Cannot crop to the region: {e}") from None
+    except (subprocess.TimeoutExpired, OSError, ImageInfoError) as e:
+        raise RuntimeError(f"Screenshot capture failed: {e}") from None
+    finally:
+        os.unlink(name)
 
-    except ImportError:
-        # Quartz not available, return None
+
+def find_window_by_title(title: str) -> dict | None:
+    """Find the window best matching a title (see windows.match_score).
+
+    Returns dict with 'id' and 'title' if found, None otherwise.
+    Served from window_index: Quartz CGWindowListCopyWindowInfo for accurate
+    window IDs, or the window manager's client list on X11.
+    """
+    try:
+        window = window_index.find(title)
+    except WindowSourceError:
         return None
-    except Exception:
+    if window is None:
         return None
+    return {"id": window.id, "title": window.label}
 
 
 def list_windows() -> list[str]:
-    """List available window titles."""
+    """List available window titles (from window_index)."""
     try:
-        import Quartz
+        windows = window_index.windows()
+    except WindowSourceError as e:
+        return [f"({e})"]
+    return list(dict.fromkeys(window.label for window in windows if window.label))
 
-        window_list = Quartz.CGWindowListCopyWindowInfo(
-            Quartz.kCGWindowListOptionOnScreenOnly
-            | Quartz.kCGWindowListExcludeDesktopElements,
-            Quartz.kCGNullWindowID,
-        )
 
-        titles = []
-        for window in window_list:
-            window_title = window.get(Quartz.kCGWindowName, "")
-            window_owner = window.get(Quartz.kCGWindowOwnerName, "")
-            if window_title:
-                titles.append(f"{window_owner}: {window_title}")
-            elif window_owner:
-                titles.append(window_owner)
+def finish_capture(
+    target: tuple, result: dict, process: Optional[ProcessOptions]
+) -> dict:
+    """Add dimensions and the processed copy to a new capture of `target`.
 
-        return list(set(titles))  # Remove duplicates
+    When the image is the same as the previous capture of the target, the
+    new file is deleted and the previous path returned, with unchanged=True
+    and unchanged_since (ISO time of the previous capture).
+    """
+    filepath = Path(result["path"])
+    entry, unchanged = capture_cache.check(target, filepath, get_image_dimensions)
+    if unchanged:
+        filepath.unlink(missing_ok=True)
+        since = datetime.fromtimestamp(entry.captured_at)
+        result = {
+            **result,
+            "path": str(entry.path),
+            "unchanged": True,
+            "unchanged_since": since.isoformat(timespec="seconds"),
+        }
+    return postprocess_capture({**result, **entry.dimensions}, process)
 
-    except ImportError:
-        return ["(Install pyobjc-framework-Quartz to list windows)"]
-    except Exception:
-        return []
 
+def postprocess_capture(result: dict, process: Optional[ProcessOptions]) -> dict:
+    """Add a resized, re-encoded copy of a capture when limits are set.
 
-def get_image_dimensions(filepath: Path) -> dict:
-    """Get image dimensions using sips (macOS)."""
+    The original is kept. A processing failure does not fail the capture:
+    it is reported as processing_error.
+    """
+    if process is None or not process.enabled:
+        return result
+    processed = process_image(Path(result["path"]), process)
+    if "error" in processed:
+        return {**result, "processing_error": processed["error"]}
+    return {**result, **processed}
+
+
+def inline_max_bytes_from_env() -> int:
+    """Inline size cap from MCP_SCREENSHOT_INLINE_MAX_BYTES."""
     try:
-        result = subprocess.run(
-            ["sips", "-g", "pixelWidth", "-g", "pixelHeight", str(filepath)],
-            capture_output=True,
-            timeout=5,
-        )
+        return int(os.environ.get("MCP_SCREENSHOT_INLINE_MAX_BYTES", INLINE_MAX_BYTES))
+    except ValueError:
+        return INLINE_MAX_BYTES
 
-        output = result.stdout.decode()
-        width = height = None
 
-        for line in output.split("\n"):
-            if "pixelWidth" in line:
-                width = int(line.split(":")[-1].strip())
-            elif "pixelHeight" in line:
-                height = int(line.split(":")[-1].strip())
+def encode_inline(filepath: Path, max_bytes: int) -> dict:
+    """Base64-encode an image for inline image content.
 
-        return {"width": width, "height": height}
+    The file is memory-mapped and encoded straight from the mapping, so it
+    is never read into an intermediate bytes object.
 
-    except Exception:
+    Returns:
+        dict with data, mime_type and bytes, or error when the file is
+        larger than max_bytes or cannot be read
+    """
+    mime_type = MIME_TYPES.get(filepath.suffix.lower())
+    if mime_type is None:
+        return {"error": f"Unsupported image type: {filepath.suffix}"}
+    try:
+        with open(filepath, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size > max_bytes:
+                return {"error": f"{size} bytes is over the {max_bytes} inline cap"}
+            if size == 0:
+                return {"error": "Empty image file"}
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as view:
+                data = binascii.b2a_base64(view, newline=False)
+    except (OSError, ValueError) as e:
+        return {"error": f"Cannot read {filepath.name}: {e}"}
+    return {"data": data.decode("ascii"), "mime_type": mime_type, "bytes": size}
+
+
+def get_image_dimensions(filepath: Path) -> dict:
+    """Get image dimensions, scale factor and color type from the file header."""
+    try:
+        info = read_image_info(filepath)
+    except (ImageInfoError, OSError):
         return {"width": None, "height": None}
+    return {
+        "width": info.width,
+        "height": info.height,
+        "scale": info.scale,
+        "color_type": info.color_type,
+    }
 
 
 def cleanup_old_screenshots(max_age_hours: int = 24) -> int:
@@ -320,4 +536,15 @@ def cleanup_old_screenshots(max_age_hours: int = 24) -> int:
         except Exception:
             pass
 
+    for filepath in SCREENSHOT_DIR.glob("*.webp"):
+        try:
+            mtime = datetime.fromtimestamp(filepath.stat().st_mtime)
+            age_hours = (now - mtime).total_seconds() / 3600
+
+            if age_hours > max_age_hours:
+                filepath.unlink()
+                deleted += 1
+        except Exception:
+            pass
+
     return deleted
@@ -1,22 +1,57 @@
 """MCP Server for screenshot capture."""
 
 import asyncio
+import sys
+from pathlib import Path
 
 from mcp.server import Server
 from mcp.server.stdio import stdio_server
-from mcp.types import Tool, TextContent
+from mcp.types import ImageContent, Tool, TextContent
 
+from burst import MAX_FRAMES, MIN_INTERVAL, capture_burst
+from postprocess import options_from_env, with_overrides
+from region import parse_region
 from screenshotter import (
+    add_subprocess_listener,
     capture_screen,
     capture_window,
     cleanup_old_screenshots,
+    encode_inline,
+    find_window_by_title,
     get_permission_instructions,
+    grab_frame,
+    inline_max_bytes_from_env,
+    list_windows,
+    window_index,
 )
+from windows import WindowSourceError
 
+# Shared helpers live next to the server directories
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from common.metrics import Metrics  # noqa: E402
+from common.startup import profile_startup  # noqa: E402
 
 # Create the MCP server
 server = Server("screenshot")
 
+# Latency of tool calls and external commands (server_stats, Prometheus file)
+metrics = Metrics("mcp_screenshot")
+
+
+def _record_subprocess(command: str, seconds: float, ok: bool) -> None:
+    """Time screencapture runs."""
+    metrics.observe("subprocess", seconds, command=command)
+    if not ok:
+        metrics.inc("subprocess_errors_total", command=command)
+
+
+add_subprocess_listener(_record_subprocess)
+metrics.gauge("window_index_hits", lambda: window_index.hits)
+metrics.gauge("window_index_refreshes", lambda: window_index.refreshes)
+
+# Most windows listed by the list_windows tool
+MAX_LISTED_WINDOWS = 200
+
 
 @server.list_tools()
 async def list_tools() -> list[Tool]:
@@ -25,10 +60,16 @@ async def list_tools() -> list[Tool]:
         Tool(
             name="screenshot",
             description=(
-                "Capture a screenshot of the screen or a specific window on macOS. "
+                "Capture a screenshot of the screen or a specific window "
+                "(macOS, or Linux with X11). "
                 "Use mode='screen' to capture the entire screen, or mode='window' "
                 "with window_title to capture a specific window. "
-                "Returns the file path and dimensions of the captured image."
+                "Returns the file path and dimensions of the captured image. "
+                "Set region to capture only part of it. "
+                "Set max_dimension and/or max_bytes to also get a smaller "
+                "re-encoded copy, cheaper for a vision model to read. "
+                "Set inline=true to get the image itself in the response "
+                "(the processed copy when there is one)."
             ),
             inputSchema={
                 "type": "object",
@@ -41,7 +82,7 @@ async def list_tools() -> list[Tool]:
                     },
                     "window_title": {
                         "type": "string",
-                        "description": "Title (or partial title) of the window to capture. Required when mode='window'.",
+                        "description": "Title or app name (or part of them) of the window to capture; the best fuzzy match is used. Required when mode='window'.",
                     },
                     "screen_index": {
                         "type": "integer",
@@ -59,24 +100,191 @@ async def list_tools() -> list[Tool]:
                         "description": "Delay in seconds before capturing.",
                         "default": 0,
                     },
+                    "region": {
+                        "type": "object",
+                        "description": "Capture only this rectangle, relative to the screen or window. units='points' for logical coordinates (pixels divided by the display scale).",
+                        "properties": {
+                            "x": {"type": "integer"},
+                            "y": {"type": "integer"},
+                            "width": {"type": "integer", "minimum": 1},
+                            "height": {"type": "integer", "minimum": 1},
+                            "units": {
+                                "type": "string",
+                                "enum": ["pixels", "points"],
+                                "default": "pixels",
+                            },
+                        },
+                        "required": ["x", "y", "width", "height"],
+                    },
+                    "max_dimension": {
+                        "type": "integer",
+                        "minimum": 1,
+                        "description": "Downscale a processed copy so its longest edge is at most this many pixels.",
+                    },
+                    "max_bytes": {
+                        "type": "integer",
+                        "minimum": 1,
+                        "description": "Lower the quality (then the size) of a processed copy until it fits in this many bytes.",
+                    },
+                    "inline": {
+                        "type": "boolean",
+                        "description": "Also return the image as image content, saving a read of the file. Falls back to the path alone when the image is over the inline size cap.",
+                        "default": False,
+                    },
                 },
                 "required": [],
             },
-        )
+        ),
+        Tool(
+            name="screenshot_burst",
+            description=(
+                "Capture several frames of the screen or a window at a sub-second "
+                "interval in one call, e.g. to watch a progress bar or an "
+                "animation. Frames that barely changed since the last kept one "
+                "are dropped. Returns the kept frames with their time offsets and "
+                "the boxes (x, y, width, height) of the regions that changed."
+            ),
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "mode": {
+                        "type": "string",
+                        "enum": ["screen", "window"],
+                        "description": "Capture mode: 'screen' for full screen, 'window' for a specific window.",
+                        "default": "screen",
+                    },
+                    "window_title": {
+                        "type": "string",
+                        "description": "Title or app name (or part of them) of the window to capture; the best fuzzy match is used. Required when mode='window'.",
+                    },
+                    "screen_index": {
+                        "type": "integer",
+                        "description": "Screen index for multi-monitor setups. 0 = main screen.",
+                        "default": 0,
+                    },
+                    "frames": {
+                        "type": "integer",
+                        "minimum": 2,
+                        "maximum": MAX_FRAMES,
+                        "description": "Number of frames to capture.",
+                        "default": 10,
+                    },
+                    "interval": {
+                        "type": "number",
+                        "minimum": MIN_INTERVAL,
+                        "description": "Seconds between two frames.",
+                        "default": 0.5,
+                    },
+                    "threshold": {
+                        "type": "number",
+                        "minimum": 0,
+                        "description": "Percent of pixels that must change for a frame to be kept.",
+                        "default": 0.5,
+                    },
+                    "format": {
+                        "type": "string",
+                        "enum": ["png", "jpg"],
+                        "description": "Image format.",
+                        "default": "png",
+                    },
+                    "region": {
+                        "type": "object",
+                        "description": "Capture only this rectangle of the screen or window (see screenshot).",
+                        "properties": {
+                            "x": {"type": "integer"},
+                            "y": {"type": "integer"},
+                            "width": {"type": "integer", "minimum": 1},
+                            "height": {"type": "integer", "minimum": 1},
+                            "units": {
+                                "type": "string",
+                                "enum": ["pixels", "points"],
+                                "default": "pixels",
+                            },
+                        },
+                        "required": ["x", "y", "width", "height"],
+                    },
+                    "max_dimension": {
+                        "type": "integer",
+                        "minimum": 1,
+                        "description": "Also write downscaled copies of kept frames with this longest edge.",
+                    },
+                    "max_bytes": {
+                        "type": "integer",
+                        "minimum": 1,
+                        "description": "Byte budget of the processed copies of kept frames.",
+                    },
+                },
+                "required": [],
+            },
+        ),
+        Tool(
+            name="list_windows",
+            description=(
+                "List the on-screen windows that mode='window' can capture, "
+                "as 'App: Title'. With query, only the windows matching it, "
+                "best match first (the one a capture would pick)."
+            ),
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "query": {
+                        "type": "string",
+                        "description": "Title or app name (or part of them) to rank windows by.",
+                    },
+                    "limit": {
+                        "type": "integer",
+                        "minimum": 1,
+                        "maximum": MAX_LISTED_WINDOWS,
+                        "description": "Maximum number of windows listed.",
+                        "default": 50,
+                    },
+                },
+                "required": [],
+            },
+        ),
+        Tool(
+            name="server_stats",
+            description=(
+                "Show screenshot server statistics: capture latency percentiles, "
+                "call counts and errors."
+            ),
+            inputSchema={"type": "object", "properties": {}, "required": []},
+        ),
     ]
 
 
 @server.call_tool()
-async def call_tool(name: str, arguments: dict) -> list[TextContent]:
+async def call_tool(name: str, arguments: dict) -> list[TextContent | ImageContent]:
     """Handle tool calls."""
-    if name != "screenshot":
-        return [TextContent(type="text", text=f"Unknown tool: {name}")]
+    with metrics.timer("tool_call", tool=name):
+        if name == "server_stats":
+            return [TextContent(type="text", text=metrics.render_text())]
+        if name == "screenshot_burst":
+            return await _handle_screenshot_burst(arguments)
+        if name == "list_windows":
+            return await _handle_list_windows(arguments)
+        if name != "screenshot":
+            return [TextContent(type="text", text=f"Unknown tool: {name}")]
+        return await _handle_screenshot(arguments)
+
 
+async def _handle_screenshot(arguments: dict) -> list[TextContent | ImageContent]:
+    """Handle screenshot tool call."""
     mode = arguments.get("mode", "screen")
     window_title = arguments.get("window_title")
     screen_index = arguments.get("screen_index", 0)
     format = arguments.get("format", "png")
     delay = arguments.get("delay", 0)
+    inline = arguments.get("inline", False)
+    try:
+        region = parse_region(arguments.get("region"))
+    except ValueError as e:
+        return [TextContent(type="text", text=f"Error: {e}")]
+    process = with_overrides(
+        options_from_env(),
+        max_dimension=arguments.get("max_dimension"),
+        max_bytes=arguments.get("max_bytes"),
+    )
 
     # Cleanup old screenshots (non-blocking, best effort)
     try:
@@ -93,20 +301,28 @@ async def call_tool(name: str, arguments: dict) -> list[TextContent]:
                     text="Error: window_title is required when mode='window'",
                 )
             ]
-        result = capture_window(
+        # Capture and image processing block: keep them off the event loop
+        result = await asyncio.to_thread(
+            capture_window,
             window_title=window_title,
             format=format,
             delay=delay,
+            process=process,
+            region=region,
         )
     else:  # mode == "screen"
-        result = capture_screen(
+        result = await asyncio.to_thread(
+            capture_screen,
             screen_index=screen_index,
             format=format,
             delay=delay,
+            process=process,
+            region=region,
         )
 
     # Handle errors
     if "error" in result:
+        metrics.inc("capture_errors_total", mode=mode)
         error_msg = result["error"]
 
         # Add available windows if present
@@ -130,15 +346,158 @@ async def call_tool(name: str, arguments: dict) -> list[TextContent]:
     fmt = result.get("format", "png")
 
     response = f"Screenshot captured: {path}\nDimensions: {width}x{height} ({fmt})"
+    if region is not None:
+        response += (
+            f"\nRegion: {region.width}x{region.height} at "
+            f"{region.x},{region.y} ({region.units})"
+        )
+    if result.get("unchanged"):
+        metrics.inc("unchanged_total", mode=mode)
+        response += (
+            f"\nUnchanged: same image as the capture of "
+            f"{result['unchanged_since']} (path reused, new file discarded)"
+        )
+    if result.get("scale"):
+        response += f"\nScale: {result['scale']:g}x"
+    if result.get("color_type"):
+        response += f"\nColor: {result['color_type']}"
 
     if "window_title" in result:
         response += f"\nWindow: {result['window_title']}"
 
-    return [TextContent(type="text", text=response)]
+    if "processed_path" in result:
+        response += (
+            f"\nProcessed: {result['processed_path']}\n"
+            f"Processed dimensions: {result['processed_width']}x"
+            f"{result['processed_height']} ({result['processed_format']}, "
+            f"{result['processed_bytes'] // 1024} KB"
+        )
+        if "quality" in result:
+            response += f", quality {result['quality']}"
+        response += ")"
+        if result["over_budget"]:
+            response += "\nWarning: could not fit max_bytes, smallest encoding kept"
+    elif "processing_error" in result:
+        metrics.inc("processing_errors_total")
+        response += f"\nProcessing skipped: {result['processing_error']}"
+
+    if not inline:
+        return [TextContent(type="text", text=response)]
+
+    image_path = Path(result.get("processed_path", path))
+    encoded = await asyncio.to_thread(
+        encode_inline, image_path, inline_max_bytes_from_env()
+    )
+    if "error" in encoded:
+        metrics.inc("inline_fallbacks_total")
+        response += (
+            f"\nNot inlined ({encoded['error']}); read the file, "
+            "or retry with max_bytes"
+        )
+        return [TextContent(type="text", text=response)]
+
+    response += f"\nInlined: {image_path.name} ({encoded['bytes'] // 1024} KB)"
+    return [
+        TextContent(type="text", text=response),
+        ImageContent(type="image", data=encoded["data"], mimeType=encoded["mime_type"]),
+    ]
+
+
+async def _handle_screenshot_burst(arguments: dict) -> list[TextContent]:
+    """Handle screenshot_burst tool call."""
+    mode = arguments.get("mode", "screen")
+    window_title = arguments.get("window_title")
+    screen_index = arguments.get("screen_index", 0)
+    try:
+        region = parse_region(arguments.get("region"))
+    except ValueError as e:
+        return [TextContent(type="text", text=f"Error: {e}")]
+    process = with_overrides(
+        options_from_env(),
+        max_dimension=arguments.get("max_dimension"),
+        max_bytes=arguments.get("max_bytes"),
+    )
+
+    window_id = None
+    if mode == "window":
+        if not window_title:
+            return [
+                TextContent(
+                    type="text",
+                    text="Error: window_title is required when mode='window'",
+                )
+            ]
+        window_info = await asyncio.to_thread(find_window_by_title, window_title)
+        if window_info is None:
+            available = await asyncio.to_thread(list_windows)
+            error_msg = f"Window not found: '{window_title}'"
+            if available:
+                error_msg += "\n\nAvailable windows:\n" + "\n".join(
+                    f"  - {w}" for w in available[:10]
+                )
+            return [TextContent(type="text", text=f"Burst failed: {error_msg}")]
+        window_id = window_info["id"]
+
+    result = await asyncio.to_thread(
+        capture_burst,
+        lambda: grab_frame(screen_index, window_id, region),
+        frames=arguments.get("frames", 10),
+        interval=arguments.get("interval", 0.5),
+        threshold=arguments.get("threshold", 0.5),
+        format=arguments.get("format", "png"),
+        process=process,
+    )
+    if "error" in result:
+        metrics.inc("capture_errors_total", mode="burst")
+        return [TextContent(type="text", text=f"Burst failed: {result['error']}")]
+
+    kept = result["frames"]
+    metrics.inc("burst_frames_total", len(kept), kept="yes")
+    metrics.inc("burst_frames_total", result["captured"] - len(kept), kept="no")
+    lines = [
+        f"Burst: kept {len(kept)} of {result['captured']} frames "
+        f"over {result['duration']:.2f}s"
+    ]
+    for frame in kept:
+        line = (
+            f"#{frame['index']} +{frame['t']:.3f}s {frame['path']} "
+            f"({frame['width']}x{frame['height']}, changed {frame['changed']:g}%)"
+        )
+        if frame["boxes"]:
+            line += " boxes: " + " ".join(
+                "[{},{} {}x{}]".format(*box) for box in frame["boxes"]
+            )
+        if "processed_path" in frame:
+            line += f"\n    processed: {frame['processed_path']}"
+        if "error" in frame:
+            line += f"\n    {frame['error']}"
+        lines.append(line)
+    return [TextContent(type="text", text="\n".join(lines))]
+
+
+async def _handle_list_windows(arguments: dict) -> list[TextContent]:
+    """Handle list_windows tool call."""
+    query = arguments.get("query") or ""
+    limit = max(1, min(MAX_LISTED_WINDOWS, int(arguments.get("limit", 50))))
+
+    try:
+        windows = await asyncio.to_thread(window_index.search, query, limit)
+    except WindowSourceError as e:
+        return [TextContent(type="text", text=f"Error: {e}")]
+
+    if not windows:
+        text = f"No window matches '{query}'" if query.strip() else "No windows"
+        return [TextContent(type="text", text=text)]
+
+    heading = f"Windows matching '{query}'" if query.strip() else "Windows"
+    lines = [f"{heading} ({len(windows)}):"]
+    lines.extend(f"  - {window.label} (id {window.id})" for window in windows)
+    return [TextContent(type="text", text="\n".join(lines))]
 
 
 async def main():
     """Run the MCP server."""
+    metrics.start_exporter_from_env()
     async with stdio_server() as (read_stream, write_stream):
         await server.run(
             read_stream, write_stream, server.create_initialization_options()
@@ -147,7 +506,10 @@ async def main():
 
 def run():
     """Entry point for the server."""
-    asyncio.run(main())
+    if "--profile-startup" in sys.argv[1:]:
+        print(profile_startup(Path(__file__).resolve().parent))
+    else:
+        asyncio.run(main())
 
 
 if __name__ == "__main__":
@@ -0,0 +1,57 @@
+"""Capture files: unique names and unchanged captures of several targets."""
+
+import pytest
+
+import screenshotter
+from dedupe import CaptureCache
+
+Image = pytest.importorskip("PIL.Image")
+
+
+@pytest.fixture(autouse=True)
+def screenshot_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(screenshotter, "SCREENSHOT_DIR", tmp_path)
+    monkeypatch.setattr(screenshotter, "capture_cache", CaptureCache("exact"))
+    return tmp_path
+
+
+def capture(target: tuple, size: int, color: str) -> dict:
+    """What a backend does: write a new file, then finish the capture."""
+    path = screenshotter.generate_filename(target[0])
+    Image.new("RGB", (size, size), color).save(path)
+    return screenshotter.finish_capture(target, {"path": str(path)}, None)
+
+
+def test_file_names_are_unique_within_a_second():
+    names = {screenshotter.generate_filename("screen") for _ in range(100)}
+
+    assert len(names) == 100
+
+
+def test_targets_captured_in_the_same_second_keep_their_files():
+    screen = ("screen", 0, "png", None)
+    region = ("screen", 0, "png", (0, 0, 16, 16))
+
+    first = capture(screen, 64, "red")
+    other = capture(region, 16, "blue")
+    again = capture(screen, 64, "red")
+
+    assert other["path"] != first["path"]
+    assert again["unchanged"] and again["path"] == first["path"]
+    assert (again["width"], again["height"]) == (64, 64)
+    with Image.open(again["path"]) as image:
+        assert image.size == (64, 64)
+        assert image.getpixel((0, 0)) == (255, 0, 0)
+    with Image.open(other["path"]) as image:
+        assert image.getpixel((0, 0)) == (0, 0, 255)
+
+
+def test_unchanged_capture_deletes_the_new_file(screenshot_dir):
+    screen = ("screen", 0, "png", None)
+
+    first = capture(screen, 32, "red")
+    capture(screen, 32, "red")
+
+    assert [path.name for path in screenshot_dir.iterdir()] == [
+        first["path"].rsplit("/", 1)[1]
+    ]
@@ -0,0 +1,66 @@
+"""Capture cache: exact and perceptual hashes of repeated captures."""
+
+import pytest
+
+import dedupe
+from dedupe import CaptureCache
+
+Image = pytest.importorskip("PIL.Image")
+
+
+def save(path, dot: bool = False):
+    """A gradient, optionally with one changed pixel."""
+    image = Image.linear_gradient("L").resize((128, 64)).convert("RGB")
+    if dot:
+        image.putpixel((100, 10), (255, 0, 0))
+    image.save(path)
+    return path
+
+
+def probe(path) -> dict:
+    return {"width": 128, "height": 64}
+
+
+def test_every_capture_gets_both_hashes(tmp_path):
+    cache = CaptureCache("exact")
+
+    entry, unchanged = cache.check("screen", save(tmp_path / "a.png"), probe)
+
+    assert not unchanged
+    assert len(entry.exact) == 32
+    assert entry.perceptual is not None
+    assert entry.dimensions == probe(entry.path)
+
+
+def test_repeated_frame_matches_without_decoding(tmp_path, monkeypatch):
+    cache = CaptureCache("exact")
+    first, _ = cache.check("screen", save(tmp_path / "a.png"), probe)
+    decoded = []
+    monkeypatch.setattr(dedupe, "perceptual_hash", lambda path: decoded.append(path))
+
+    entry, unchanged = cache.check("screen", save(tmp_path / "b.png"), probe)
+
+    assert unchanged and entry is first
+    assert decoded == []
+    assert cache.hits == 1
+
+
+@pytest.mark.parametrize("mode, unchanged", [("exact", False), ("perceptual", True)])
+def test_near_identical_frame(tmp_path, mode, unchanged):
+    cache = CaptureCache(mode, distance=4)
+    cache.check("screen", save(tmp_path / "a.png"), probe)
+
+    entry, same = cache.check("screen", save(tmp_path / "b.png", dot=True), probe)
+
+    assert same is unchanged
+    assert entry.path.name == ("a.png" if unchanged else "b.png")
+
+
+def test_targets_are_separate_and_off_keeps_everything(tmp_path):
+    cache = CaptureCache("exact")
+    cache.check("screen", save(tmp_path / "a.png"), probe)
+
+    assert not cache.check("window", save(tmp_path / "b.png"), probe)[1]
+    off = CaptureCache("off")
+    off.check("screen", save(tmp_path / "c.png"), probe)
+    assert not off.check("screen", save(tmp_path / "d.png"), probe)[1]
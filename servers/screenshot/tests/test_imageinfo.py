@@ -0,0 +1,206 @@
+"""PNG and JPEG header parsing on synthetic files."""
+
+import struct
+import zlib
+
+import pytest
+
+from imageinfo import PNG_SIGNATURE, ImageInfoError, read_image_info
+from screenshotter import get_image_dimensions
+
+
+def png_chunk(kind: bytes, data: bytes) -> bytes:
+    crc = zlib.crc32(kind + data)
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", crc)
+
+
+def png(
+    width: int = 640,
+    height: int = 480,
+    color: int = 2,
+    bit_depth: int = 8,
+    phys: bytes = b"",
+) -> bytes:
+    """A PNG header: IHDR, optional pHYs, then image data that is never read."""
+    ihdr = struct.pack(">IIBBBBB", width, height, bit_depth, color, 0, 0, 0)
+    return (
+        PNG_SIGNATURE
+        + png_chunk(b"IHDR", ihdr)
+        + phys
+        + png_chunk(b"IDAT", b"\x00" * 16)
+        + png_chunk(b"IEND", b"")
+    )
+
+
+def phys(x: int, y: int, unit: int = 1) -> bytes:
+    return png_chunk(b"pHYs", struct.pack(">IIB", x, y, unit))
+
+
+def jpeg_segment(marker: int, data: bytes) -> bytes:
+    return bytes([0xFF, marker]) + struct.pack(">H", len(data) + 2) + data
+
+
+def jfif(unit: int, x: int, y: int) -> bytes:
+    return jpeg_segment(
+        0xE0, b"JFIF\x00\x01\x01" + struct.pack(">BHHBB", unit, x, y, 0, 0)
+    )
+
+
+def sof(
+    marker: int = 0xC0,
+    width: int = 800,
+    height: int = 600,
+    components: int = 3,
+    precision: int = 8,
+) -> bytes:
+    data = struct.pack(">BHHB", precision, height, width, components)
+    return jpeg_segment(marker, data + b"\x01\x11\x00" * components)
+
+
+def jpeg(*segments: bytes) -> bytes:
+    """SOI, the segments, then a scan that is never read."""
+    return b"\xff\xd8" + b"".join(segments) + b"\xff\xda\x00\x02\xff\xd9"
+
+
+def write(tmp_path, name: str, data: bytes):
+    path = tmp_path / name
+    path.write_bytes(data)
+    return path
+
+
+@pytest.mark.parametrize(
+    "color, color_type",
+    [
+        (0, "grayscale"),
+        (2, "rgb"),
+        (3, "palette"),
+        (4, "grayscale+alpha"),
+        (6, "rgba"),
+        (5, "unknown (5)"),
+    ],
+)
+def test_png_color_types(tmp_path, color, color_type):
+    info = read_image_info(write(tmp_path, "a.png", png(color=color, bit_depth=16)))
+
+    assert (info.format, info.width, info.height) == ("png", 640, 480)
+    assert info.color_type == color_type
+    assert info.bit_depth == 16
+    assert info.dpi is None and info.scale is None
+
+
+def test_png_phys_gives_dpi_and_scale(tmp_path):
+    # 144 DPI (a Retina capture) is 5669.29 pixels per meter
+    path = write(tmp_path, "a.png", png(phys=phys(5669, 5669)))
+
+    info = read_image_info(path)
+
+    assert info.dpi == (144.0, 144.0)
+    assert info.scale == 2.0
+
+
+def test_png_phys_without_unit_is_ignored(tmp_path):
+    # Unit 0: aspect ratio only
+    info = read_image_info(write(tmp_path, "a.png", png(phys=phys(2, 1, unit=0))))
+
+    assert info.dpi is None
+
+
+def test_png_phys_after_image_data_is_ignored(tmp_path):
+    data = png()
+    data = data.replace(
+        png_chunk(b"IEND", b""), phys(5669, 5669) + png_chunk(b"IEND", b"")
+    )
+
+    assert read_image_info(write(tmp_path, "a.png", data)).dpi is None
+
+
+def test_baseline_jpeg_with_jfif_density(tmp_path):
+    path = write(tmp_path, "a.jpg", jpeg(jfif(1, 144, 144), sof(0xC0)))
+
+    info = read_image_info(path)
+
+    assert (info.format, info.width, info.height) == ("jpeg", 800, 600)
+    assert info.color_type == "ycbcr"
+    assert info.bit_depth == 8
+    assert info.dpi == (144.0, 144.0)
+    assert info.scale == 2.0
+
+
+def test_progressive_jpeg_after_other_segments(tmp_path):
+    # DQT and DHT come before the progressive frame header (SOF2)
+    path = write(
+        tmp_path,
+        "a.jpg",
+        jpeg(
+            jfif(2, 28, 28),
+            jpeg_segment(0xDB, b"\x00" + b"\x01" * 64),
+            jpeg_segment(0xC4, b"\x00" * 17),
+            sof(0xC2, width=1024, height=768, components=1, precision=12),
+        ),
+    )
+
+    info = read_image_info(path)
+
+    assert (info.width, info.height) == (1024, 768)
+    assert info.color_type == "grayscale"
+    assert info.bit_depth == 12
+    # 28 dots per centimeter
+    assert info.dpi == (71.1, 71.1)
+
+
+def test_jpeg_fill_bytes_and_aspect_only_jfif(tmp_path):
+    data = jpeg(jfif(0, 1, 1), b"\xff\xff" + sof(0xC1, components=4)[1:])
+
+    info = read_image_info(write(tmp_path, "a.jpg", data))
+
+    assert info.color_type == "cmyk"
+    assert info.dpi is None
+
+
+def test_real_files_match_pillow(tmp_path):
+    Image = pytest.importorskip("PIL.Image")
+    image = Image.new("RGB", (123, 45), "red")
+    image.save(tmp_path / "a.png", dpi=(144, 144))
+    image.save(tmp_path / "a.jpg", progressive=True, dpi=(96, 96))
+
+    png_info = read_image_info(tmp_path / "a.png")
+    jpeg_info = read_image_info(tmp_path / "a.jpg")
+
+    assert (png_info.width, png_info.height, png_info.scale) == (123, 45, 2.0)
+    assert (jpeg_info.width, jpeg_info.height) == (123, 45)
+    assert jpeg_info.dpi == (96.0, 96.0)
+
+
+@pytest.mark.parametrize(
+    "name, data",
+    [
+        ("empty.png", b""),
+        ("text.png", b"not an image"),
+        ("signature.png", PNG_SIGNATURE),
+        ("short-ihdr.png", png()[:20]),
+        ("no-ihdr.png", PNG_SIGNATURE + png_chunk(b"tEXt", b"a\x00b")),
+        ("short-phys.png", png(phys=phys(5669, 5669))[:45]),
+        ("soi.jpg", b"\xff\xd8"),
+        ("short-sof.jpg", jpeg(sof())[:8]),
+        ("no-sof.jpg", jpeg(jfif(1, 72, 72))),
+        ("bad-marker.jpg", b"\xff\xd8\x00\x00"),
+        ("bad-length.jpg", b"\xff\xd8\xff\xe0\x00\x01"),
+        ("short-segment.jpg", b"\xff\xd8" + jfif(1, 72, 72)[:10]),
+    ],
+)
+def test_malformed_files(tmp_path, name, data):
+    path = write(tmp_path, name, data)
+
+    with pytest.raises(ImageInfoError):
+        read_image_info(path)
+    # Capture results report unknown dimensions instead of failing
+    assert get_image_dimensions(path) == {"width": None, "height": None}
+
+
+def test_missing_file(tmp_path):
+    with pytest.raises(OSError):
+        read_image_info(tmp_path / "missing.png")
+    assert get_image_dimensions(tmp_path / "missing.png") == {
+        "width": None,
+        "height": None,
+    }
@@ -0,0 +1,83 @@
+"""Regions: parsing, clipping and cropping capture files."""
+
+import os
+
+import pytest
+
+from region import Region, crop_file, parse_region
+
+Image = pytest.importorskip("PIL.Image")
+
+
+def noise(path, size=(200, 200), **options):
+    """An image that barely compresses: its data is spread over the file."""
+    image = Image.frombytes("RGB", size, os.urandom(size[0] * size[1] * 3))
+    image.save(path, **options)
+    return image
+
+
+def test_parse_region():
+    assert parse_region(None) is None
+    assert parse_region({"x": 1, "y": "2", "width": 3, "height": 4}) == Region(
+        1, 2, 3, 4
+    )
+    for value in (
+        [1, 2, 3, 4],
+        {"x": 1, "y": 2, "width": 3},
+        {"x": 1, "y": 2, "width": 0, "height": 4},
+        {"x": 1, "y": 2, "width": 3, "height": 4, "units": "inches"},
+    ):
+        with pytest.raises(ValueError):
+            parse_region(value)
+
+
+def test_points_and_clipping():
+    region = Region(10, 20, 30, 40, "points")
+
+    assert region.to_pixels(2.0) == Region(20, 40, 60, 80)
+    assert region.to_pixels(1.0).units == "pixels"
+    assert Region(-5, 90, 20, 20).clip(100, 100) == Region(0, 90, 15, 10)
+    assert Region(100, 0, 5, 5).clip(100, 100) is None
+
+
+def test_crop_png_keeps_pixels_and_resolution(tmp_path):
+    path = tmp_path / "capture.png"
+    original = noise(path, dpi=(144, 144))
+
+    # 144 DPI: points are 2 pixels, and the region is clipped to the image
+    crop_file(path, Region(40, 50, 100, 100, "points"))
+
+    with Image.open(path) as cropped:
+        assert cropped.size == (120, 100)
+        assert cropped.tobytes() == original.crop((80, 100, 200, 200)).tobytes()
+        assert round(cropped.info["dpi"][0]) == 144
+
+
+def test_crop_png_decodes_only_down_to_the_region(tmp_path):
+    path = tmp_path / "capture.png"
+    original = noise(path)
+    # Drop the second half of the image data: rows below are unreadable
+    path.write_bytes(path.read_bytes()[: path.stat().st_size // 2])
+
+    crop_file(path, Region(10, 5, 50, 20))
+
+    with Image.open(path) as cropped:
+        assert cropped.tobytes() == original.crop((10, 5, 60, 25)).tobytes()
+
+
+def test_crop_jpeg(tmp_path):
+    path = tmp_path / "capture.jpg"
+    noise(path, format="JPEG", progressive=True)
+
+    crop_file(path, Region(0, 150, 80, 80))
+
+    with Image.open(path) as cropped:
+        assert (cropped.format, cropped.size) == ("JPEG", (80, 50))
+
+
+def test_crop_outside_the_image(tmp_path):
+    path = tmp_path / "capture.png"
+    noise(path)
+
+    with pytest.raises(ValueError):
+        crop_file(path, Region(200, 0, 10, 10))
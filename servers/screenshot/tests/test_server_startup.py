@@ -0,0 +1,69 @@
+"""Cold start: the first list_tools over stdio within budget."""
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+SERVER = Path(__file__).resolve().parent.parent / "server.py"
+
+# Median time to first list_tools, in milliseconds (as benchmarks/bench_startup.py)
+BUDGET_MS = 1500.0
+
+REQUESTS = [
+    {
+        "jsonrpc": "2.0",
+        "id": 1,
+        "method": "initialize",
+        "params": {
+            "protocolVersion": "2025-06-18",
+            "capabilities": {},
+            "clientInfo": {"name": "test-server-startup", "version": "1"},
+        },
+    },
+    {"jsonrpc": "2.0", "method": "notifications/initialized"},
+    {"jsonrpc": "2.0", "id": 2, "method": "tools/list"},
+]
+
+
+def first_list_tools(env: dict) -> float:
+    """Seconds from spawning the server over stdio to its tools/list response."""
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, str(SERVER)],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        env=env,
+    )
+    try:
+        for request in REQUESTS:
+            process.stdin.write(json.dumps(request).encode() + b"\n")
+        process.stdin.flush()
+        while line := process.stdout.readline():
+            message = json.loads(line)
+            if message.get("id") == 2:
+                assert message["result"]["tools"]
+                return time.perf_counter() - start
+        raise AssertionError("the server exited before answering tools/list")
+    finally:
+        process.stdin.close()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+@pytest.mark.slow
+def test_first_list_tools_within_budget():
+    pytest.importorskip("mcp")
+    env = {**os.environ, "PYTHONPATH": str(SERVER.parent)}
+
+    latencies = [first_list_tools(env) for _ in range(3)]
+
+    assert statistics.median(latencies) * 1000 < BUDGET_MS
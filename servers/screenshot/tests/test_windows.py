@@ -0,0 +1,218 @@
+"""Window index: enumeration reuse and ranked matching on a fixed list."""
+
+import pytest
+
+from windows import (
+    EXACT,
+    FUZZY,
+    LABEL,
+    MIN_FUZZY,
+    OWNER,
+    PREFIX,
+    TITLE,
+    WORDS,
+    Window,
+    WindowIndex,
+    WindowSource,
+    WindowSourceError,
+    _keys,
+    match_score,
+)
+
+
+class FixedSource(WindowSource):
+    """Windows from a list that tests change between enumerations."""
+
+    def __init__(self, *windows: Window):
+        self.windows = list(windows)
+        self.calls = 0
+        self.error = False
+
+    def list_windows(self) -> list[Window]:
+        self.calls += 1
+        if self.error:
+            raise WindowSourceError("Cannot list windows")
+        return list(self.windows)
+
+
+class Clock:
+    """Manually advanced monotonic clock."""
+
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+TERMINAL = Window(1, "Terminal", "bash — 80x24")
+EDITOR = Window(2, "Code", "notes.txt — project")
+BROWSER = Window(3, "Firefox", "Release notes — Mozilla Firefox")
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def source():
+    return FixedSource(TERMINAL, EDITOR, BROWSER)
+
+
+@pytest.fixture
+def index(source, clock):
+    return WindowIndex(source, ttl=2.0, clock=clock)
+
+
+def score(query: str, window: Window) -> float:
+    return match_score(query.casefold(), _keys(window))
+
+
+def test_enumeration_reused_within_ttl(index, source, clock):
+    assert index.windows() == [TERMINAL, EDITOR, BROWSER]
+    clock.now += 1.9
+    assert index.find("terminal") == TERMINAL
+    assert index.search("") == [TERMINAL, EDITOR, BROWSER]
+
+    assert source.calls == 1
+    assert (index.refreshes, index.hits) == (1, 2)
+
+
+def test_enumeration_expires_after_ttl(index, source, clock):
+    index.windows()
+    source.windows.remove(EDITOR)
+    clock.now += 2.0
+
+    assert index.windows() == [TERMINAL, BROWSER]
+    assert source.calls == 2
+
+
+def test_zero_ttl_enumerates_every_time(source, clock):
+    index = WindowIndex(source, ttl=0, clock=clock)
+
+    index.windows()
+    index.windows()
+
+    assert source.calls == 2
+    assert index.hits == 0
+
+
+def test_invalidate(index, source):
+    index.windows()
+    source.windows.append(Window(4, "Slack", "general"))
+
+    index.invalidate()
+
+    assert index.find("slack").id == 4
+    assert source.calls == 2
+
+
+def test_new_window_found_by_one_refresh(index, source):
+    index.windows()
+    source.windows.append(Window(4, "Slack", "general"))
+
+    # Not in the cached enumeration: enumerated again once
+    assert index.find("slack").id == 4
+    assert source.calls == 2
+    # Found in the fresh enumeration: no further refresh
+    assert index.find("slack").id == 4
+    assert source.calls == 2
+
+
+def test_no_match_refreshes_once(index, source):
+    index.windows()
+
+    assert index.find("nothing like it") is None
+    assert source.calls == 2
+    assert index.search("still nothing") == []
+    assert source.calls == 3
+
+
+def test_no_match_in_fresh_enumeration_does_not_refresh(index, source):
+    # The first lookup enumerates: no second enumeration for the miss
+    assert index.find("nothing like it") is None
+    assert source.calls == 1
+
+
+def test_source_errors_propagate(index, source):
+    source.error = True
+
+    with pytest.raises(WindowSourceError):
+        index.windows()
+    with pytest.raises(WindowSourceError):
+        index.find("terminal")
+
+
+def test_match_kinds_rank_in_order():
+    window = Window(1, "Terminal", "bash session")
+    cases = [
+        ("bash session", EXACT),
+        ("Terminal", EXACT),
+        ("terminal: bash session", EXACT),
+        ("bash", PREFIX),
+        ("term", PREFIX),
+        ("session", TITLE),
+        ("minal", OWNER),
+        ("l: bash", LABEL),
+        ("ter ses", WORDS),
+        ("trmnl", None),  # Fuzzy: scored by how tightly the letters cluster
+        ("xyz", 0),
+    ]
+    for query, expected in cases:
+        if expected is None:
+            assert MIN_FUZZY <= score(query, window) < FUZZY, query
+        else:
+            assert score(query, window) == expected, query
+    assert EXACT > PREFIX > TITLE > OWNER > LABEL > WORDS > FUZZY > MIN_FUZZY
+
+
+def test_search_ranks_best_match_first(source, clock):
+    source.windows = [
+        Window(1, "Viewer", "n-o-t-e-s"),  # Fuzzy
+        Window(2, "Editor", "my notes"),  # Title
+        Window(3, "Notes App", "Inbox"),  # Owner prefix
+        Window(4, "Files", "notes"),  # Exact title
+        Window(5, "Notebook", "Untitled"),  # No match
+        Window(6, "MyNotes", "Inbox"),  # Owner
+    ]
+    index = WindowIndex(source, clock=clock)
+
+    assert [w.id for w in index.search("notes")] == [4, 3, 2, 6, 1]
+    assert [w.id for w in index.search("notes", limit=2)] == [4, 3]
+
+
+def test_ties_keep_source_order(source, clock):
+    source.windows = [
+        Window(7, "Terminal", "build"),
+        Window(3, "Terminal", "server"),
+        Window(5, "Terminal", "logs"),
+    ]
+    index = WindowIndex(source, clock=clock)
+
+    assert [w.id for w in index.search("term")] == [7, 3, 5]
+    assert index.find("terminal").id == 7
+
+
+def test_fuzzy_ranks_tighter_matches_first(source, clock):
+    source.windows = [
+        Window(1, "", "fir-e-fo-x"),  # Spread out
+        Window(2, "", "fire fox"),  # Tight
+    ]
+    index = WindowIndex(source, clock=clock)
+
+    assert [w.id for w in index.search("firfx")] == [2, 1]
+
+
+def test_fuzzy_cut_off():
+    # Letters over exactly twice their count: kept at MIN_FUZZY
+    assert score("abc", Window(1, "", "a--b-c")) == MIN_FUZZY
+    # Over more than twice their count: dropped
+    assert score("abc", Window(1, "", "a--b--c")) == 0
+    # Queries under 3 letters never match fuzzily
+    assert score("ac", Window(1, "", "abc")) == 0
+    assert score("abc", Window(1, "", "abxc")) == 3 / 4 * FUZZY
+
+
+def test_queries_are_normalized(index):
+    assert index.find("  BASH   —  80X24 ") == TERMINAL
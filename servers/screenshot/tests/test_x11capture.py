@@ -0,0 +1,301 @@
+"""X11 capture against a virtual X server (skipped without Xvfb)."""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import shutil
+import struct
+import subprocess
+import zlib
+
+import pytest
+
+import x11capture
+from imageinfo import read_image_info
+from region import Region
+from x11capture import X11Error
+
+pytestmark = pytest.mark.skipif(
+    shutil.which("Xvfb") is None, reason="Xvfb is not installed"
+)
+
+WIDTH, HEIGHT = 320, 240
+RED, BLUE = (255, 0, 0), (0, 0, 255)
+BLACK = (0, 0, 0)
+
+XA_STRING = 31
+XA_WINDOW = 33
+PROP_MODE_REPLACE = 0
+
+
+class Client:
+    """A second X client owning the test windows (there is no window manager)."""
+
+    def __init__(self):
+        p, ul, i, ui = ctypes.c_void_p, ctypes.c_ulong, ctypes.c_int, ctypes.c_uint
+        self.x11 = ctypes.CDLL(ctypes.util.find_library("X11"))
+        for name, (restype, *argtypes) in {
+            "XOpenDisplay": (p, ctypes.c_char_p),
+            "XCloseDisplay": (i, p),
+            "XDefaultRootWindow": (ul, p),
+            "XCreateSimpleWindow": (ul, p, ul, i, i, ui, ui, ui, ul, ul),
+            "XMapWindow": (i, p, ul),
+            "XInternAtom": (ul, p, ctypes.c_char_p, i),
+            "XChangeProperty": (i, p, ul, ul, ul, i, i, p, i),
+            "XSync": (i, p, i),
+        }.items():
+            function = getattr(self.x11, name)
+            function.restype, function.argtypes = restype, argtypes
+        self.handle = self.x11.XOpenDisplay(None)
+        assert self.handle, "cannot open the virtual display"
+        self.root = self.x11.XDefaultRootWindow(self.handle)
+
+    def window(
+        self,
+        x: int,
+        y: int,
+        width: int,
+        height: int,
+        color: tuple[int, int, int],
+        mapped: bool = True,
+    ) -> int:
+        """A window filled with `color`."""
+        red, green, blue = color
+        window = self.x11.XCreateSimpleWindow(
+            self.handle,
+            self.root,
+            x,
+            y,
+            width,
+            height,
+            0,
+            0,
+            red << 16 | green << 8 | blue,
+        )
+        if mapped:
+            self.x11.XMapWindow(self.handle, window)
+        return window
+
+    def set_property(
+        self, window: int, name: str, kind: int, format: int, data: bytes
+    ) -> None:
+        count = len(data) * 8 // format
+        if format == 32:
+            # Xlib takes 32-bit items as C longs
+            data = struct.pack(f"{count}L", *struct.unpack(f"{count}I", data))
+        self.x11.XChangeProperty(
+            self.handle,
+            window,
+            self.atom(name),
+            kind,
+            format,
+            PROP_MODE_REPLACE,
+            data,
+            count,
+        )
+
+    def atom(self, name: str) -> int:
+        return self.x11.XInternAtom(self.handle, name.encode(), 0)
+
+    def sync(self) -> None:
+        self.x11.XSync(self.handle, 0)
+
+    def close(self) -> None:
+        self.x11.XCloseDisplay(self.handle)
+
+
+def start_xvfb() -> tuple[subprocess.Popen, str]:
+    """Xvfb on a free display number, and that display."""
+    read_end, write_end = os.pipe()
+    server = subprocess.Popen(
+        [
+            "Xvfb",
+            "-displayfd",
+            str(write_end),
+            "-screen",
+            "0",
+            f"{WIDTH}x{HEIGHT}x24",
+            "-br",  # Black root window
+            "-nolisten",
+            "tcp",
+        ],
+        pass_fds=(write_end,),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    os.close(write_end)
+    try:
+        ready, _, _ = select.select([read_end], [], [], 10)
+        number = os.read(read_end, 16).decode().strip() if ready else ""
+    finally:
+        os.close(read_end)
+    if not number:
+        server.kill()
+        pytest.skip("Xvfb did not start")
+    return server, f":{number}"
+
+
+@pytest.fixture(scope="module")
+def windows():
+    """
+    A virtual screen with a red window, a blue one partly off screen and an
+    unmapped one, listed by the (absent) window manager in that order.
+    """
+    server, display = start_xvfb()
+    environment = pytest.MonkeyPatch()
+    environment.setenv("DISPLAY", display)
+    if not x11capture.available():
+        server.kill()
+        pytest.skip("libX11 or libXext is missing")
+    client = Client()
+    red = client.window(20, 30, 100, 60, RED)
+    blue = client.window(260, 200, 100, 60, BLUE)
+    hidden = client.window(0, 0, 50, 50, RED, mapped=False)
+    utf8 = client.atom("UTF8_STRING")
+    client.set_property(red, "_NET_WM_NAME", utf8, 8, "notes.txt — Editor".encode())
+    client.set_property(red, "WM_CLASS", XA_STRING, 8, b"editor\0Editor\0")
+    # Legacy title only, in Latin-1
+    client.set_property(blue, "WM_NAME", XA_STRING, 8, "café".encode("latin-1"))
+    client.set_property(blue, "WM_CLASS", XA_STRING, 8, b"xterm\0XTerm\0")
+    ids = struct.pack("3I", red, blue, hidden)
+    client.set_property(client.root, "_NET_CLIENT_LIST", XA_WINDOW, 32, ids)
+    client.sync()
+    try:
+        yield {"red": red, "blue": blue, "hidden": hidden}
+    finally:
+        client.close()
+        environment.undo()
+        server.terminate()
+        server.wait()
+
+
+@pytest.fixture(params=["shm", "no-extension", "shm-failed"])
+def grab_path(request, monkeypatch, windows):
+    """
+    How pixels are read: through MIT-SHM, or with XGetImage when the server
+    lacks the extension or attaching the segment fails (remote display).
+    """
+    x11, xext, _ = x11capture._libs()
+    if request.param == "shm":
+        if not has_shm():
+            pytest.skip("The X server has no MIT-SHM extension")
+
+        def no_fallback(*args):
+            raise AssertionError("XGetImage used instead of MIT-SHM")
+
+        monkeypatch.setattr(x11, "XGetImage", no_fallback)
+    elif request.param == "no-extension":
+        monkeypatch.setattr(xext, "XShmQueryExtension", lambda handle: 0)
+    else:
+
+        def failed(*args):
+            raise X11Error("XShmAttach failed")
+
+        monkeypatch.setattr(x11capture._Display, "_grab_shm", failed)
+    return request.param
+
+
+def has_shm() -> bool:
+    """Whether the X server offers the MIT-SHM extension."""
+    with x11capture._lock, x11capture._Display() as display:
+        return bool(display.xext.XShmQueryExtension(display.handle))
+
+
+def read_png(path) -> list[list[tuple[int, int, int]]]:
+    """Pixels of an 8-bit RGB PNG written without row filters."""
+    data = path.read_bytes()
+    info = read_image_info(path)
+    position, compressed = 8, b""
+    while position < len(data):
+        (length,) = struct.unpack(">I", data[position : position + 4])
+        if data[position + 4 : position + 8] == b"IDAT":
+            compressed += data[position + 8 : position + 8 + length]
+        position += length + 12
+    raw = zlib.decompress(compressed)
+    stride = info.width * 3 + 1
+    rows = []
+    for start in range(0, stride * info.height, stride):
+        row = raw[start + 1 : start + stride]
+        rows.append([tuple(row[x : x + 3]) for x in range(0, len(row), 3)])
+    return rows
+
+
+def test_capture_screen(tmp_path, grab_path):
+    path = tmp_path / "screen.png"
+
+    x11capture.capture_screen(path)
+
+    pixels = read_png(path)
+    assert (len(pixels[0]), len(pixels)) == (WIDTH, HEIGHT)
+    assert pixels[5][5] == BLACK
+    assert pixels[35][25] == RED
+    assert pixels[89][119] == RED
+    assert pixels[90][120] == BLACK
+    assert pixels[230][300] == BLUE
+
+
+def test_capture_screen_region(tmp_path, grab_path):
+    path = tmp_path / "region.png"
+
+    # From the red window's bottom right corner, clipped by the screen
+    x11capture.capture_screen(path, region=Region(100, 80, 300, 300))
+
+    pixels = read_png(path)
+    assert (len(pixels[0]), len(pixels)) == (220, 160)
+    assert pixels[0][0] == RED
+    assert pixels[9][19] == RED
+    assert pixels[10][20] == BLACK
+    assert pixels[159][219] == BLUE
+
+
+def test_capture_window(tmp_path, windows, grab_path):
+    path = tmp_path / "window.png"
+
+    x11capture.capture_window(path, windows["red"])
+
+    pixels = read_png(path)
+    assert (len(pixels[0]), len(pixels)) == (100, 60)
+    assert {pixel for row in pixels for pixel in row} == {RED}
+
+
+def test_capture_window_region_and_screen_edge(tmp_path, windows, grab_path):
+    region_path, edge_path = tmp_path / "region.png", tmp_path / "edge.png"
+
+    x11capture.capture_window(
+        region_path, windows["red"], region=Region(90, 50, 30, 30)
+    )
+    # 60x40 of the blue window are on screen
+    x11capture.capture_window(edge_path, windows["blue"])
+
+    region = read_png(region_path)
+    assert (len(region[0]), len(region)) == (10, 10)
+    edge = read_png(edge_path)
+    assert (len(edge[0]), len(edge)) == (60, 40)
+    assert {pixel for row in edge for pixel in row} == {BLUE}
+
+
+def test_capture_errors(tmp_path, windows):
+    path = tmp_path / "error.png"
+
+    with pytest.raises(X11Error, match="not visible"):
+        x11capture.capture_window(path, windows["hidden"])
+    with pytest.raises(X11Error, match="does not exist"):
+        x11capture.capture_window(path, 0x7FFFFFF)
+    with pytest.raises(X11Error, match="Screen 1 does not exist"):
+        x11capture.capture_screen(path, screen_index=1)
+    with pytest.raises(X11Error, match="outside the screen"):
+        x11capture.capture_screen(path, region=Region(WIDTH, 0, 10, 10))
+    with pytest.raises(X11Error, match="outside the window"):
+        x11capture.capture_window(path, windows["red"], region=Region(100, 0, 5, 5))
+    assert not path.exists()
+
+
+def test_list_windows(windows):
+    listed = x11capture.list_windows()
+
+    assert listed == [
+        {"id": windows["red"], "title": "notes.txt — Editor", "owner": "Editor"},
+        {"id": windows["blue"], "title": "café", "owner": "XTerm"},
+        {"id": windows["hidden"], "title": "", "owner": ""},
+    ]
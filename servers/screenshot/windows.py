@@ -0,0 +1,305 @@
+"""Window lookup: a cached index of on-screen windows with ranked matching.
+
+Enumerating windows (Quartz window list, X11 client list and one property
+read per window) costs far more than matching a title against a few dozen
+labels. The index keeps the last enumeration for MCP_SCREENSHOT_WINDOW_TTL
+seconds (default 2) and serves find, search and listing from it. It is
+dropped early when a capture of a window fails (the window may be gone),
+and refreshed once when a lookup finds nothing in an older enumeration
+(the window may be new).
+
+Windows come from a WindowSource: Quartz on macOS, the window manager's
+client list on X11, or any other implementation (e.g. a fixed list).
+"""
+
+import os
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+import x11capture
+
+WINDOW_TTL = 2.0
+
+# Scores of the match kinds, best first (see match_score)
+EXACT = 100
+PREFIX = 90
+TITLE = 80
+OWNER = 70
+LABEL = 65
+WORDS = 50
+# Subsequence matches score up to FUZZY, by how tightly the letters cluster
+FUZZY = 40
+# Loosest subsequence kept: letters spread over at most twice their count
+MIN_FUZZY = FUZZY / 2
+
+
+def ttl_from_env() -> float:
+    """Seconds a window enumeration is reused, from MCP_SCREENSHOT_WINDOW_TTL."""
+    try:
+        return max(0.0, float(os.environ.get("MCP_SCREENSHOT_WINDOW_TTL", WINDOW_TTL)))
+    except ValueError:
+        return WINDOW_TTL
+
+
+class WindowSourceError(Exception):
+    """Windows cannot be enumerated."""
+
+
+@dataclass(frozen=True)
+class Window:
+    """An on-screen window."""
+
+    id: int
+    owner: str
+    title: str
+
+    @property
+    def label(self) -> str:
+        """Owner and title as "Owner: Title", or whichever is set."""
+        if self.owner and self.title:
+            return f"{self.owner}: {self.title}"
+        return self.owner or self.title
+
+
+class WindowSource(ABC):
+    """Enumerates the windows that can be captured."""
+
+    @abstractmethod
+    def list_windows(self) -> list[Window]:
+        """
+        On-screen windows, frontmost first when the platform knows.
+
+        Raises:
+            WindowSourceError: Windows cannot be enumerated
+        """
+
+
+class QuartzWindowSource(WindowSource):
+    """macOS windows from CGWindowListCopyWindowInfo (frontmost first)."""
+
+    def list_windows(self) -> list[Window]:
+        try:
+            import Quartz
+        except ImportError:
+            raise WindowSourceError(
+                "Install pyobjc-framework-Quartz to list windows"
+            ) from None
+        try:
+            window_list = Quartz.CGWindowListCopyWindowInfo(
+                Quartz.kCGWindowListOptionOnScreenOnly
+                | Quartz.kCGWindowListExcludeDesktopElements,
+                Quartz.kCGNullWindowID,
+            )
+        except Exception as e:
+            raise WindowSourceError(f"Cannot list windows: {e}") from None
+        return [
+            Window(
+                int(window.get(Quartz.kCGWindowNumber)),
+                window.get(Quartz.kCGWindowOwnerName) or "",
+                window.get(Quartz.kCGWindowName) or "",
+            )
+            for window in window_list or ()
+            if window.get(Quartz.kCGWindowNumber) is not None
+        ]
+
+
+class X11WindowSource(WindowSource):
+    """X11 top-level windows from the window manager's client list."""
+
+    def list_windows(self) -> list[Window]:
+        if not x11capture.available():
+            raise WindowSourceError("No X11 display")
+        try:
+            windows = x11capture.list_windows()
+        except x11capture.X11Error as e:
+            raise WindowSourceError(f"Cannot list windows: {e}") from None
+        return [Window(w["id"], w["owner"], w["title"]) for w in windows]
+
+
+class NullWindowSource(WindowSource):
+    """No windows (unsupported platforms)."""
+
+    def list_windows(self) -> list[Window]:
+        return []
+
+
+def default_source() -> WindowSource:
+    """The window source of this platform."""
+    if sys.platform == "darwin":
+        return QuartzWindowSource()
+    if sys.platform.startswith("linux"):
+        return X11WindowSource()
+    return NullWindowSource()
+
+
+@dataclass(frozen=True)
+class _Keys:
+    """Lowercased strings a window is matched on."""
+
+    window: Window
+    title: str
+    owner: str
+    label: str
+    words: tuple[str, ...]
+
+
+def _keys(window: Window) -> _Keys:
+    label = window.label.casefold()
+    return _Keys(
+        window,
+        window.title.casefold(),
+        window.owner.casefold(),
+        label,
+        tuple(label.replace(":", " ").split()),
+    )
+
+
+def _fuzzy(query: str, text: str) -> float:
+    """Score of `query` as a subsequence of `text`, 0 when it is not one."""
+    best = 0  # Shortest span of `text` holding the letters in order
+    for start, char in enumerate(text):
+        if char != query[0]:
+            continue
+        position = start
+        for wanted in query[1:]:
+            position = text.find(wanted, position + 1)
+            if position < 0:
+                # Later starts cannot complete either
+                return len(query) / best * FUZZY if best else 0.0
+        if not best or position - start + 1 < best:
+            best = position - start + 1
+    return len(query) / best * FUZZY if best else 0.0
+
+
+def match_score(query: str, keys: _Keys) -> float:
+    """
+    How well a casefolded, non-empty query matches a window (0: no match).
+
+    Exact title, owner or label beats a prefix, which beats a substring of
+    the title, of the owner, then of the whole label. Then come queries
+    whose words all start words of the label, and last the letters of the
+    query in order in the label, ranked by how close together they are.
+    """
+    if query in (keys.title, keys.owner, keys.label):
+        return EXACT
+    if keys.title.startswith(query) or keys.owner.startswith(query):
+        return PREFIX
+    if query in keys.title:
+        return TITLE
+    if query in keys.owner:
+        return OWNER
+    if query in keys.label:
+        return LABEL
+    words = query.replace(":", " ").split()
+    if words and all(
+        any(word.startswith(part) for word in keys.words) for part in words
+    ):
+        return WORDS
+    if len(query) < 3:
+        return 0.0
+    score = _fuzzy(query.replace(" ", ""), keys.label)
+    return score if score >= MIN_FUZZY else 0.0
+
+
+class WindowIndex:
+    """Cached window enumeration with ranked title lookup (thread-safe)."""
+
+    def __init__(
+        self,
+        source: WindowSource,
+        ttl: float = WINDOW_TTL,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Args:
+            source: Where windows come from
+            ttl: Seconds an enumeration is reused (0 enumerates every time)
+            clock: Monotonic time, in seconds
+        """
+        self.source = source
+        self.ttl = ttl
+        self.clock = clock
+        self.hits = 0
+        self.refreshes = 0
+        self._keys: list[_Keys] = []
+        self._built_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def invalidate(self) -> None:
+        """Enumerate again on the next lookup."""
+        with self._lock:
+            self._built_at = None
+
+    def _entries(self, refresh: bool = False) -> tuple[list[_Keys], bool]:
+        """
+        The indexed windows, and whether they were enumerated by this call.
+
+        Raises:
+            WindowSourceError: Windows cannot be enumerated (nothing cached)
+        """
+        with self._lock:
+            built_at = self._built_at
+            if not refresh and built_at is not None:
+                if self.clock() - built_at < self.ttl:
+                    self.hits += 1
+                    return self._keys, False
+            # Enumerate under the lock: concurrent lookups share one refresh
+            windows = self.source.list_windows()
+            self._keys = [_keys(window) for window in windows]
+            self._built_at = self.clock()
+            self.refreshes += 1
+            return self._keys, True
+
+    def windows(self) -> list[Window]:
+        """
+        All windows, in source order.
+
+        Raises:
+            WindowSourceError: Windows cannot be enumerated
+        """
+        entries, _ = self._entries()
+        return [keys.window for keys in entries]
+
+    def search(self, query: str, limit: Optional[int] = None) -> list[Window]:
+        """
+        Windows matching `query`, best match first (source order on ties).
+
+        An enumeration older than this call is refreshed once when nothing
+        matches.
+
+        Raises:
+            WindowSourceError: Windows cannot be enumerated
+        """
+        query = " ".join(query.casefold().split())
+        entries, fresh = self._entries()
+        if not query:
+            return [keys.window for keys in entries][:limit]
+        ranked = self._rank(query, entries)
+        if not ranked and not fresh:
+            ranked = self._rank(query, self._entries(refresh=True)[0])
+        return [window for _, window in ranked][:limit]
+
+    @staticmethod
+    def _rank(query: str, entries: list[_Keys]) -> list[tuple[float, Window]]:
+        scored = []
+        for keys in entries:
+            score = match_score(query, keys)
+            if score:
+                scored.append((score, keys.window))
+        # sort is stable: equal scores keep the source (front to back) order
+        scored.sort(key=lambda item: -item[0])
+        return scored
+
+    def find(self, query: str) -> Optional[Window]:
+        """
+        The best window for `query`, None when nothing matches.
+
+        Raises:
+            WindowSourceError: Windows cannot be enumerated
+        """
+        matches = self.search(query, limit=1)
+        return matches[0] if matches else None
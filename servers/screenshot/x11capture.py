@@ -0,0 +1,641 @@
+"""Screen and window capture on Linux through X11 (Xlib via ctypes).
+
+Frames are read in process: with the MIT-SHM extension the X server
+copies the pixels into a shared memory segment, without going through
+the socket; without it (remote displays) XGetImage is used. Windows are
+listed from the window manager's _NET_CLIENT_LIST, titled by _NET_WM_NAME
+(or WM_NAME) and owned by their WM_CLASS.
+
+Only libX11 and libXext are needed. PNG files are encoded with the
+standard library; JPEG requires Pillow.
+"""
+
+import ctypes
+import ctypes.util
+import functools
+import os
+import struct
+import threading
+import zlib
+from pathlib import Path
+from typing import Iterator, Optional
+
+from region import Region
+
+# Xlib constants
+ZPIXMAP = 2
+ALL_PLANES = ctypes.c_ulong(-1).value
+IS_VIEWABLE = 2
+XA_WINDOW = 33
+ANY_PROPERTY_TYPE = 0
+SUCCESS = 0
+LSB_FIRST = 0
+
+# System V shared memory
+IPC_PRIVATE = 0
+IPC_CREAT = 0o1000
+IPC_RMID = 0
+
+# Most windows read from _NET_CLIENT_LIST
+MAX_WINDOWS = 4096
+
+# Recorded instead of an X error code when the connection is lost
+IO_ERROR = -1
+
+# X errors are reported asynchronously: serialize all Xlib use
+_lock = threading.Lock()
+_errors: list[int] = []
+
+
+class X11Error(Exception):
+    """The display cannot be opened or a capture failed."""
+
+
+class XImage(ctypes.Structure):
+    """Leading fields of Xlib's XImage (only read, never allocated here)."""
+
+    _fields_ = [
+        ("width", ctypes.c_int),
+        ("height", ctypes.c_int),
+        ("xoffset", ctypes.c_int),
+        ("format", ctypes.c_int),
+        ("data", ctypes.c_void_p),
+        ("byte_order", ctypes.c_int),
+        ("bitmap_unit", ctypes.c_int),
+        ("bitmap_bit_order", ctypes.c_int),
+        ("bitmap_pad", ctypes.c_int),
+        ("depth", ctypes.c_int),
+        ("bytes_per_line", ctypes.c_int),
+        ("bits_per_pixel", ctypes.c_int),
+        ("red_mask", ctypes.c_ulong),
+        ("green_mask", ctypes.c_ulong),
+        ("blue_mask", ctypes.c_ulong),
+    ]
+
+
+class XShmSegmentInfo(ctypes.Structure):
+    _fields_ = [
+        ("shmseg", ctypes.c_ulong),
+        ("shmid", ctypes.c_int),
+        ("shmaddr", ctypes.c_void_p),
+        ("readOnly", ctypes.c_int),
+    ]
+
+
+class XWindowAttributes(ctypes.Structure):
+    _fields_ = [
+        ("x", ctypes.c_int),
+        ("y", ctypes.c_int),
+        ("width", ctypes.c_int),
+        ("height", ctypes.c_int),
+        ("border_width", ctypes.c_int),
+        ("depth", ctypes.c_int),
+        ("visual", ctypes.c_void_p),
+        ("root", ctypes.c_ulong),
+        ("class", ctypes.c_int),
+        ("bit_gravity", ctypes.c_int),
+        ("win_gravity", ctypes.c_int),
+        ("backing_store", ctypes.c_int),
+        ("backing_planes", ctypes.c_ulong),
+        ("backing_pixel", ctypes.c_ulong),
+        ("save_under", ctypes.c_int),
+        ("colormap", ctypes.c_ulong),
+        ("map_installed", ctypes.c_int),
+        ("map_state", ctypes.c_int),
+        ("all_event_masks", ctypes.c_long),
+        ("your_event_mask", ctypes.c_long),
+        ("do_not_propagate_mask", ctypes.c_long),
+        ("override_redirect", ctypes.c_int),
+        ("screen", ctypes.c_void_p),
+    ]
+
+
+class XErrorEvent(ctypes.Structure):
+    _fields_ = [
+        ("type", ctypes.c_int),
+        ("display", ctypes.c_void_p),
+        ("resourceid", ctypes.c_ulong),
+        ("serial", ctypes.c_ulong),
+        ("error_code", ctypes.c_ubyte),
+        ("request_code", ctypes.c_ubyte),
+        ("minor_code", ctypes.c_ubyte),
+    ]
+
+
+class XClassHint(ctypes.Structure):
+    _fields_ = [("res_name", ctypes.c_void_p), ("res_class", ctypes.c_void_p)]
+
+
+_ERROR_HANDLER = ctypes.CFUNCTYPE(
+    ctypes.c_int, ctypes.c_void_p, ctypes.POINTER(XErrorEvent)
+)
+
+
+@_ERROR_HANDLER
+def _on_error(display, event) -> int:
+    """Record X errors instead of letting Xlib exit the process."""
+    _errors.append(event.contents.error_code)
+    return 0
+
+
+_IO_ERROR_HANDLER = ctypes.CFUNCTYPE(ctypes.c_int, ctypes.c_void_p)
+_IO_EXIT_HANDLER = ctypes.CFUNCTYPE(None, ctypes.c_void_p, ctypes.c_void_p)
+
+
+@_IO_ERROR_HANDLER
+def _on_io_error(display) -> int:
+    """Return (instead of exiting like Xlib's default) on a lost connection."""
+    return 0
+
+
+@_IO_EXIT_HANDLER
+def _on_io_exit(display, data) -> None:
+    """Record a lost connection instead of letting Xlib exit the process."""
+    _errors.append(IO_ERROR)
+
+
+def _signatures(lib, signatures: dict) -> None:
+    """Set argtypes/restype of the library functions used."""
+    for name, (restype, *argtypes) in signatures.items():
+        function = getattr(lib, name)
+        function.restype = restype
+        function.argtypes = argtypes
+
+
+@functools.cache
+def _libs() -> tuple:
+    """Load libX11, libXext and libc (X11Error if missing)."""
+    names = [ctypes.util.find_library(n) for n in ("X11", "Xext", "c")]
+    if not all(names):
+        raise X11Error("libX11 and libXext are required for capture on Linux")
+    x11, xext, libc = (ctypes.CDLL(name) for name in names)
+
+    p, ul, i = ctypes.c_void_p, ctypes.c_ulong, ctypes.c_int
+    _signatures(
+        x11,
+        {
+            "XInitThreads": (i,),
+            "XOpenDisplay": (p, ctypes.c_char_p),
+            "XCloseDisplay": (i, p),
+            "XSetErrorHandler": (p, _ERROR_HANDLER),
+            "XSync": (i, p, i),
+            "XScreenCount": (i, p),
+            "XRootWindow": (ul, p, i),
+            "XDefaultRootWindow": (ul, p),
+            "XGetWindowAttributes": (i, p, ul, ctypes.POINTER(XWindowAttributes)),
+            "XTranslateCoordinates": (
+                i,
+                p,
+                ul,
+                ul,
+                i,
+                i,
+                ctypes.POINTER(i),
+                ctypes.POINTER(i),
+                ctypes.POINTER(ul),
+            ),
+            "XGetImage": (
+                ctypes.POINTER(XImage),
+                p,
+                ul,
+                i,
+                i,
+                ctypes.c_uint,
+                ctypes.c_uint,
+                ul,
+                i,
+            ),
+            "XDestroyImage": (i, ctypes.POINTER(XImage)),
+            "XInternAtom": (ul, p, ctypes.c_char_p, i),
+            "XGetWindowProperty": (
+                i,
+                p,
+                ul,
+                ul,
+                ctypes.c_long,
+                ctypes.c_long,
+                i,
+                ul,
+                ctypes.POINTER(ul),
+                ctypes.POINTER(i),
+                ctypes.POINTER(ul),
+                ctypes.POINTER(ul),
+                ctypes.POINTER(p),
+            ),
+            "XFetchName": (i, p, ul, ctypes.POINTER(p)),
+            "XGetClassHint": (i, p, ul, ctypes.POINTER(XClassHint)),
+            "XFree": (i, p),
+        },
+    )
+    _signatures(
+        xext,
+        {
+            "XShmQueryExtension": (i, p),
+            "XShmCreateImage": (
+                ctypes.POINTER(XImage),
+                p,
+                p,
+                ctypes.c_uint,
+                i,
+                p,
+                ctypes.POINTER(XShmSegmentInfo),
+                ctypes.c_uint,
+                ctypes.c_uint,
+            ),
+            "XShmAttach": (i, p, ctypes.POINTER(XShmSegmentInfo)),
+            "XShmDetach": (i, p, ctypes.POINTER(XShmSegmentInfo)),
+            "XShmGetImage": (i, p, ul, ctypes.POINTER(XImage), i, i, ul),
+        },
+    )
+    _signatures(
+        libc,
+        {
+            "shmget": (i, i, ctypes.c_size_t, i),
+            "shmat": (p, i, p, i),
+            "shmdt": (i, p),
+            "shmctl": (i, i, i, p),
+        },
+    )
+    # libX11 1.7+: without it a lost connection exits the process
+    if hasattr(x11, "XSetIOErrorExitHandler"):
+        _signatures(
+            x11,
+            {
+                "XSetIOErrorHandler": (p, _IO_ERROR_HANDLER),
+                "XSetIOErrorExitHandler": (None, p, _IO_EXIT_HANDLER, p),
+            },
+        )
+        x11.XSetIOErrorHandler(_on_io_error)
+    x11.XInitThreads()
+    x11.XSetErrorHandler(_on_error)
+    return x11, xext, libc
+
+
+def available() -> bool:
+    """Whether an X display is configured and Xlib can be loaded."""
+    if not os.environ.get("DISPLAY"):
+        return False
+    try:
+        _libs()
+    except (X11Error, OSError):
+        return False
+    return True
+
+
+class _Display:
+    """An open display connection (use as a context manager, lock held)."""
+
+    def __init__(self):
+        self.x11, self.xext, self.libc = _libs()
+        self.handle = self.x11.XOpenDisplay(None)
+        if not self.handle:
+            raise X11Error(f"Cannot open X display {os.environ.get('DISPLAY')!r}")
+        if hasattr(self.x11, "XSetIOErrorExitHandler"):
+            self.x11.XSetIOErrorExitHandler(self.handle, _on_io_exit, None)
+        _errors.clear()
+
+    def __enter__(self) -> "_Display":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.x11.XCloseDisplay(self.handle)
+
+    def sync(self) -> Optional[int]:
+        """Flush requests; the first X error code since the last sync."""
+        self.x11.XSync(self.handle, 0)
+        if IO_ERROR in _errors:
+            raise X11Error("Connection to the X server lost")
+        error = _errors[0] if _errors else None
+        _errors.clear()
+        return error
+
+    def atom(self, name: str) -> int:
+        return self.x11.XInternAtom(self.handle, name.encode(), 0)
+
+    def property(self, window: int, name: str, kind: int = ANY_PROPERTY_TYPE):
+        """(format, item count, raw bytes) of a window property, or None."""
+        actual_type, actual_format = ctypes.c_ulong(), ctypes.c_int()
+        count, after, data = ctypes.c_ulong(), ctypes.c_ulong(), ctypes.c_void_p()
+        status = self.x11.XGetWindowProperty(
+            self.handle,
+            window,
+            self.atom(name),
+            0,
+            MAX_WINDOWS,
+            0,
+            kind,
+            ctypes.byref(actual_type),
+            ctypes.byref(actual_format),
+            ctypes.byref(count),
+            ctypes.byref(after),
+            ctypes.byref(data),
+        )
+        if status != SUCCESS or not data.value:
+            return None
+        try:
+            # Xlib returns 32-bit items as C longs
+            item = {8: 1, 16: 2, 32: ctypes.sizeof(ctypes.c_long)}
+            size = count.value * item.get(actual_format.value, 1)
+            return actual_format.value, count.value, ctypes.string_at(data, size)
+        finally:
+            self.x11.XFree(data)
+
+    def attributes(self, window: int) -> XWindowAttributes:
+        attributes = XWindowAttributes()
+        if not self.x11.XGetWindowAttributes(
+            self.handle, window, ctypes.byref(attributes)
+        ):
+            raise X11Error(f"Window {window:#x} does not exist")
+        return attributes
+
+    def grab(self, drawable: int, x: int, y: int, width: int, height: int) -> tuple:
+        """Pixels of a rectangle: (raw bytes, XImage fields used to decode)."""
+        if self.xext.XShmQueryExtension(self.handle):
+            try:
+                return self._grab_shm(drawable, x, y, width, height)
+            except X11Error:
+                pass  # E.g. a remote display cannot attach local memory
+        image = self.x11.XGetImage(
+            self.handle, drawable, x, y, width, height, ALL_PLANES, ZPIXMAP
+        )
+        if not image:
+            self.sync()
+            raise X11Error("XGetImage failed")
+        try:
+            return _image_bytes(image.contents), _layout(image.contents)
+        finally:
+            self.x11.XDestroyImage(image)
+
+    def _grab_shm(self, drawable, x, y, width, height) -> tuple:
+        """Grab through a shared memory segment (MIT-SHM)."""
+        attributes = self.attributes(drawable)
+        info = XShmSegmentInfo()
+        image = self.xext.XShmCreateImage(
+            self.handle,
+            attributes.visual,
+            attributes.depth,
+            ZPIXMAP,
+            None,
+            ctypes.byref(info),
+            width,
+            height,
+        )
+        if not image:
+            raise X11Error("XShmCreateImage failed")
+        size = image.contents.bytes_per_line * height
+        info.shmid = self.libc.shmget(IPC_PRIVATE, size, IPC_CREAT | 0o600)
+        if info.shmid < 0:
+            self.x11.XDestroyImage(image)
+            raise X11Error("shmget failed")
+        attached = False
+        try:
+            info.shmaddr = self.libc.shmat(info.shmid, None, 0)
+            if info.shmaddr in (None, ctypes.c_void_p(-1).value):
+                raise X11Error("shmat failed")
+            image.contents.data = info.shmaddr
+            info.readOnly = 0
+            attached = bool(self.xext.XShmAttach(self.handle, ctypes.byref(info)))
+            if not attached or self.sync() is not None:
+                attached = False
+                raise X11Error("XShmAttach failed")
+            if (
+                not self.xext.XShmGetImage(
+                    self.handle, drawable, image, x, y, ALL_PLANES
+                )
+                or self.sync() is not None
+            ):
+                raise X11Error("XShmGetImage failed")
+            return _image_bytes(image.contents), _layout(image.contents)
+        finally:
+            if attached:
+                # Flushed with the next request or when the display closes
+                self.xext.XShmDetach(self.handle, ctypes.byref(info))
+            # Shared memory images do not own their data
+            self.x11.XDestroyImage(image)
+            if info.shmaddr:
+                self.libc.shmdt(info.shmaddr)
+            self.libc.shmctl(info.shmid, IPC_RMID, None)
+
+
+def _image_bytes(image: XImage) -> bytes:
+    """Copy the image data out of Xlib or shared memory."""
+    return ctypes.string_at(image.data, image.bytes_per_line * image.height)
+
+
+def _layout(image: XImage) -> dict:
+    """What decoding needs from an XImage."""
+    if image.bits_per_pixel != 32:
+        raise X11Error(f"Unsupported {image.bits_per_pixel}-bit display")
+    return {
+        "width": image.width,
+        "height": image.height,
+        "stride": image.bytes_per_line,
+        "lsb_first": image.byte_order == LSB_FIRST,
+        "masks": (image.red_mask, image.green_mask, image.blue_mask),
+    }
+
+
+def _channel_offsets(layout: dict) -> tuple[int, int, int]:
+    """Byte offset of red, green and blue within a 32-bit pixel."""
+    offsets = []
+    for mask in layout["masks"]:
+        shift = (mask & -mask).bit_length() - 1
+        if mask >> shift != 0xFF or shift % 8:
+            raise X11Error(f"Unsupported pixel mask {mask:#x}")
+        offsets.append(shift // 8 if layout["lsb_first"] else 3 - shift // 8)
+    return tuple(offsets)
+
+
+def _rgb_rows(raw: bytes, layout: dict) -> Iterator[bytes]:
+    """RGB rows, converted a row at a time by slice assignment (no loops)."""
+    width, stride = layout["width"], layout["stride"]
+    red, green, blue = _channel_offsets(layout)
+    row = bytearray(width * 3)
+    for start in range(0, stride * layout["height"], stride):
+        pixels = raw[start : start + width * 4]
+        row[0::3] = pixels[red::4]
+        row[1::3] = pixels[green::4]
+        row[2::3] = pixels[blue::4]
+        yield bytes(row)
+
+
+def _png_chunk(kind: bytes, data: bytes) -> bytes:
+    return (
+        struct.pack(">I", len(data))
+        + kind
+        + data
+        + struct.pack(">I", zlib.crc32(kind + data))
+    )
+
+
+def _write_png(filepath: Path, raw: bytes, layout: dict) -> None:
+    """Encode as an 8-bit RGB PNG with zlib (no image library)."""
+    compressor = zlib.compressobj(6)
+    parts = []
+    for row in _rgb_rows(raw, layout):
+        parts.append(compressor.compress(b"\x00" + row))  # Filter: none
+    parts.append(compressor.flush())
+    header = struct.pack(">IIBBBBB", layout["width"], layout["height"], 8, 2, 0, 0, 0)
+    filepath.write_bytes(
+        b"\x89PNG\r\n\x1a\n"
+        + _png_chunk(b"IHDR", header)
+        + _png_chunk(b"IDAT", b"".join(parts))
+        + _png_chunk(b"IEND", b"")
+    )
+
+
+def to_image(raw: bytes, layout: dict):
+    """A Pillow RGB image viewing the grabbed pixels (Pillow required)."""
+    try:
+        from PIL import Image
+    except ImportError:
+        raise X11Error("Pillow is required") from None
+    red, green, blue = _channel_offsets(layout)
+    order = {red: "R", green: "G", blue: "B"}
+    mode = "".join(order.get(i, "X") for i in range(4))
+    size = (layout["width"], layout["height"])
+    return Image.frombuffer("RGB", size, raw, "raw", mode, layout["stride"], 1)
+
+
+def _save(filepath: Path, raw: bytes, layout: dict, format: str) -> None:
+    """Write the grabbed pixels as PNG, or JPEG through Pillow."""
+    if format == "png":
+        _write_png(filepath, raw, layout)
+        return
+    try:
+        image = to_image(raw, layout)
+    except X11Error:
+        raise X11Error("JPEG capture on Linux requires Pillow") from None
+    image.save(filepath, "JPEG", quality=90)
+
+
+def grab_screen(
+    screen_index: int = 0, region: Optional[Region] = None
+) -> tuple[bytes, dict]:
+    """Pixels of an X screen (or of a region of it) and their layout."""
+    with _lock, _Display() as display:
+        count = display.x11.XScreenCount(display.handle)
+        if not 0 <= screen_index < count:
+            raise X11Error(f"Screen {screen_index} does not exist ({count} screens)")
+        root = display.x11.XRootWindow(display.handle, screen_index)
+        screen = display.attributes(root)
+        area = Region(0, 0, screen.width, screen.height)
+        if region is not None:
+            # X11 has no display scale: points are pixels
+            area = region.to_pixels(1.0).clip(screen.width, screen.height)
+            if area is None:
+                raise X11Error("Region is outside the screen")
+        return display.grab(root, area.x, area.y, area.width, area.height)
+
+
+def grab_window(window_id: int, region: Optional[Region] = None) -> tuple[bytes, dict]:
+    """
+    Pixels of a window's area of the screen (or of a region of the window,
+    relative to its top-left corner) and their layout.
+
+    The area is read from the root window, so windows overlapping it are
+    included, as on screen.
+    """
+    with _lock, _Display() as display:
+        attributes = display.attributes(window_id)
+        if attributes.map_state != IS_VIEWABLE:
+            raise X11Error("Window is not visible (minimized or on another desktop)")
+        root = display.x11.XDefaultRootWindow(display.handle)
+        x, y, child = ctypes.c_int(), ctypes.c_int(), ctypes.c_ulong()
+        display.x11.XTranslateCoordinates(
+            display.handle,
+            window_id,
+            root,
+            0,
+            0,
+            ctypes.byref(x),
+            ctypes.byref(y),
+            ctypes.byref(child),
+        )
+        area = Region(x.value, y.value, attributes.width, attributes.height)
+        if region is not None:
+            inside = region.to_pixels(1.0).clip(attributes.width, attributes.height)
+            if inside is None:
+                raise X11Error("Region is outside the window")
+            area = Region(
+                x.value + inside.x, y.value + inside.y, inside.width, inside.height
+            )
+        screen = display.attributes(root)
+        # Clip to the screen: grabbing outside the root window fails
+        area = area.clip(screen.width, screen.height)
+        if area is None:
+            raise X11Error("Window is off screen")
+        return display.grab(root, area.x, area.y, area.width, area.height)
+
+
+def capture_screen(
+    filepath: Path,
+    screen_index: int = 0,
+    format: str = "png",
+    region: Optional[Region] = None,
+) -> None:
+    """Capture an X screen (or a region of it) to `filepath`."""
+    _save(filepath, *grab_screen(screen_index, region), format)
+
+
+def capture_window(
+    filepath: Path,
+    window_id: int,
+    format: str = "png",
+    region: Optional[Region] = None,
+) -> None:
+    """Capture a window's area of the screen to `filepath` (see grab_window)."""
+    _save(filepath, *grab_window(window_id, region), format)
+
+
+def list_windows() -> list[dict]:
+    """Top-level windows of the window manager: id, title and owner (class)."""
+    with _lock, _Display() as display:
+        root = display.x11.XDefaultRootWindow(display.handle)
+        clients = display.property(root, "_NET_CLIENT_LIST", XA_WINDOW)
+        if clients is None:
+            return []
+        _, count, data = clients
+        ids = (ctypes.c_ulong * count).from_buffer_copy(data)
+        windows = []
+        for window_id in ids:
+            title = _window_title(display, window_id)
+            if display.sync() is not None:
+                continue  # Closed meanwhile
+            windows.append(
+                {
+                    "id": window_id,
+                    "title": title,
+                    "owner": _window_class(display, window_id),
+                }
+            )
+        return windows
+
+
+def _window_title(display: _Display, window_id: int) -> str:
+    """_NET_WM_NAME (UTF-8), else the legacy WM_NAME."""
+    name = display.property(window_id, "_NET_WM_NAME", display.atom("UTF8_STRING"))
+    if name is not None:
+        return name[2].decode("utf-8", "replace")
+    legacy = ctypes.c_void_p()
+    if display.x11.XFetchName(display.handle, window_id, ctypes.byref(legacy)):
+        try:
+            return ctypes.string_at(legacy).decode("latin-1")
+        finally:
+            display.x11.XFree(legacy)
+    return ""
+
+
+def _window_class(display: _Display, window_id: int) -> str:
+    """Application class from WM_CLASS (e.g. "firefox")."""
+    hint = XClassHint()
+    if not display.x11.XGetClassHint(display.handle, window_id, ctypes.byref(hint)):
+        return ""
+    try:
+        if not hint.res_class:
+            return ""
+        return ctypes.string_at(hint.res_class).decode("utf-8", "replace")
+    finally:
+        for value in (hint.res_name, hint.res_class):
+            if value:
+                display.x11.XFree(value)